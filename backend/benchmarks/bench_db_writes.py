@@ -0,0 +1,146 @@
+"""Measures SQLite write throughput when many downloads finish at once.
+
+Usage (from backend/):
+    python benchmarks/bench_db_writes.py --downloads 8 --videos 200
+
+Each worker thread plays one download finishing over and over: it registers
+the video and thumbnail files, updates the video row, then registers the
+sprite sheets and VTT and updates the row again, the same writes Ytdlp and
+PostProcessor make. Runs against a throwaway database once with SQLite's
+defaults and once with the tuned pragmas from src.db.
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from sqlmodel import Session, SQLModel, select, update
+from src.db import SQLITE_PRAGMAS, FileDB, VideoDB, make_engine
+
+DEFAULT_PRAGMAS = {"busy_timeout": 5000}
+
+
+def make_video(index: int) -> VideoDB:
+    return VideoDB(
+        id=f"video_{index}",
+        url=f"https://example.com/{index}",
+        format="BEST",
+        type="download",
+        videoId=str(index),
+        fullTitle=f"Video {index}",
+        durationString="1:00",
+        size="",
+        resolution="",
+        downloadStatus="downloading",
+        audioOnly=False,
+        watched=False,
+        downloaded=False,
+        prevWatchTime=0,
+        videoPathId="",
+        thumbnailPathId="",
+        vttPathId="",
+        vttSpritePathId="",
+    )
+
+
+def register_files(engine, paths: list[str]) -> list[str]:
+    with Session(engine) as session:
+        stmt = select(FileDB).where(FileDB.filePath.in_(paths))  # type: ignore
+        ids = {file.filePath: file.id for file in session.exec(stmt).all()}
+        for path in paths:
+            if path not in ids:
+                file = FileDB(filePath=path)
+                session.add(file)
+                ids[path] = file.id
+        session.commit()
+        return [ids[path] for path in paths]
+
+
+def update_video(engine, video_id: str, **values):
+    with Session(engine) as session:
+        session.exec(update(VideoDB).where(VideoDB.id == video_id).values(**values))  # type: ignore
+        session.commit()
+
+
+def finish_download(engine, index: int, sheets: int) -> int:
+    video_id = f"video_{index}"
+    video_path_id, thumb_id = register_files(
+        engine, [f"/videos/{index}.mp4", f"/thumbs/{index}.jpg"]
+    )
+    update_video(
+        engine,
+        video_id,
+        videoPathId=video_path_id,
+        thumbnailPathId=thumb_id,
+        downloadStatus="completed",
+    )
+    *sheet_ids, vtt_id = register_files(
+        engine,
+        [f"/sprite/{index}_{n:03}.jpg" for n in range(sheets)] + [f"/vtt/{index}.vtt"],
+    )
+    update_video(engine, video_id, vttPathId=vtt_id, vttSpritePathId=sheet_ids[0])
+    return 4
+
+
+def run(label: str, pragmas: dict, downloads: int, videos: int, sheets: int) -> dict:
+    with tempfile.TemporaryDirectory() as temp:
+        engine = make_engine(f"sqlite:///{temp}/bench.sqlite", pragmas=pragmas)
+        SQLModel.metadata.create_all(engine)
+        with Session(engine) as session:
+            session.add_all(make_video(i) for i in range(videos))
+            session.commit()
+
+        errors = []
+        transactions = [0] * downloads
+
+        def worker(slot: int):
+            for index in range(slot, videos, downloads):
+                try:
+                    transactions[slot] += finish_download(engine, index, sheets)
+                except Exception as e:
+                    errors.append(repr(e))
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(downloads)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        engine.dispose()
+
+    total = sum(transactions)
+    return {
+        "config": label,
+        "downloads": downloads,
+        "videos": videos,
+        "seconds": round(elapsed, 3),
+        "writeTransactionsPerSec": round(total / elapsed, 1),
+        "videosPerSec": round(videos / elapsed, 1),
+        "errors": len(errors),
+        "firstError": errors[0] if errors else "",
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--downloads", type=int, default=8, help="concurrent writers")
+    parser.add_argument("--videos", type=int, default=200)
+    parser.add_argument("--sheets", type=int, default=3, help="sprite sheets per video")
+    args = parser.parse_args()
+
+    results = [
+        run("default", DEFAULT_PRAGMAS, args.downloads, args.videos, args.sheets),
+        run("tuned", SQLITE_PRAGMAS, args.downloads, args.videos, args.sheets),
+    ]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""Compares the old /api/files handler with the media streaming path.
+
+Usage (from backend/):
+    python benchmarks/bench_media_serving.py --size-mb 512 --clients 16
+
+Each mode runs a server in its own process serving one throwaway file:
+
+- old: plain FileResponse with an attachment disposition, as serve_file did
+- media: MediaFileResponse, kernel sendfile with the stream cap
+- media-chunked: MediaFileResponse with sendfile disabled, so the chunked
+  fallback with MEDIA_CHUNK_SIZE reads is what gets measured
+
+``--clients`` concurrent clients then play a seeking player: every request
+asks for a random ``--range-mb`` byte range. Reported are aggregate MB/s,
+request latency percentiles and the server's CPU seconds.
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import aiohttp
+from aiohttp import web
+
+MODES = {
+    "old": {},
+    "media": {},
+    "media-chunked": {"MEDIA_SENDFILE": "0"},
+}
+
+
+def serve(mode: str, file_path: str, port: int, max_streams: int, env: dict):
+    os.environ.update(env)
+    os.environ["MEDIA_MAX_STREAMS"] = str(max_streams)
+    from src.media import MediaFileResponse, media_streams
+
+    async def old(request):
+        return web.FileResponse(
+            file_path,
+            headers={"Content-Disposition": 'attachment; filename="bench.mp4"'},
+        )
+
+    async def media(request):
+        stream = await media_streams.acquire("bench")
+        return MediaFileResponse(file_path, stream)
+
+    async def cpu(request):
+        return web.json_response(
+            {"cpuSeconds": time.process_time(), "streams": media_streams.stats()}
+        )
+
+    app = web.Application()
+    app.router.add_get("/file", old if mode == "old" else media)
+    app.router.add_get("/cpu", cpu)
+    web.run_app(app, host="127.0.0.1", port=port, print=None)
+
+
+async def wait_ready(session: aiohttp.ClientSession, base: str):
+    for _ in range(100):
+        try:
+            async with session.get(f"{base}/cpu") as resp:
+                return await resp.json()
+        except aiohttp.ClientError:
+            await asyncio.sleep(0.1)
+    raise RuntimeError("Server did not start")
+
+
+async def drive(base: str, size: int, clients: int, requests: int, range_bytes: int):
+    latencies: list[float] = []
+    received = 0
+
+    async def client(session: aiohttp.ClientSession, seed: int):
+        nonlocal received
+        rng = random.Random(seed)
+        for _ in range(requests):
+            start = rng.randrange(0, max(1, size - range_bytes))
+            headers = {"Range": f"bytes={start}-{start + range_bytes - 1}"}
+            began = time.perf_counter()
+            async with session.get(f"{base}/file", headers=headers) as resp:
+                body = await resp.read()
+            latencies.append(time.perf_counter() - began)
+            received += len(body)
+
+    connector = aiohttp.TCPConnector(limit=clients)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        before = await wait_ready(session, base)
+        began = time.perf_counter()
+        await asyncio.gather(*(client(session, n) for n in range(clients)))
+        elapsed = time.perf_counter() - began
+        after = await wait_ready(session, base)
+
+    latencies.sort()
+    return {
+        "seconds": round(elapsed, 3),
+        "mbPerSec": round(received / elapsed / 1_000_000, 1),
+        "p50Ms": round(statistics.median(latencies) * 1000, 2),
+        "p95Ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 2),
+        "serverCpuSeconds": round(after["cpuSeconds"] - before["cpuSeconds"], 3),
+        "streamsByMode": after["streams"]["streamsByMode"],
+    }
+
+
+def run_mode(mode: str, file_path: Path, args, port: int) -> dict:
+    ctx = multiprocessing.get_context("spawn")
+    server = ctx.Process(
+        target=serve,
+        args=(mode, str(file_path), port, args.max_streams, MODES[mode]),
+        daemon=True,
+    )
+    server.start()
+    try:
+        result = asyncio.run(
+            drive(
+                f"http://127.0.0.1:{port}",
+                file_path.stat().st_size,
+                args.clients,
+                args.requests,
+                args.range_mb * 1024 * 1024,
+            )
+        )
+    finally:
+        server.terminate()
+        server.join()
+    return {"mode": mode, **result}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=int, default=512)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=20, help="per client")
+    parser.add_argument("--range-mb", type=int, default=4)
+    parser.add_argument("--max-streams", type=int, default=8)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp:
+        file_path = Path(temp) / "bench.mp4"
+        with file_path.open("wb") as f:
+            for _ in range(args.size_mb):
+                f.write(os.urandom(1024 * 1024))
+
+        results = [
+            run_mode(mode, file_path, args, args.port + n)
+            for n, mode in enumerate(MODES)
+        ]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,463 @@
+"""End-to-end benchmark of the download pipeline, fully offline.
+
+Usage (from backend/, with ffmpeg and ffprobe on PATH):
+    python benchmarks/bench_pipeline.py --downloads 8 --kinds direct,hls
+
+A test clip is generated with ffmpeg and served by a local aiohttp server as
+a plain file (direct) and as HLS fragments (hls, fMP4 segments unless
+``--hls-segment-type mpegts``). Each download gets its own
+HTML page with a <video> tag, which is what yt-dlp's generic extractor picks
+up, poster included. For each kind the backend runs as in production
+(main.run) in a child process with throwaway data and download directories.
+All ``--downloads`` videos are posted to /api/video at once and followed
+over Socket.IO until their sprites are built.
+
+Reported per kind:
+- aggregate download MB/s, from the first POST to the last completed file
+- time to first progress and to sprite ready (median and p95, from the POST)
+- server CPU seconds and peak RSS, plus the peak RSS of the server with its
+  media workers and ffmpeg children on Linux
+- event loop lag from /api/metrics and the worst stall from /api/debug/stalls
+
+Every run is saved as JSON under benchmarks/results/ and compared with the
+previous run, or with ``--compare FILE``.
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import aiohttp
+import socketio
+from aiohttp import web
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+KINDS = {
+    "direct": '<video poster="/media/clip.jpg" src="/media/clip.mp4"></video>',
+    "hls": (
+        '<video poster="/media/clip.jpg">'
+        '<source src="/media/hls/clip.m3u8" type="application/x-mpegURL">'
+        "</video>"
+    ),
+}
+
+
+def generate_media(media_dir: Path, args):
+    """A CBR test clip with keyframes every two seconds, its HLS rendition
+    and a poster."""
+    ffmpeg = shutil.which("ffmpeg")
+    if not ffmpeg or not shutil.which("ffprobe"):
+        sys.exit("ffmpeg and ffprobe must be on PATH")
+
+    def run(*cmd):
+        subprocess.run([ffmpeg, "-y", "-loglevel", "error", *cmd], check=True)
+
+    clip = media_dir / "clip.mp4"
+    rate = f"{args.bitrate_mbit}M"
+    run(
+        *("-f", "lavfi", "-i"),
+        f"testsrc2=size={args.resolution}:rate=30:duration={args.duration}",
+        *("-f", "lavfi", "-i", f"sine=frequency=440:duration={args.duration}"),
+        *("-c:v", "libx264", "-preset", "ultrafast", "-g", "60"),
+        *("-b:v", rate, "-minrate", rate, "-maxrate", rate, "-bufsize", rate),
+        *("-x264-params", "nal-hrd=cbr", "-c:a", "aac", "-shortest"),
+        str(clip),
+    )
+    (media_dir / "hls").mkdir()
+    extension = "m4s" if args.hls_segment_type == "fmp4" else "ts"
+    run(
+        *("-i", str(clip), "-c", "copy", "-f", "hls", "-hls_time", "2"),
+        *("-hls_playlist_type", "vod", "-hls_segment_type", args.hls_segment_type),
+        *("-hls_segment_filename", str(media_dir / "hls" / f"seg_%04d.{extension}")),
+        str(media_dir / "hls" / "clip.m3u8"),
+    )
+    run("-i", str(clip), "-frames:v", "1", str(media_dir / "clip.jpg"))
+
+
+def serve_media(media_dir: str, port: int):
+    async def page(request: web.Request):
+        kind, number = request.match_info["kind"], request.match_info["number"]
+        return web.Response(
+            text=f"<html><head><title>Bench {kind} {number}</title></head>"
+            f"<body>{KINDS[kind]}</body></html>",
+            content_type="text/html",
+        )
+
+    app = web.Application()
+    app.router.add_get(r"/page/{kind}_{number:\d+}.html", page)
+    app.router.add_static("/media", media_dir)
+    web.run_app(app, host="127.0.0.1", port=port, print=None)
+
+
+def serve_backend(workdir: str, env: dict):
+    os.chdir(workdir)
+    os.environ.update(env)
+    import main
+
+    try:
+        asyncio.run(main.run())
+    except KeyboardInterrupt:
+        pass
+
+
+def start_process(target, *args) -> multiprocessing.Process:
+    process = multiprocessing.get_context("spawn").Process(
+        target=target, args=args, daemon=False
+    )
+    process.start()
+    return process
+
+
+def stop_process(process: multiprocessing.Process):
+    """SIGINT first so the backend shuts its media workers down."""
+    if process.is_alive() and hasattr(signal, "SIGINT"):
+        os.kill(process.pid, signal.SIGINT)  # type: ignore
+        process.join(10)
+    if process.is_alive():
+        process.terminate()
+        process.join()
+
+
+def tree_rss(root: int) -> int | None:
+    """Resident bytes of ``root`` and all its descendants, Linux only."""
+    proc = Path("/proc")
+    if not proc.is_dir():
+        return None
+    children: dict[int, list[int]] = {}
+    rss: dict[int, int] = {}
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    for entry in proc.iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            stat = (entry / "stat").read_text()
+            statm = (entry / "statm").read_text()
+        except OSError:
+            continue
+        # The command name may hold spaces, the fields after it don't
+        ppid = int(stat.rsplit(")", 1)[1].split()[1])
+        children.setdefault(ppid, []).append(int(entry.name))
+        rss[int(entry.name)] = int(statm.split()[1]) * page_size
+
+    total, pending = 0, [root]
+    while pending:
+        pid = pending.pop()
+        total += rss.get(pid, 0)
+        pending.extend(children.get(pid, []))
+    return total
+
+
+def parse_metrics(text: str) -> dict[str, float]:
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            series, _, value = line.rpartition(" ")
+            samples[series] = float(value)
+    return samples
+
+
+def histogram_quantile(before: dict, after: dict, name: str, q: float) -> float:
+    """Upper bound of the bucket holding the ``q`` quantile of what was
+    observed between the two scrapes."""
+    prefix = f'{name}_bucket{{le="'
+    buckets = sorted(
+        (float(series[len(prefix) : -2]), after[series] - before.get(series, 0))
+        for series in after
+        if series.startswith(prefix)
+    )
+    if not buckets or buckets[-1][1] == 0:
+        return 0.0
+    for bound, count in buckets:
+        if count >= q * buckets[-1][1]:
+            return bound
+    return buckets[-1][0]
+
+
+def percentile(values: list[float], q: float) -> float | None:
+    if not values:
+        return None
+    values = sorted(values)
+    return values[max(0, round(q * len(values)) - 1)]
+
+
+def rounded(value: float | None, scale: float = 1, digits: int = 3):
+    return None if value is None else round(value * scale, digits)
+
+
+class PipelineRun:
+    """Posts the downloads and timestamps the events they produce."""
+
+    def __init__(self, base: str, page_urls: dict[str, str]):
+        self.base = base
+        self.page_urls = page_urls
+        self.posted: dict[str, float] = {}
+        self.first_progress: dict[str, float] = {}
+        self.completed: dict[str, float] = {}
+        self.sprite_ready: dict[str, float] = {}
+        self.failed: set[str] = set()
+        self.bytes: dict[str, int] = {}
+        self.done = asyncio.Event()
+        self.sio = socketio.AsyncClient()
+        self.sio.on("status_update_batch", self.on_batch)
+        self.sio.on("message", self.on_message)
+        self.sio.on("postprocess_update", self.on_postprocess)
+        self.sio.on("remove_video", self.on_remove)
+
+    def check_done(self):
+        if len(self.sprite_ready) + len(self.failed) >= len(self.page_urls):
+            self.done.set()
+
+    async def on_batch(self, batch: dict):
+        now = time.perf_counter()
+        for progress in batch["progress"]:
+            self.first_progress.setdefault(progress["id"], now)
+
+    async def on_message(self, video: dict):
+        if (
+            isinstance(video, dict)
+            and video.get("id") in self.page_urls
+            and video.get("downloadStatus") == "completed"
+            and video.get("videoPathId")
+        ):
+            self.completed.setdefault(video["id"], time.perf_counter())
+            self.bytes[video["id"]] = video.get("downloadedBytes") or 0
+
+    async def on_postprocess(self, progress: dict):
+        if progress["status"] == "completed":
+            self.sprite_ready.setdefault(progress["id"], time.perf_counter())
+        elif progress["status"] == "failed":
+            self.failed.add(progress["id"])
+        self.check_done()
+
+    async def on_remove(self, video_id: str):
+        self.failed.add(video_id)
+        self.check_done()
+
+    async def post(self, session: aiohttp.ClientSession, video_id: str):
+        payload = {"id": video_id, "videoId": "", "url": self.page_urls[video_id]}
+        self.posted[video_id] = time.perf_counter()
+        async with session.post(f"{self.base}/api/video", json=payload) as resp:
+            if resp.status != 200:
+                print(f"{video_id}: {resp.status} {await resp.text()}")
+                self.failed.add(video_id)
+
+    async def run(self, session: aiohttp.ClientSession, timeout: float):
+        await self.sio.connect(self.base, transports=["websocket"])
+        try:
+            await asyncio.gather(*(self.post(session, vid) for vid in self.page_urls))
+            self.check_done()
+            await asyncio.wait_for(self.done.wait(), timeout)
+        except TimeoutError:
+            print(f"Timed out after {timeout}s")
+        finally:
+            await self.sio.disconnect()
+
+    def since_post(self, events: dict[str, float]) -> list[float]:
+        return [at - self.posted[vid] for vid, at in events.items()]
+
+
+async def wait_ready(session: aiohttp.ClientSession, base: str):
+    for _ in range(300):
+        try:
+            async with session.get(f"{base}/api/metrics") as resp:
+                if resp.status == 200:
+                    return
+        except aiohttp.ClientError:
+            pass
+        await asyncio.sleep(0.1)
+    raise RuntimeError(f"Server at {base} did not start")
+
+
+async def scrape(session: aiohttp.ClientSession, base: str) -> dict[str, float]:
+    async with session.get(f"{base}/api/metrics") as resp:
+        return parse_metrics(await resp.text())
+
+
+async def sample_rss(pid: int, peak: list[int]):
+    while True:
+        rss = await asyncio.to_thread(tree_rss, pid)
+        if rss is None:
+            return
+        peak[0] = max(peak[0], rss)
+        await asyncio.sleep(0.2)
+
+
+async def measure(base: str, page_urls: dict[str, str], server_pid: int, args):
+    async with aiohttp.ClientSession() as session:
+        await wait_ready(session, base)
+        before = await scrape(session, base)
+        peak_tree = [0]
+        sampler = asyncio.create_task(sample_rss(server_pid, peak_tree))
+
+        pipeline = PipelineRun(base, page_urls)
+        started = time.perf_counter()
+        await pipeline.run(session, args.timeout)
+        sampler.cancel()
+
+        after = await scrape(session, base)
+        async with session.get(f"{base}/api/debug/stalls") as resp:
+            stalls = await resp.json()
+
+    lag = "ytdlp_event_loop_lag_seconds"
+    lag_count = after.get(f"{lag}_count", 0) - before.get(f"{lag}_count", 0)
+    lag_sum = after.get(f"{lag}_sum", 0) - before.get(f"{lag}_sum", 0)
+    worst = max(stalls["stalls"], key=lambda s: s["seconds"], default=None)
+    first_progress = pipeline.since_post(pipeline.first_progress)
+    sprite_ready = pipeline.since_post(pipeline.sprite_ready)
+    elapsed = max(pipeline.completed.values()) - started if pipeline.completed else None
+    total_bytes = sum(pipeline.bytes.values())
+
+    return {
+        "downloads": len(page_urls),
+        "completed": len(pipeline.completed),
+        "spritesReady": len(pipeline.sprite_ready),
+        "failed": len(pipeline.failed),
+        "bytes": total_bytes,
+        "downloadSeconds": rounded(elapsed),
+        "mbPerSec": rounded(elapsed and total_bytes / elapsed, 1e-6, 1),
+        "firstProgressP50Ms": rounded(percentile(first_progress, 0.5), 1000, 1),
+        "firstProgressP95Ms": rounded(percentile(first_progress, 0.95), 1000, 1),
+        "spriteReadyP50S": rounded(percentile(sprite_ready, 0.5)),
+        "spriteReadyP95S": rounded(percentile(sprite_ready, 0.95)),
+        "serverCpuSeconds": rounded(
+            after["ytdlp_process_cpu_seconds"] - before["ytdlp_process_cpu_seconds"]
+        ),
+        "serverPeakRssMb": rounded(
+            after.get("ytdlp_process_peak_rss_bytes"), 1 / 2**20, 1
+        ),
+        "treePeakRssMb": rounded(peak_tree[0] or None, 1 / 2**20, 1),
+        "loopLagMeanMs": rounded(lag_count and lag_sum / lag_count, 1000, 2),
+        "loopLagP99Ms": rounded(histogram_quantile(before, after, lag, 0.99), 1000, 2),
+        "stalls": stalls["total"],
+        "worstStallMs": rounded(worst and worst["seconds"], 1000, 1),
+        "worstStallBlame": worst["blame"] if worst else "",
+    }
+
+
+def run_kind(kind: str, temp: Path, args) -> dict:
+    workdir = temp / kind
+    workdir.mkdir()
+    env = {
+        "HOST": "127.0.0.1",
+        "PORT": str(args.port),
+        "DOWNLOAD_DIR": str(workdir / "downloads"),
+        "DOWNLOAD_MAX_CONCURRENT": str(args.concurrency),
+        "DOWNLOAD_PER_HOST_LIMIT": str(args.concurrency),
+        "LOG_LEVEL": os.getenv("LOG_LEVEL", "WARNING"),
+    }
+    page_urls = {
+        f"bench_{kind}_{n:03}": f"http://127.0.0.1:{args.media_port}/page/{kind}_{n:03}.html"
+        for n in range(args.downloads)
+    }
+    server = start_process(serve_backend, str(workdir), env)
+    try:
+        result = asyncio.run(
+            measure(f"http://127.0.0.1:{args.port}", page_urls, server.pid, args)  # type: ignore
+        )
+    finally:
+        stop_process(server)
+    return {"kind": kind, **result}
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def compare(previous: dict, current: dict):
+    print(f"\nCompared with {previous['savedAs']} ({previous.get('commit') or '?'})")
+    old_runs = {run["kind"]: run for run in previous["runs"]}
+    for run in current["runs"]:
+        old = old_runs.get(run["kind"])
+        if old is None:
+            continue
+        for key, value in run.items():
+            before = old.get(key)
+            if not isinstance(value, (int, float)) or not isinstance(
+                before, (int, float)
+            ):
+                continue
+            change = f"{(value - before) / before:+.1%}" if before else ""
+            print(f"  {run['kind']:>6} {key:<20} {before:>12} -> {value:<12} {change}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--downloads", type=int, default=8, help="per kind")
+    parser.add_argument("--kinds", default="direct,hls")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--duration", type=int, default=60, help="clip seconds")
+    parser.add_argument("--resolution", default="1280x720")
+    parser.add_argument("--bitrate-mbit", type=float, default=4)
+    parser.add_argument(
+        "--hls-segment-type", choices=("fmp4", "mpegts"), default="fmp4"
+    )
+    parser.add_argument("--timeout", type=float, default=600)
+    parser.add_argument("--port", type=int, default=8780)
+    parser.add_argument("--media-port", type=int, default=8781)
+    parser.add_argument("--label", default="", help="stored with the results")
+    parser.add_argument("--compare", type=Path, help="results file to compare to")
+    parser.add_argument("--no-save", action="store_true")
+    args = parser.parse_args()
+
+    kinds = [kind.strip() for kind in args.kinds.split(",") if kind.strip()]
+    unknown = set(kinds) - set(KINDS)
+    if unknown:
+        parser.error(f"unknown kinds: {', '.join(sorted(unknown))}")
+
+    with tempfile.TemporaryDirectory() as temp:
+        media_dir = Path(temp) / "media"
+        media_dir.mkdir()
+        generate_media(media_dir, args)
+        media = start_process(serve_media, str(media_dir), args.media_port)
+        try:
+            runs = [run_kind(kind, Path(temp), args) for kind in kinds]
+        finally:
+            stop_process(media)
+
+    result = {
+        "benchmark": "pipeline",
+        "label": args.label,
+        "commit": git_commit(),
+        "startedAt": datetime.now().isoformat(timespec="seconds"),
+        "args": {
+            k: str(v) if isinstance(v, Path) else v for k, v in vars(args).items()
+        },
+        "runs": runs,
+    }
+    print(json.dumps(runs, indent=2))
+
+    previous_path = args.compare
+    if previous_path is None and RESULTS_DIR.is_dir():
+        previous_path = max(RESULTS_DIR.glob("pipeline-*.json"), default=None)
+    if not args.no_save:
+        RESULTS_DIR.mkdir(exist_ok=True)
+        path = RESULTS_DIR / f"pipeline-{datetime.now():%Y%m%d-%H%M%S}.json"
+        path.write_text(json.dumps(result, indent=2))
+        print(f"Saved {path}")
+    if previous_path is not None:
+        previous = json.loads(previous_path.read_text())
+        compare({**previous, "savedAs": previous_path.name}, result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,327 @@
+"""Load test of the Socket.IO progress fan-out.
+
+Usage (from backend/):
+    python benchmarks/bench_sio_fanout.py --clients 300 --downloads 20
+
+The backend app runs in a child process with a throwaway database. It gets
+``--downloads`` fake downloads, each a real Ytdlp instance fed by its own
+thread that calls ``_progress_wrapper`` ``--tick-hz`` times a second, as
+yt-dlp does. The progress then takes the production path through
+ProgressAggregator and SioEmitter.
+
+``--clients`` Socket.IO clients connect from ``--client-procs`` processes.
+``--subscribers`` of them subscribe to one download each, so they get
+per-video status_update events and the rest get the status_update_batch
+broadcast. For ``--seconds`` the benchmark reports:
+- latency percentiles from the hook call to the client (hook) and from the
+  batch flush to the client (flush)
+- batches the broadcast clients missed
+- server CPU seconds and the mean time spent in one batch emit
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import aiohttp
+import socketio
+from aiohttp import web
+
+TOTAL_BYTES = 1_000_000_000
+
+
+def serve(workdir: str, port: int):
+    os.chdir(workdir)
+    os.environ["DOWNLOAD_DIR"] = str(Path(workdir) / "downloads")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    import main
+    import src.req
+    from src.db import init_db
+    from src.ProgressAggregator import progress_aggregator
+    from src.schemas import Video
+    from src.Ytdlp import Ytdlp
+
+    feeding = threading.Event()
+
+    def feed(ytdlp: Ytdlp, tick_hz: float, speed: float):
+        started = time.monotonic()
+        while feeding.is_set():
+            elapsed = time.monotonic() - started
+            downloaded = int(elapsed * speed) % TOTAL_BYTES
+            ytdlp._progress_wrapper(
+                {
+                    "status": "downloading",
+                    "downloaded_bytes": downloaded,
+                    "total_bytes": TOTAL_BYTES,
+                    "speed": speed,
+                    "eta": (TOTAL_BYTES - downloaded) / speed,
+                    "filename": f"{ytdlp.video.id}.mp4",
+                    "info_dict": {"id": ytdlp.video.videoId, "title": ytdlp.video.id},
+                }
+            )
+            time.sleep(1 / tick_hz)
+
+    async def start(request: web.Request):
+        body = await request.json()
+        feeding.set()
+        for n in range(body["downloads"]):
+            video = Video(id=f"fake_{n:04}", videoId=f"fake_{n:04}", url="")
+            threading.Thread(
+                target=feed,
+                args=(Ytdlp(video), body["tickHz"], 1_000_000 * (n + 1)),
+                daemon=True,
+            ).start()
+        return web.json_response({})
+
+    async def stop(request: web.Request):
+        feeding.clear()
+        return web.json_response({})
+
+    async def stats(request: web.Request):
+        return web.json_response(
+            {
+                "cpuSeconds": time.process_time(),
+                "flushed": progress_aggregator.flushed,
+                "pushed": progress_aggregator.pushed,
+                "coalesced": progress_aggregator.dropped,
+            }
+        )
+
+    async def run():
+        init_db()
+        # Connects replay the FFmpeg setup state; keep the first one from
+        # starting a download
+        src.req.ffmpeg_setup_task = asyncio.get_running_loop().create_future()
+        src.req.ffmpeg_setup_task.set_result(None)
+        main.app.router.add_post("/bench/start", start)
+        main.app.router.add_post("/bench/stop", stop)
+        main.app.router.add_get("/bench/stats", stats)
+        runner = web.AppRunner(main.app)
+        await runner.setup()
+        await web.TCPSite(runner, host="127.0.0.1", port=port).start()
+        progress_aggregator.start()
+        await asyncio.Event().wait()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+class ClientStats:
+    def __init__(self):
+        self.batches = 0
+        self.updates = 0
+        self.hook: list[float] = []
+        self.flush: list[float] = []
+
+    async def on_batch(self, batch: dict):
+        now = time.time()
+        self.batches += 1
+        self.flush.append(now - batch["ts"])
+        self.hook.extend(now - vp["ts"] for vp in batch["progress"])
+
+    async def on_update(self, vp: dict):
+        self.updates += 1
+        self.hook.append(time.time() - vp["ts"])
+
+
+async def run_clients(base: str, indexes: list[int], args, ready, stop) -> dict:
+    connecting = asyncio.Semaphore(args.connect_concurrency)
+
+    async def connect(index: int):
+        client = socketio.AsyncClient(reconnection=False)
+        stats = ClientStats()
+        client.on("status_update_batch", stats.on_batch)
+        client.on("status_update", stats.on_update)
+        async with connecting:
+            await client.connect(base, transports=["websocket"])
+            if index < args.subscribers:
+                await client.emit(
+                    "subscribe_progress", f"fake_{index % args.downloads:04}"
+                )
+        return client, stats
+
+    clients = await asyncio.gather(*(connect(index) for index in indexes))
+    ready.put(len(clients))
+    await asyncio.to_thread(stop.wait)
+    for client, _ in clients:
+        await client.disconnect()
+
+    return {
+        "batches": [
+            stats.batches
+            for index, (_, stats) in zip(indexes, clients)
+            if index >= args.subscribers
+        ],
+        "updates": sum(stats.updates for _, stats in clients),
+        "hook": [value for _, stats in clients for value in stats.hook],
+        "flush": [value for _, stats in clients for value in stats.flush],
+    }
+
+
+def client_worker(base: str, indexes: list[int], args, ready, stop, results):
+    results.put(asyncio.run(run_clients(base, indexes, args, ready, stop)))
+
+
+def percentiles(values: list[float]) -> dict:
+    if not values:
+        return {}
+    values = sorted(values)
+
+    def pick(q: float) -> float:
+        return round(values[max(0, round(q * len(values)) - 1)] * 1000, 2)
+
+    return {
+        "p50Ms": pick(0.5),
+        "p90Ms": pick(0.9),
+        "p99Ms": pick(0.99),
+        "maxMs": round(values[-1] * 1000, 2),
+    }
+
+
+async def wait_ready(session: aiohttp.ClientSession, base: str) -> dict:
+    for _ in range(300):
+        try:
+            async with session.get(f"{base}/bench/stats") as resp:
+                return await resp.json()
+        except aiohttp.ClientError:
+            await asyncio.sleep(0.1)
+    raise RuntimeError("Server did not start")
+
+
+def emit_seconds(metrics: str) -> tuple[float, float]:
+    """Sum and count of the status_update_batch emit histogram."""
+    series = {}
+    for line in metrics.splitlines():
+        if line and not line.startswith("#"):
+            name, _, value = line.rpartition(" ")
+            series[name] = float(value)
+    labels = '{event="status_update_batch"}'
+    return (
+        series.get(f"ytdlp_sio_emit_seconds_sum{labels}", 0.0),
+        series.get(f"ytdlp_sio_emit_seconds_count{labels}", 0.0),
+    )
+
+
+async def measure(base: str, args, ctx) -> dict:
+    async with aiohttp.ClientSession() as session:
+        await wait_ready(session, base)
+
+        ready, results, stop = ctx.Queue(), ctx.Queue(), ctx.Event()
+        workers = [
+            ctx.Process(
+                target=client_worker,
+                args=(
+                    base,
+                    list(range(n, args.clients, args.client_procs)),
+                    args,
+                    ready,
+                    stop,
+                    results,
+                ),
+            )
+            for n in range(args.client_procs)
+        ]
+        began = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        connected = sum(
+            await asyncio.gather(*(asyncio.to_thread(ready.get) for _ in workers))
+        )
+        connect_seconds = time.perf_counter() - began
+
+        before = await wait_ready(session, base)
+        async with session.get(f"{base}/api/metrics") as resp:
+            emit_before = emit_seconds(await resp.text())
+        await session.post(
+            f"{base}/bench/start",
+            json={"downloads": args.downloads, "tickHz": args.tick_hz},
+        )
+        await asyncio.sleep(args.seconds)
+        await session.post(f"{base}/bench/stop")
+        # Let the last flush reach everyone
+        await asyncio.sleep(1)
+        after = await wait_ready(session, base)
+        async with session.get(f"{base}/api/metrics") as resp:
+            emit_after = emit_seconds(await resp.text())
+
+        stop.set()
+        collected = [await asyncio.to_thread(results.get) for _ in workers]
+        for worker in workers:
+            worker.join()
+
+    batches = [count for result in collected for count in result["batches"]]
+    flushed = after["flushed"] - before["flushed"]
+    emit_count = emit_after[1] - emit_before[1]
+    return {
+        "clients": connected,
+        "connectSeconds": round(connect_seconds, 2),
+        "downloads": args.downloads,
+        "ticksPushed": after["pushed"] - before["pushed"],
+        "ticksCoalesced": after["coalesced"] - before["coalesced"],
+        "batchesFlushed": flushed,
+        "batchesMissed": sum(max(0, flushed - count) for count in batches),
+        "updatesReceived": sum(result["updates"] for result in collected),
+        "hookLatency": percentiles([v for result in collected for v in result["hook"]]),
+        "flushLatency": percentiles(
+            [v for result in collected for v in result["flush"]]
+        ),
+        "serverCpuSeconds": round(after["cpuSeconds"] - before["cpuSeconds"], 3),
+        "serverCpuPercent": round(
+            (after["cpuSeconds"] - before["cpuSeconds"]) / (args.seconds + 1) * 100, 1
+        ),
+        "batchEmitMeanMs": (
+            round((emit_after[0] - emit_before[0]) / emit_count * 1000, 3)
+            if emit_count
+            else None
+        ),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=300)
+    parser.add_argument(
+        "--client-procs", type=int, default=max(1, (os.cpu_count() or 2) // 2)
+    )
+    parser.add_argument(
+        "--subscribers", type=int, default=0, help="clients subscribed to one download"
+    )
+    parser.add_argument("--downloads", type=int, default=20)
+    parser.add_argument(
+        "--tick-hz", type=float, default=20, help="hook calls per download"
+    )
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--connect-concurrency", type=int, default=50)
+    parser.add_argument("--port", type=int, default=8782)
+    args = parser.parse_args()
+
+    ctx = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as temp:
+        server = ctx.Process(target=serve, args=(temp, args.port))
+        server.start()
+        try:
+            result = asyncio.run(measure(f"http://127.0.0.1:{args.port}", args, ctx))
+        finally:
+            if server.is_alive():
+                os.kill(server.pid, signal.SIGINT)  # type: ignore
+                server.join(10)
+            if server.is_alive():
+                server.terminate()
+                server.join()
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Compares decode and keyframe sprite generation on the same video.
+
+Usage (from backend/):
+    python benchmarks/bench_thumbnails.py path/to/video.mp4
+    python benchmarks/bench_thumbnails.py --generate 7200
+
+``--generate`` synthesizes a test video of the given length in seconds with
+ffmpeg's testsrc so runs are reproducible. Disk I/O is read from the child
+process rusage counters (blocks in/out), which covers the ffmpeg subprocess,
+so the script needs a POSIX platform.
+"""
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.schemas import ThumbnailMode, ThumbnailVTTConfig
+from src.thumbnails import build_sprite, ffmpeg_cmd
+
+
+def generate_video(path: Path, seconds: int):
+    subprocess.run(
+        [
+            ffmpeg_cmd(),
+            "-y",
+            "-loglevel",
+            "error",
+            "-f",
+            "lavfi",
+            "-i",
+            f"testsrc2=size=1920x1080:rate=30:duration={seconds}",
+            "-c:v",
+            "libx264",
+            "-preset",
+            "ultrafast",
+            "-g",
+            "120",
+            str(path),
+        ],
+        check=True,
+    )
+
+
+def run_mode(video: Path, work_dir: Path, mode: ThumbnailMode, interval: int) -> dict:
+    config = ThumbnailVTTConfig(
+        interval=interval, temp_dir=work_dir / "thumbs", mode=mode
+    )
+    sprite_prefix = work_dir / f"{mode.value}_sprite"
+
+    before = resource.getrusage(resource.RUSAGE_CHILDREN)
+    started = time.perf_counter()
+    result = build_sprite(video, sprite_prefix, config)
+    wall = time.perf_counter() - started
+    after = resource.getrusage(resource.RUSAGE_CHILDREN)
+
+    return {
+        "mode": mode.value,
+        "wallSeconds": round(wall, 3),
+        "childCpuSeconds": round(
+            (after.ru_utime + after.ru_stime) - (before.ru_utime + before.ru_stime), 3
+        ),
+        "blocksRead": after.ru_inblock - before.ru_inblock,
+        "blocksWritten": after.ru_oublock - before.ru_oublock,
+        "tiles": result.count if result else 0,
+        "tileSize": f"{result.thumb_w}x{result.thumb_h}" if result else "",
+        "sheets": len(result.sheets) if result else 0,
+        "spriteBytes": (
+            sum(sheet.stat().st_size for sheet in result.sheets) if result else 0
+        ),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("video", nargs="?", type=Path)
+    parser.add_argument("--generate", type=int, metavar="SECONDS")
+    parser.add_argument("--interval", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp:
+        work_dir = Path(temp)
+        video = args.video
+        if args.generate:
+            video = work_dir / "generated.mp4"
+            print(f"Generating {args.generate}s test video...", file=sys.stderr)
+            generate_video(video, args.generate)
+        if video is None:
+            parser.error("pass a video path or --generate SECONDS")
+
+        results = [
+            run_mode(video, work_dir, mode, args.interval)
+            for mode in (ThumbnailMode.DECODE, ThumbnailMode.KEYFRAME)
+        ]
+        print(json.dumps({"video": str(video), "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""Measures GET /api/videos query cost on a large library.
+
+Usage (from backend/):
+    python benchmarks/bench_video_list.py --rows 100000 --limit 50
+
+Fills a throwaway database with ``--rows`` videos, then times the old
+unbounded full-row select against keyset pages (first, deep, filtered,
+projected), FTS5 search and the same deep page fetched with OFFSET. Each query runs
+``--repeat`` times and the median is reported, with SQLite's query plan so
+index use can be checked.
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from sqlmodel import Session, SQLModel, select
+from src.db import VideoDB, _migrate_videodb, make_engine
+from src.schemas import VideoListQuery
+from src.search import create_search_index, search_statement
+from src.video_query import page_from_rows, video_list_statement
+
+STATUSES = ["completed"] * 8 + ["failed", "queued"]
+EXTRACTORS = ["Youtube"] * 6 + ["Vimeo", "Twitch", "Generic", "Dailymotion"]
+
+
+def make_row(index: int) -> dict:
+    return dict(
+        id=f"video_{index:07}",
+        url=f"https://example.com/watch?v={index}",
+        format="BEST",
+        type="download",
+        videoId=str(index),
+        fullTitle=f"Benchmark video number {index} with a reasonably long title",
+        durationString="12:34",
+        size="123.45MiB",
+        resolution="1920x1080",
+        downloadStatus=STATUSES[index % len(STATUSES)],
+        audioOnly=index % 7 == 0,
+        watched=index % 3 == 0,
+        downloaded=True,
+        prevWatchTime=0,
+        videoPathId=f"file_v_{index}",
+        thumbnailPathId=f"file_t_{index}",
+        vttPathId=f"file_vtt_{index}",
+        vttSpritePathId=f"file_s_{index}",
+        extractor=EXTRACTORS[index % len(EXTRACTORS)],
+        createdAt=1_700_000_000 + index,
+    )
+
+
+def fill(engine, rows: int):
+    with engine.begin() as conn:
+        for start in range(0, rows, 10_000):
+            batch = [make_row(i) for i in range(start, min(rows, start + 10_000))]
+            conn.execute(VideoDB.__table__.insert(), batch)  # type: ignore
+        _migrate_videodb(conn)
+        create_search_index(conn)
+
+
+def timed(fn, repeat: int) -> tuple[float, int]:
+    samples, size = [], 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        size = fn()
+        samples.append(time.perf_counter() - started)
+    return round(statistics.median(samples) * 1000, 3), size
+
+
+def keyset_cursor_at(session: Session, depth: int, limit: int) -> str | None:
+    cursor = None
+    for _ in range(depth):
+        query = VideoListQuery(limit=limit, cursor=cursor, fields=["id"])
+        rows = session.exec(video_list_statement(query)).all()  # type: ignore
+        cursor = page_from_rows(list(rows), limit)["nextCursor"]
+    return cursor
+
+
+def run(rows: int, limit: int, repeat: int) -> list[dict]:
+    with tempfile.TemporaryDirectory() as temp:
+        engine = make_engine(f"sqlite:///{temp}/bench.sqlite")
+        SQLModel.metadata.create_all(engine)
+        fill(engine, rows)
+
+        deep_page = rows // limit // 2
+        results = []
+        with Session(engine) as session:
+            deep_cursor = keyset_cursor_at(session, deep_page, limit)
+
+            def keyset(**params):
+                return measured(
+                    video_list_statement(VideoListQuery(limit=limit, **params))
+                )
+
+            def measured(stmt):
+                plan = (
+                    session.connection()
+                    .exec_driver_sql(
+                        "EXPLAIN QUERY PLAN "
+                        + str(stmt.compile(compile_kwargs={"literal_binds": True}))
+                    )
+                    .all()
+                )
+
+                def fetch():
+                    page = page_from_rows(list(session.exec(stmt).all()), limit)  # type: ignore
+                    return len(json.dumps(page))
+
+                return fetch, " | ".join(row[-1] for row in plan)
+
+            def select_all():
+                videos = session.exec(select(VideoDB)).all()
+                return len(json.dumps([v.model_dump() for v in videos]))
+
+            def offset_page():
+                stmt = (
+                    select(VideoDB)
+                    .order_by(VideoDB.createdAt.desc(), VideoDB.id.desc())  # type: ignore
+                    .offset(deep_page * limit)
+                    .limit(limit)
+                )
+                return len(json.dumps([v.model_dump() for v in session.exec(stmt)]))
+
+            cases = {
+                "keyset first page": keyset(),
+                "keyset deep page": keyset(cursor=deep_cursor),
+                "keyset deep page, list fields": keyset(
+                    cursor=deep_cursor,
+                    fields=["fullTitle", "thumbnailPathId", "downloadStatus"],
+                ),
+                "keyset status=failed": keyset(downloadStatus="failed"),
+                "keyset extractor=Vimeo, watched": keyset(
+                    extractor="Vimeo", watched=True
+                ),
+                "keyset q=number 4242": keyset(q="number 4242"),
+                "fts search number 4242": measured(
+                    search_statement("number 4242", limit)
+                ),
+                "fts search matching every row": measured(
+                    search_statement("reasonably long", limit)
+                ),
+            }
+            for label, fn in [
+                ("select all (old)", select_all),
+                (f"offset page {deep_page}", offset_page),
+            ]:
+                ms, size = timed(fn, max(1, repeat // 5))
+                results.append({"query": label, "ms": ms, "responseBytes": size})
+            for label, (fn, plan) in cases.items():
+                ms, size = timed(fn, repeat)
+                results.append(
+                    {"query": label, "ms": ms, "responseBytes": size, "plan": plan}
+                )
+
+        engine.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    print(json.dumps(run(args.rows, args.limit, args.repeat), indent=2))
+
+
+if __name__ == "__main__":
+    main()
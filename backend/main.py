@@ -5,18 +5,39 @@ import time
 from contextlib import asynccontextmanager
 from http import HTTPStatus
 from pathlib import Path
+from urllib.parse import quote
 
 import aiohttp_cors
 import src.req
 from aiohttp import web
-from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import ValidationError
 from sqlmodel import select
-from src.db import FileDB, VideoDB, get_session, init_db
+from src.db import FileDB, FileKind, VideoDB, get_async_session, init_db
+from src.BandwidthManager import bandwidth_manager
+from src.dedupe import dedupe_videos
 from src.DownloadStarter import download_starter
+from src.executors import executor_stats, shutdown_executors
+from src.FileLookupCache import file_lookup_cache
+from src.ingest import warm_extractors
 from src.logger import get_logger
-from src.schemas import Notify, Startup, TriStatus
+from src.media import MediaFileResponse, media_streams
+from src.MetadataCache import metadata_cache
+from src.metrics import monitor_loop_lag, registry
+from src.PostProcessor import post_processor
+from src.profiler import MAX_SECONDS, folded, sample_stacks
+from src.ProgressAggregator import progress_aggregator
+from src.schemas import BandwidthConfig, FileLookup, Notify, Startup, TriStatus
+from src.search import init_search_index
 from src.SioEmitter import SioEmitter
-from src.sockets import client_set, sio
+from src.StallWatchdog import stall_watchdog
+from src.sockets import (
+    client_set,
+    forget_client,
+    join_default_rooms,
+    sio,
+    subscribe_video,
+    unsubscribe_video,
+)
 from src.video_route import video_router
 from watchfiles import DefaultFilter, arun_process
 
@@ -30,6 +51,7 @@ sio.attach(app)
 async def connect(sid, environ, auth):
     logger.info("Client Connected: %s", sid)
     client_set.add(sid)
+    await join_default_rooms(sid)
     await SioEmitter.notify(
         Notify(
             severity="success",
@@ -45,61 +67,108 @@ async def connect(sid, environ, auth):
 async def disconnect(sid):
     logger.info("Client disconnected: %s", sid)
     client_set.discard(sid)
+    forget_client(sid)
+
+
+@sio.event
+async def subscribe_progress(sid, video_id):
+    """Limits this client's progress events to the videos it subscribed to."""
+    await subscribe_video(sid, str(video_id))
+
+
+@sio.event
+async def unsubscribe_progress(sid, video_id):
+    await unsubscribe_video(sid, str(video_id))
 
 
 async def index(req):
     return web.json_response({111: 111})
 
 
-VIDEO_EXTENSIONS = {".mp4", ".mkv", ".avi", ".mov", ".webm"}
+# Revalidate on every use; FileResponse answers with 304 while the ETag holds
+FILE_CACHE_CONTROL = "no-cache"
+
+
+def content_disposition(file_path: Path, attachment: bool) -> str:
+    disposition = "attachment" if attachment else "inline"
+    return f"{disposition}; filename*=UTF-8''{quote(file_path.name)}"
+
+
+async def lookup_file(file_id: str) -> FileLookup | None:
+    entry = file_lookup_cache.get(file_id)
+    if entry:
+        return entry
+
+    async with get_async_session() as session:
+        # The owning video comes along in the same query
+        stmt = (
+            select(FileDB, VideoDB.downloaded)
+            .outerjoin(VideoDB, VideoDB.id == FileDB.videoId)  # type: ignore
+            .where(FileDB.id == file_id)
+        )
+        row = (await session.exec(stmt)).one_or_none()
+
+    if not row or not row[0].filePath:
+        return None
+    file_obj, downloaded = row
+    entry = FileLookup(
+        fileId=file_obj.id,
+        filePath=Path(file_obj.filePath),
+        kind=file_obj.kind,
+        videoId=file_obj.videoId,
+        downloaded=downloaded is not False,
+    )
+    file_lookup_cache.put(entry)
+    return entry
+
+
+async def mark_downloaded(video_id: str):
+    # Flag the cache first so concurrent range requests don't repeat this
+    file_lookup_cache.mark_downloaded(video_id)
+    async with get_async_session() as session:
+        video_obj = await session.get(VideoDB, video_id)
+        if not video_obj:
+            return
+        video_obj.downloaded = True
+        session.add(video_obj)
+        await session.commit()
+        # Deep-copy out data model before session terminates
+        video_data = video_obj.model_dump()
+
+    await SioEmitter.message(video_data)
 
 
 async def serve_file(request: web.Request):
+    """Serves a file inline so players can seek with Range requests.
+
+    FileResponse handles Range, ETag/Last-Modified and 304s. ``?download=1``
+    asks the browser to save the file instead.
+    """
     file_id = request.match_info.get("fileId")
     if not file_id:
         return web.json_response(
             {"error": "File ID not provided."}, status=HTTPStatus.BAD_REQUEST
         )
 
-    video_obj = None
-    file_path = None
-
     try:
-        with get_session() as session:
-            stmt = select(FileDB).where(FileDB.id == file_id)
-            result = session.exec(stmt)
-            file_obj = result.one_or_none()
-
-            if not file_obj or not file_obj.filePath:
-                return web.json_response(
-                    {"error": "File record or path not found."},
-                    status=HTTPStatus.NOT_FOUND,
-                )
-
-            file_path = Path(file_obj.filePath)
-            if not file_path.is_file():
-                return web.json_response(
-                    {"error": "File not found on disk."},
-                    status=HTTPStatus.NOT_FOUND,
-                )
-
-            if file_path.suffix.lower() in VIDEO_EXTENSIONS:
-                stmt = select(VideoDB).where(VideoDB.videoPathId == file_id)
-                video_result = session.exec(stmt)
-                video_obj = video_result.one_or_none()
-                if video_obj:
-                    video_obj.downloaded = True
-                    session.add(video_obj)
-                    session.commit()
-                    # Deep-copy out data model before session terminates
-                    video_data = video_obj.model_dump()
-
-        if video_obj:
-            await SioEmitter.message(video_data)
+        entry = await lookup_file(file_id)
+        if not entry:
+            return web.json_response(
+                {"error": "File record or path not found."},
+                status=HTTPStatus.NOT_FOUND,
+            )
+
+        if entry.kind == FileKind.VIDEO and entry.videoId and not entry.downloaded:
+            await mark_downloaded(entry.videoId)
 
         return web.FileResponse(
-            path=file_path,
-            headers={"Content-Disposition": f'attachment; filename="{file_path.name}"'},
+            path=entry.filePath,
+            headers={
+                "Content-Disposition": content_disposition(
+                    entry.filePath, request.query.get("download") == "1"
+                ),
+                "Cache-Control": FILE_CACHE_CONTROL,
+            },
         )
 
     except Exception as e:
@@ -107,6 +176,163 @@ async def serve_file(request: web.Request):
         return web.json_response({"error": str(e)}, status=500)
 
 
+async def serve_media(request: web.Request):
+    """Streams a file for playback through the dedicated media path: kernel
+    sendfile when available, a cap on concurrent streams, and per-stream
+    throughput in /api/streams."""
+    file_id = request.match_info.get("fileId")
+    entry = await lookup_file(file_id) if file_id else None
+    if not entry:
+        return web.json_response(
+            {"error": "File record or path not found."},
+            status=HTTPStatus.NOT_FOUND,
+        )
+
+    if entry.kind == FileKind.VIDEO and entry.videoId and not entry.downloaded:
+        await mark_downloaded(entry.videoId)
+
+    try:
+        stream = await media_streams.acquire(entry.fileId)
+    except TimeoutError:
+        return web.json_response(
+            {"error": "Too many concurrent media streams."},
+            status=HTTPStatus.SERVICE_UNAVAILABLE,
+            headers={"Retry-After": "1"},
+        )
+
+    return MediaFileResponse(
+        entry.filePath,
+        stream,
+        headers={
+            "Content-Disposition": content_disposition(entry.filePath, False),
+            "Cache-Control": FILE_CACHE_CONTROL,
+        },
+    )
+
+
+async def get_stream_stats(request: web.Request):
+    return web.json_response(media_streams.stats())
+
+
+async def get_executor_stats(request: web.Request):
+    return web.json_response(executor_stats())
+
+
+registry.gauge(
+    "ytdlp_downloads_active",
+    "Downloads running now",
+    collect=lambda: download_starter.active_count,
+)
+registry.gauge(
+    "ytdlp_downloads_queued",
+    "Downloads waiting for a free slot",
+    collect=lambda: download_starter.queued_count,
+)
+registry.gauge(
+    "ytdlp_download_speed_bytes",
+    "Current speed of each running download in bytes per second",
+    ("video_id",),
+    collect=lambda: {
+        (vid,): speed for vid, speed in progress_aggregator.speeds().items()
+    },
+)
+registry.gauge(
+    "ytdlp_download_speed_total_bytes",
+    "Combined speed of all running downloads in bytes per second",
+    collect=lambda: progress_aggregator.total_speed,
+)
+registry.gauge(
+    "ytdlp_executor_queue_depth",
+    "Calls waiting for an executor worker",
+    ("executor",),
+    collect=lambda: {
+        (name,): stats["queueDepth"] for name, stats in executor_stats().items()
+    },
+)
+registry.gauge(
+    "ytdlp_media_streams_active",
+    "Media bodies being streamed",
+    collect=lambda: len(media_streams.active),
+)
+
+
+async def get_metrics(request: web.Request):
+    """Prometheus text exposition of the registry in src/metrics.py."""
+    return web.Response(
+        text=registry.render(), content_type="text/plain", charset="utf-8"
+    )
+
+
+async def get_stalls(request: web.Request):
+    """Recent event loop stalls, newest first, with the stack and task that
+    held the loop."""
+    return web.json_response(stall_watchdog.stats())
+
+
+profile_lock = asyncio.Lock()
+
+
+async def get_profile(request: web.Request):
+    """Samples every thread's stack for ``seconds`` (``thread`` limits it to
+    threads whose name starts with it) and returns them folded, ready for
+    flamegraph.pl or speedscope."""
+    try:
+        seconds = float(request.query.get("seconds", "10"))
+    except ValueError:
+        seconds = 0.0
+    if not 0 < seconds <= MAX_SECONDS:
+        return web.json_response(
+            {"error": f"seconds must be between 0 and {MAX_SECONDS}"},
+            status=HTTPStatus.BAD_REQUEST,
+        )
+    if profile_lock.locked():
+        return web.json_response(
+            {"error": "A profile is already running"}, status=HTTPStatus.CONFLICT
+        )
+
+    async with profile_lock:
+        stacks = await asyncio.to_thread(
+            sample_stacks, seconds, thread=request.query.get("thread", "")
+        )
+    return web.Response(text=folded(stacks), content_type="text/plain", charset="utf-8")
+
+
+async def get_bandwidth(request: web.Request):
+    return web.json_response(bandwidth_manager.stats())
+
+
+async def set_bandwidth(request: web.Request):
+    """Changes the global limit and/or the schedule; running downloads pick
+    up their new share from their next block."""
+    try:
+        body = await request.json()
+        config = BandwidthConfig(**{**bandwidth_manager.config.model_dump(), **body})
+    except (ValidationError, ValueError, TypeError) as e:
+        return web.json_response({"error": str(e)}, status=HTTPStatus.BAD_REQUEST)
+
+    bandwidth_manager.set_config(config)
+    return web.json_response(bandwidth_manager.stats())
+
+
+async def get_dedupe_report(request: web.Request):
+    """Groups of identical files under downloads/videos and the bytes that
+    hardlinking them would free."""
+    try:
+        return web.json_response(await dedupe_videos())
+    except Exception as e:
+        logger.exception("GET /api/dedupe/report failed")
+        return web.json_response({"error": str(e)}, status=500)
+
+
+async def link_duplicate_files(request: web.Request):
+    """Replaces every duplicate found by the report with a hardlink."""
+    try:
+        return web.json_response(await dedupe_videos(link=True))
+    except Exception as e:
+        logger.exception("POST /api/dedupe/link failed")
+        return web.json_response({"error": str(e)}, status=500)
+
+
 async def restart_backend(request: web.Request):
     """Triggers an app shutdown sequence.
 
@@ -134,7 +360,17 @@ app.add_routes(
     [
         web.get("/api/", index),
         web.get("/api/files/{fileId:.*}", serve_file),
+        web.get("/api/media/{fileId}", serve_media),
+        web.get("/api/streams", get_stream_stats),
         web.post("/api/restart", restart_backend),
+        web.get("/api/executors", get_executor_stats),
+        web.get("/api/metrics", get_metrics),
+        web.get("/api/debug/stalls", get_stalls),
+        web.get("/api/debug/profile", get_profile),
+        web.get("/api/bandwidth", get_bandwidth),
+        web.put("/api/bandwidth", set_bandwidth),
+        web.get("/api/dedupe/report", get_dedupe_report),
+        web.post("/api/dedupe/link", link_duplicate_files),
     ]
 )
 app.add_routes(video_router)
@@ -169,14 +405,30 @@ async def callback(changes):
 
 async def run():
     init_db()
+    init_search_index()
+    await metadata_cache.prune_expired()
+    lag_monitor = asyncio.create_task(monitor_loop_lag())
+    stall_watchdog.start()
     runner = web.AppRunner(app)
     await runner.setup()
-    site = web.TCPSite(runner, host="localhost", port=8000)
+    site = web.TCPSite(
+        runner,
+        host=os.getenv("HOST", "localhost"),
+        port=int(os.getenv("PORT", "8000")),
+    )
     await site.start()
     asyncio.create_task(src.req.ensure_ffmpeg_setup())
-    download_starter.start()
-    while True:
-        await asyncio.sleep(3600)
+    asyncio.create_task(asyncio.to_thread(warm_extractors))
+    await post_processor.start()
+    progress_aggregator.start()
+    await download_starter.start()
+    try:
+        while True:
+            await asyncio.sleep(3600)
+    finally:
+        lag_monitor.cancel()
+        stall_watchdog.stop()
+        shutdown_executors()
 
 
 class PyOnlyFilter(DefaultFilter):
@@ -0,0 +1,166 @@
+import os
+import threading
+import time
+from datetime import datetime
+
+from src.logger import get_logger
+from src.schemas import BandwidthConfig, BandwidthWindow, parse_rate
+
+logger = get_logger("backend.bandwidth")
+
+
+def load_bandwidth_config() -> BandwidthConfig:
+    """Reads the limits from the environment.
+
+    BANDWIDTH_LIMIT is a rate like ``2M``. BANDWIDTH_SCHEDULE takes comma
+    separated ``HH:MM-HH:MM=rate`` windows, an empty rate meaning unlimited.
+    """
+    schedule = []
+    for entry in os.getenv("BANDWIDTH_SCHEDULE", "").split(","):
+        span, _, limit = entry.partition("=")
+        start, _, end = span.strip().partition("-")
+        if start and end:
+            schedule.append(
+                BandwidthWindow(start=start, end=end, limit=parse_rate(limit.strip()))
+            )
+
+    return BandwidthConfig(
+        globalLimit=parse_rate(os.getenv("BANDWIDTH_LIMIT", "")), schedule=schedule
+    )
+
+
+class TokenBucket:
+    """Bytes a download may send now. It refills at the download's current
+    rate up to ``burst`` seconds worth and goes negative while the download
+    owes time."""
+
+    def __init__(self, burst: float):
+        self.burst = burst
+        self.tokens = 0.0
+        self.updated = time.monotonic()
+
+    def refill(self, rate: float | None, now: float):
+        if rate is None:
+            self.tokens = 0.0
+        else:
+            self.tokens = min(
+                self.tokens + (now - self.updated) * rate, rate * self.burst
+            )
+        self.updated = now
+
+    def delay(self, rate: float | None) -> float:
+        if rate is None or self.tokens >= 0:
+            return 0.0
+        return -self.tokens / rate
+
+
+class BandwidthManager:
+    """Splits a global byte rate across the running downloads.
+
+    Every download gets an equal share of the limit in force (the schedule
+    window matching the local time, else ``globalLimit``). A download whose
+    own override is below its share keeps only the override, and the rest
+    goes to the others. The limits can change at any time and apply from the
+    next block a download receives.
+
+    The download threads call ``reserve`` from yt-dlp's progress hook, which
+    runs after every block for plain and fragmented downloads alike, and
+    sleep for the returned delay.
+    """
+
+    def __init__(self, config: BandwidthConfig, burst: float = 1.0):
+        self.config = config
+        self.burst = burst
+        self.overrides: dict[str, int] = {}
+        self._buckets: dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def register(self, video_id: str):
+        with self._lock:
+            self._buckets.setdefault(video_id, TokenBucket(self.burst))
+
+    def unregister(self, video_id: str):
+        with self._lock:
+            self._buckets.pop(video_id, None)
+
+    def current_limit(self) -> int | None:
+        now = datetime.now()
+        return self.config.limit_at(now.hour * 60 + now.minute)
+
+    def _allocate(self) -> dict[str, float | None]:
+        limit = self.current_limit()
+        if limit is None:
+            return {vid: self.overrides.get(vid) for vid in self._buckets}
+
+        # Smallest caps first, each takes at most an equal share of what's left
+        by_cap = sorted(
+            self._buckets, key=lambda vid: self.overrides.get(vid, float("inf"))
+        )
+        rates: dict[str, float | None] = {}
+        remaining = float(limit)
+        for index, video_id in enumerate(by_cap):
+            share = remaining / (len(by_cap) - index)
+            rates[video_id] = min(self.overrides.get(video_id, share), share)
+            remaining -= rates[video_id]  # type: ignore
+        return rates
+
+    def rates(self) -> dict[str, float | None]:
+        with self._lock:
+            return self._allocate()
+
+    def rate_for(self, video_id: str) -> float | None:
+        return self.rates().get(video_id, self.overrides.get(video_id))
+
+    def reserve(self, video_id: str, nbytes: int) -> float:
+        """Charges ``nbytes`` to the download and returns how long it should
+        sleep to stay within its rate."""
+        with self._lock:
+            bucket = self._buckets.get(video_id)
+            if bucket is None:
+                return 0.0
+            rate = self._allocate().get(video_id)
+            bucket.refill(rate, time.monotonic())
+            if rate is not None:
+                bucket.tokens -= nbytes
+            return bucket.delay(rate)
+
+    def pending(self, video_id: str) -> float:
+        """What's left of the delay, at the rate in force now."""
+        with self._lock:
+            bucket = self._buckets.get(video_id)
+            if bucket is None:
+                return 0.0
+            rate = self._allocate().get(video_id)
+            bucket.refill(rate, time.monotonic())
+            return bucket.delay(rate)
+
+    def set_config(self, config: BandwidthConfig):
+        with self._lock:
+            self.config = config
+        logger.info("Bandwidth limits changed: %s", config.model_dump())
+
+    def set_override(self, video_id: str, limit: int | None):
+        with self._lock:
+            if limit is None:
+                self.overrides.pop(video_id, None)
+            else:
+                self.overrides[video_id] = limit
+
+    def forget(self, video_id: str):
+        with self._lock:
+            self._buckets.pop(video_id, None)
+            self.overrides.pop(video_id, None)
+
+    def stats(self) -> dict:
+        rates = self.rates()
+        return {
+            **self.config.model_dump(),
+            "currentLimit": self.current_limit(),
+            "downloads": {
+                video_id: {"rate": rate, "override": self.overrides.get(video_id)}
+                for video_id, rate in rates.items()
+            },
+        }
+
+
+bandwidth_manager = BandwidthManager(load_bandwidth_config())
@@ -1,29 +1,93 @@
 import asyncio
+import heapq
+import itertools
+import os
+from collections import Counter
+from collections.abc import Iterable
+from urllib.parse import urlparse
 
 from sqlmodel import or_, select
-from src.db import VideoDB, get_session
+from src.db import VideoDB, get_async_session
 from src.logger import get_logger
-from src.schemas import DownloadStatus, Video
+from src.ProgressAggregator import progress_aggregator
+from src.schemas import DownloadSchedulerConfig, DownloadStatus, Video
 from src.Ytdlp import Ytdlp
 
 logger = get_logger("backend.download_starter")
 
 
+def host_key(url: str, domains: Iterable[str] = ()) -> str:
+    """The host a URL counts against for the per-host caps.
+
+    That's the full hostname without a leading www. or m., unless it falls
+    under one of ``domains`` (the configured host limits), which then groups
+    all its subdomains. Cutting to the last two labels instead would put
+    every *.co.uk or *.com.au site under one cap.
+    """
+    host = (urlparse(url).hostname or "").lower()
+    for domain in sorted(domains, key=len, reverse=True):
+        if host == domain or host.endswith("." + domain):
+            return domain
+    for prefix in ("www.", "m."):
+        if host.startswith(prefix):
+            return host.removeprefix(prefix)
+    return host
+
+
+def load_scheduler_config() -> DownloadSchedulerConfig:
+    """Reads the scheduler caps from the environment.
+
+    DOWNLOAD_HOST_LIMITS takes comma separated ``host=limit`` pairs.
+    """
+    host_limits = {}
+    for pair in os.getenv("DOWNLOAD_HOST_LIMITS", "").split(","):
+        host, _, limit = pair.partition("=")
+        if host.strip() and limit.strip().isdigit():
+            host_limits[host.strip().lower()] = int(limit)
+
+    return DownloadSchedulerConfig(
+        max_concurrent=int(os.getenv("DOWNLOAD_MAX_CONCURRENT", "3")),
+        per_host_limit=int(os.getenv("DOWNLOAD_PER_HOST_LIMIT", "2")),
+        host_limits=host_limits,
+    )
+
+
 class DownloadStarter:
-    def __init__(self):
+    """Queues downloads and runs them under a global and per-host concurrency cap.
+
+    Higher priority entries start first; equal priorities keep FIFO order.
+    """
+
+    def __init__(self, config: DownloadSchedulerConfig | None = None):
+        self.config = config or load_scheduler_config()
         self.video_downloaders: dict[str, Ytdlp] = {}
-        self.download_tasks: list[asyncio.Task] = []
+        self.download_tasks: dict[str, asyncio.Task] = {}
+        self._queue: list[tuple[int, int, str]] = []
+        self._queued: dict[str, Video] = {}
+        self._counter = itertools.count()
+        self._active_per_host: Counter[str] = Counter()
+
+    @property
+    def active_count(self) -> int:
+        return len(self.download_tasks)
+
+    @property
+    def queued_count(self) -> int:
+        return len(self._queued)
+
+    def is_queued(self, video_id: str) -> bool:
+        return video_id in self._queued
 
-    def start(self):
+    async def start(self):
         try:
-            with get_session() as session:
+            async with get_async_session() as session:
                 stmt = select(VideoDB).where(
                     or_(
                         VideoDB.downloadStatus == DownloadStatus.QUEUED,
                         VideoDB.downloadStatus == DownloadStatus.DOWNLOADING,
                     )
                 )
-                result = session.exec(stmt)
+                result = await session.exec(stmt)
                 videos = result.all()
 
                 if not videos:
@@ -31,15 +95,72 @@ class DownloadStarter:
                     return
 
                 for video_db in videos:
-                    video = Video(**video_db.dict())
-                    ytdlp = Ytdlp(video)
-                    self.video_downloaders[video.id] = ytdlp
-                    task = asyncio.create_task(ytdlp.download_video())
-                    self.download_tasks.append(task)
+                    # Interrupted downloads go ahead of ones that never started
+                    priority = (
+                        1
+                        if video_db.downloadStatus == DownloadStatus.DOWNLOADING
+                        else 0
+                    )
+                    self.enqueue(Video(**video_db.dict()), priority=priority)
 
-                logger.info("Started %s download task(s).", len(self.download_tasks))
+                logger.info(
+                    "Queued %s download(s), %s started.",
+                    len(videos),
+                    self.active_count,
+                )
         except Exception as e:
             logger.exception("DownloadStarter.start failed")
 
+    def enqueue(self, video: Video, priority: int = 0):
+        if video.id in self._queued or video.id in self.download_tasks:
+            logger.debug("Video %s is already scheduled", video.id)
+            return
+
+        self._queued[video.id] = video
+        heapq.heappush(self._queue, (-priority, next(self._counter), video.id))
+        self._dispatch()
+
+    def remove(self, video_id: str) -> bool:
+        """Drops a video that has not started yet. Heap entries are skipped lazily."""
+        return self._queued.pop(video_id, None) is not None
+
+    def _dispatch(self):
+        deferred = []
+        while self._queue and self.active_count < self.config.max_concurrent:
+            entry = heapq.heappop(self._queue)
+            video = self._queued.get(entry[2])
+            if video is None:
+                continue
+
+            host = host_key(video.url, self.config.host_limits)
+            if self._active_per_host[host] >= self.config.limit_for(host):
+                deferred.append(entry)
+                continue
+
+            del self._queued[video.id]
+            self._launch(video, host)
+
+        for entry in deferred:
+            heapq.heappush(self._queue, entry)
+
+    def _launch(self, video: Video, host: str):
+        ytdlp = Ytdlp(video)
+        self.video_downloaders[video.id] = ytdlp
+        self._active_per_host[host] += 1
+
+        task = asyncio.create_task(ytdlp.download_video())
+        self.download_tasks[video.id] = task
+        task.add_done_callback(lambda _: self._on_done(video.id, host))
+
+    def _on_done(self, video_id: str, host: str):
+        self.download_tasks.pop(video_id, None)
+        self.video_downloaders.pop(video_id, None)
+        Ytdlp.remove_instance(video_id)
+        progress_aggregator.forget(video_id)
+        self._active_per_host[host] -= 1
+        if self._active_per_host[host] <= 0:
+            del self._active_per_host[host]
+        self._dispatch()
+
 
 download_starter = DownloadStarter()
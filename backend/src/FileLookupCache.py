@@ -0,0 +1,59 @@
+import os
+from collections import OrderedDict
+
+from src.schemas import FileLookup
+
+
+class FileLookupCache:
+    """LRU of fileId to path, kind and owning video for ``serve_file``.
+
+    A player seeking through a video sends a stream of range requests for the
+    same id; with this only the first one touches SQLite. A fileId always
+    maps to the same path, so entries only need dropping when the file is
+    deleted or the owning video's ``downloaded`` flag changes elsewhere.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, FileLookup] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, file_id: str) -> FileLookup | None:
+        entry = self._entries.get(file_id)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(file_id)
+        return entry
+
+    def put(self, entry: FileLookup):
+        self._entries[entry.fileId] = entry
+        self._entries.move_to_end(entry.fileId)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def mark_downloaded(self, video_id: str):
+        for entry in self._entries.values():
+            if entry.videoId == video_id:
+                entry.downloaded = True
+
+    def invalidate_video(self, video_id: str):
+        for file_id in [
+            file_id
+            for file_id, entry in self._entries.items()
+            if entry.videoId == video_id
+        ]:
+            del self._entries[file_id]
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "maxEntries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+file_lookup_cache = FileLookupCache(int(os.getenv("FILE_CACHE_SIZE", "1024")))
@@ -0,0 +1,143 @@
+import asyncio
+import json
+import os
+import time
+
+from sqlmodel import delete, select
+from src.db import MetadataCacheDB, get_async_session
+from src.ingest import single_video_entry
+from src.logger import get_logger
+from yt_dlp import YoutubeDL
+
+logger = get_logger("backend.metadata_cache")
+
+PROBE_OPTS = {
+    "noplaylist": True,
+    "skip_download": True,
+    "cachedir": False,
+    "quiet": True,
+    "no_warnings": True,
+}
+
+
+def cache_key(extractor: str, video_id: str) -> str:
+    return f"{extractor}:{video_id}"
+
+
+def summarize(info: dict) -> dict:
+    """The fields the UI shows before a download starts."""
+    return {
+        "url": info.get("webpage_url") or info.get("original_url") or "",
+        "videoId": info.get("id") or "",
+        "extractor": info.get("extractor_key") or "",
+        "fullTitle": info.get("fulltitle") or info.get("title") or "",
+        "uploader": info.get("uploader") or info.get("channel") or "",
+        "duration": info.get("duration"),
+        "durationString": info.get("duration_string") or "",
+        "resolution": info.get("resolution") or "",
+        "formatId": info.get("format_id") or "",
+        "filesizeApprox": info.get("filesize") or info.get("filesize_approx"),
+        "thumbnail": info.get("thumbnail") or "",
+    }
+
+
+class MetadataCache:
+    """Persistent cache of extracted info dicts keyed by (extractor, video id).
+
+    A hit lets a download go straight to format selection and the actual
+    transfer, skipping the webpage and player requests of extraction. The
+    dicts hold signed format URLs that the sites expire after a few hours,
+    so entries only live for ``ttl`` seconds and a download that fails on
+    cached info invalidates it and extracts again.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    async def _where(self, url: str):
+        # Known single-video URLs map to their key without a network call, so
+        # any URL form of the same video hits; anything else matches verbatim.
+        # Matching scans the extractor patterns, so it runs in a thread.
+        entry = await asyncio.to_thread(single_video_entry, url)
+        if entry:
+            return MetadataCacheDB.key == cache_key(entry.extractor, entry.videoId)
+        return MetadataCacheDB.url == url
+
+    async def get_entry(self, url: str) -> MetadataCacheDB | None:
+        stmt = select(MetadataCacheDB).where(
+            await self._where(url), MetadataCacheDB.expiresAt > time.time()
+        )
+        async with get_async_session() as session:
+            row = (await session.exec(stmt)).first()
+        if row is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return row
+
+    async def get(self, url: str) -> dict | None:
+        row = await self.get_entry(url)
+        return json.loads(row.info) if row else None
+
+    async def store(self, url: str, info: dict) -> MetadataCacheDB | None:
+        """Caches a sanitized info dict. Playlists and results without an id
+        aren't cached."""
+        if info.get("_type", "video") != "video" or not info.get("id"):
+            return None
+        extractor = info.get("extractor_key") or ""
+        now = time.time()
+        row = MetadataCacheDB(
+            key=cache_key(extractor, str(info["id"])),
+            extractor=extractor,
+            videoId=str(info["id"]),
+            url=url,
+            info=json.dumps(info),
+            fetchedAt=now,
+            expiresAt=now + self.ttl,
+        )
+        async with get_async_session() as session:
+            row = await session.merge(row)
+            await session.commit()
+        return row
+
+    async def invalidate(self, url: str):
+        where = await self._where(url)
+        async with get_async_session() as session:
+            await session.exec(delete(MetadataCacheDB).where(where))  # type: ignore
+            await session.commit()
+
+    async def prune_expired(self) -> int:
+        async with get_async_session() as session:
+            result = await session.exec(  # type: ignore
+                delete(MetadataCacheDB).where(
+                    MetadataCacheDB.expiresAt <= time.time()  # type: ignore
+                )
+            )
+            await session.commit()
+        if result.rowcount:
+            logger.info("Pruned %s expired metadata entries", result.rowcount)
+        return result.rowcount
+
+    def stats(self) -> dict:
+        return {"ttl": self.ttl, "hits": self.hits, "misses": self.misses}
+
+
+def extract_info(ydl: YoutubeDL, url: str) -> dict:
+    """Blocking, run it in the download executor. Returns the info dict in
+    the JSON-safe form that gets cached."""
+    info = ydl.extract_info(url, download=False)
+    # Resolves the lazy extras (comments etc.), the callable wouldn't survive
+    # the JSON round trip
+    ydl.post_extract(info)
+    return ydl.sanitize_info(info)  # type: ignore
+
+
+def probe_info(url: str) -> dict:
+    """Blocking extraction with the probe options, for /api/probe."""
+    with YoutubeDL(PROBE_OPTS) as ydl:  # type: ignore
+        return extract_info(ydl, url)
+
+
+metadata_cache = MetadataCache(float(os.getenv("METADATA_CACHE_TTL", str(3 * 3600))))
@@ -0,0 +1,107 @@
+import threading
+import time
+from contextlib import contextmanager
+
+from sqlmodel import select
+from src.db import VideoPhaseDB, get_async_session
+from src.logger import get_logger
+
+logger = get_logger("backend.phase_timeline")
+
+
+def phase_dict(phase: VideoPhaseDB) -> dict:
+    return {**phase.model_dump(exclude={"id", "videoId"}), "ongoing": False}
+
+
+class PhaseTimeline:
+    """Start, duration and bytes of each phase one download goes through.
+
+    Phases are opened and closed from the yt-dlp thread and the event loop
+    alike. Closed phases wait in memory until ``save`` writes them, so each
+    is stored once whichever side saves first.
+    """
+
+    def __init__(self, video_id: str):
+        self.video_id = video_id
+        # name -> (wall clock start, perf_counter start, detail)
+        self._open: dict[str, tuple[float, float, str]] = {}
+        self._pending: list[VideoPhaseDB] = []
+        self._lock = threading.Lock()
+
+    def start(self, name: str, detail: str = ""):
+        with self._lock:
+            self._open[name] = (time.time(), time.perf_counter(), detail)
+
+    def is_open(self, name: str) -> bool:
+        return name in self._open
+
+    def finish(self, name: str, bytes: int | None = None, detail: str | None = None):
+        with self._lock:
+            opened = self._open.pop(name, None)
+            if opened is None:
+                return
+            started_at, started, start_detail = opened
+            self._pending.append(
+                VideoPhaseDB(
+                    videoId=self.video_id,
+                    name=name,
+                    detail=start_detail if detail is None else detail,
+                    startedAt=started_at,
+                    seconds=time.perf_counter() - started,
+                    bytes=bytes,
+                )
+            )
+
+    def finish_all(self, detail: str):
+        """Closes whatever is still open, when a download stops midway."""
+        for name in list(self._open):
+            self.finish(name, detail=detail)
+
+    @contextmanager
+    def phase(self, name: str, detail: str = ""):
+        self.start(name, detail)
+        try:
+            yield
+        finally:
+            self.finish(name)
+
+    def live(self) -> list[dict]:
+        """Phases not saved yet, the open ones with their duration so far."""
+        now = time.perf_counter()
+        with self._lock:
+            closed = [phase_dict(phase) for phase in self._pending]
+            running = [
+                {
+                    "name": name,
+                    "detail": detail,
+                    "startedAt": started_at,
+                    "seconds": now - started,
+                    "bytes": None,
+                    "ongoing": True,
+                }
+                for name, (started_at, started, detail) in self._open.items()
+            ]
+        return closed + running
+
+    async def save(self):
+        with self._lock:
+            phases, self._pending = self._pending, []
+        if not phases:
+            return
+        try:
+            async with get_async_session() as session:
+                session.add_all(phases)
+                await session.commit()
+        except Exception as e:
+            logger.exception("Failed to save the timeline of %s", self.video_id)
+
+
+async def load_timeline(video_id: str) -> list[dict]:
+    async with get_async_session() as session:
+        stmt = (
+            select(VideoPhaseDB)
+            .where(VideoPhaseDB.videoId == video_id)
+            .order_by(VideoPhaseDB.startedAt, VideoPhaseDB.id)  # type: ignore
+        )
+        phases = (await session.exec(stmt)).all()
+    return [phase_dict(phase) for phase in phases]
@@ -0,0 +1,199 @@
+import asyncio
+import os
+import time
+from pathlib import Path
+
+from sqlmodel import or_, select, update
+from src.db import (
+    FileKind,
+    PostProcessJobDB,
+    PostProcessStatus,
+    VideoDB,
+    get_async_session,
+    register_video_files,
+)
+from src.executors import media_executor
+from src.logger import get_logger
+from src.metrics import thumbnail_seconds
+from src.paths import SPRITE_DIR, TEMP_THUMB_DIR, VTT_DIR
+from src.PhaseTimeline import PhaseTimeline
+from src.schemas import PostProcessProgress, ThumbnailMode, ThumbnailVTTConfig
+from src.SioEmitter import SioEmitter
+from src.thumbnails import build_sprite, write_vtt
+
+logger = get_logger("backend.post_processor")
+
+MAX_ATTEMPTS = 3
+
+
+class PostProcessor:
+    """Builds sprites and VTTs for finished downloads outside the download task.
+
+    Jobs are persisted in SQLite so a restart picks up whatever was pending or
+    half done; a fixed number of workers drain them through the media executor.
+    """
+
+    def __init__(self, concurrency: int):
+        self.concurrency = max(1, concurrency)
+        self.thumb_vtt_config = ThumbnailVTTConfig(
+            interval=1,
+            temp_dir=TEMP_THUMB_DIR,
+            vtt_output_dir=VTT_DIR,
+            sprite_output_dir=SPRITE_DIR,
+            mode=ThumbnailMode(os.getenv("THUMBNAIL_MODE", ThumbnailMode.DECODE)),
+        )
+        self._queue: asyncio.Queue[str] | None = None
+        self._workers: list[asyncio.Task] = []
+
+    @property
+    def queue(self) -> asyncio.Queue[str]:
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        return self._queue
+
+    async def start(self):
+        for path in [SPRITE_DIR, VTT_DIR, TEMP_THUMB_DIR]:
+            path.mkdir(parents=True, exist_ok=True)
+
+        try:
+            async with get_async_session() as session:
+                stmt = select(PostProcessJobDB).where(
+                    or_(
+                        PostProcessJobDB.status == PostProcessStatus.PENDING,
+                        PostProcessJobDB.status == PostProcessStatus.RUNNING,
+                    )
+                )
+                jobs = (await session.exec(stmt)).all()
+                for job in jobs:
+                    self.queue.put_nowait(job.id)
+            if jobs:
+                logger.info("Recovered %s post-processing job(s).", len(jobs))
+        except Exception as e:
+            logger.exception("PostProcessor.start failed to recover jobs")
+
+        for _ in range(self.concurrency - len(self._workers)):
+            self._workers.append(asyncio.create_task(self._worker()))
+
+    async def submit(self, video_id: str, file_path: Path):
+        job = PostProcessJobDB(videoId=video_id, filePath=file_path.as_posix())
+        async with get_async_session() as session:
+            session.add(job)
+            await session.commit()
+            job_id = job.id
+
+        self.queue.put_nowait(job_id)
+        await self._emit(video_id, job_id, PostProcessStatus.PENDING, "queued")
+
+    async def _worker(self):
+        while True:
+            job_id = await self.queue.get()
+            try:
+                await self._run(job_id)
+            except Exception as e:
+                logger.exception("Post-processing job %s crashed", job_id)
+            finally:
+                self.queue.task_done()
+
+    async def _run(self, job_id: str):
+        async with get_async_session() as session:
+            job = await session.get(PostProcessJobDB, job_id)
+            if not job or job.status == PostProcessStatus.COMPLETED:
+                return
+            job.status = PostProcessStatus.RUNNING
+            job.attempts += 1
+            session.add(job)
+            await session.commit()
+            video_id, file_path, attempts = (
+                job.videoId,
+                Path(job.filePath),
+                job.attempts,
+            )
+
+        await self._emit(video_id, job_id, PostProcessStatus.RUNNING, "sprite")
+
+        error = ""
+        try:
+            if not file_path.exists():
+                error = f"File not found: {file_path}"
+            elif not await self._generate_thumbnails(video_id, file_path):
+                error = "Thumbnail generation failed"
+        except Exception as e:
+            logger.exception("Post-processing failed for %s", file_path)
+            error = str(e)
+
+        if not error:
+            status = PostProcessStatus.COMPLETED
+        elif attempts < MAX_ATTEMPTS and file_path.exists():
+            status = PostProcessStatus.PENDING
+        else:
+            status = PostProcessStatus.FAILED
+
+        async with get_async_session() as session:
+            job = await session.get(PostProcessJobDB, job_id)
+            if job:
+                job.status = status
+                job.error = error
+                session.add(job)
+                await session.commit()
+
+        await self._emit(video_id, job_id, status, "done" if not error else "", error)
+        if status == PostProcessStatus.PENDING:
+            self.queue.put_nowait(job_id)
+
+    async def _generate_thumbnails(self, video_id: str, file_path: Path) -> bool:
+        config = self.thumb_vtt_config
+        video_name = file_path.stem
+        sprite_prefix = SPRITE_DIR / f"{video_name}_sprite"
+
+        timeline = PhaseTimeline(video_id)
+        timeline.start("sprite")
+        started = time.perf_counter()
+        result = "error"
+        try:
+            sprite = await media_executor.run(
+                build_sprite, file_path, sprite_prefix, config
+            )
+            result = "ok" if sprite else "skipped"
+        finally:
+            thumbnail_seconds.observe(time.perf_counter() - started, result=result)
+            timeline.finish("sprite", detail=f"{config.mode.value} {result}")
+            await timeline.save()
+        if sprite is None:
+            return False
+
+        vtt_path = VTT_DIR / f"{video_name}_thumbs.vtt"
+        *sheet_ids, vtt_id = await register_video_files(
+            video_id,
+            [(sheet.as_posix(), FileKind.SPRITE) for sheet in sprite.sheets]
+            + [(vtt_path.as_posix(), FileKind.VTT)],
+        )
+        write_vtt(vtt_path, sheet_ids, sprite, config)
+
+        async with get_async_session() as session:
+            stmt = (
+                update(VideoDB)
+                .where(VideoDB.id == video_id)  # type: ignore
+                .values(vttPathId=vtt_id, vttSpritePathId=sheet_ids[0])
+            )
+            await session.exec(stmt)  # type: ignore
+            await session.commit()
+            video = await session.get(VideoDB, video_id)
+            video_data = video.model_dump() if video else None
+
+        if video_data:
+            await SioEmitter.message(video_data)
+        return True
+
+    async def _emit(
+        self, video_id: str, job_id: str, status: str, stage: str, error: str = ""
+    ):
+        await SioEmitter.postprocess_update(
+            PostProcessProgress(
+                id=video_id, jobId=job_id, status=status, stage=stage, error=error
+            )
+        )
+
+
+post_processor = PostProcessor(
+    int(os.getenv("POSTPROCESS_CONCURRENCY", media_executor.max_workers))
+)
@@ -0,0 +1,89 @@
+import asyncio
+import os
+import threading
+
+from src.logger import get_logger
+from src.schemas import VideoProgress, VideoProgressBatch
+from src.SioEmitter import SioEmitter
+
+logger = get_logger("backend.progress_aggregator")
+
+
+class ProgressAggregator:
+    """Keeps only the latest progress per video and broadcasts them as one batch
+    at a fixed rate.
+
+    ``push`` is called straight from yt-dlp worker threads. If an emit is slower
+    than the flush interval, newer frames simply overwrite the pending ones, so
+    stale updates are dropped instead of queueing up behind the socket.
+    """
+
+    def __init__(self, hz: float):
+        self.interval = 1 / hz
+        self._lock = threading.Lock()
+        self._latest: dict[str, VideoProgress] = {}
+        self._speeds: dict[str, float] = {}
+        # Set when a download leaves the total without a frame of its own, so
+        # the next flush still sends the lower figure
+        self._speeds_changed = False
+        self._task: asyncio.Task | None = None
+        self.pushed = 0
+        self.dropped = 0
+        self.flushed = 0
+
+    def push(self, vp: VideoProgress):
+        with self._lock:
+            if vp.id in self._latest:
+                self.dropped += 1
+            self._latest[vp.id] = vp
+            self.pushed += 1
+            if vp.status == "downloading":
+                self._speeds[vp.id] = vp.speed or 0.0
+            else:
+                self._speeds.pop(vp.id, None)
+
+    def forget(self, video_id: str):
+        with self._lock:
+            if self._speeds.pop(video_id, None) is not None:
+                self._speeds_changed = True
+
+    @property
+    def total_speed(self) -> float:
+        with self._lock:
+            return self._total_speed()
+
+    def _total_speed(self) -> float:
+        # Callers hold the lock, push runs on the yt-dlp threads
+        return sum(self._speeds.values())
+
+    def speeds(self) -> dict[str, float]:
+        with self._lock:
+            return dict(self._speeds)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.exception("Progress flush failed")
+
+    async def flush(self):
+        with self._lock:
+            if not self._latest and not self._speeds_changed:
+                return
+            batch, self._latest = self._latest, {}
+            self._speeds_changed = False
+            total_speed = self._total_speed()
+
+        self.flushed += 1
+        await SioEmitter.status_update_batch(
+            VideoProgressBatch(progress=list(batch.values()), totalSpeed=total_speed)
+        )
+
+
+progress_aggregator = ProgressAggregator(float(os.getenv("PROGRESS_FLUSH_HZ", "4")))
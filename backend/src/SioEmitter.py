@@ -1,21 +1,41 @@
-from src.schemas import Notify, Startup, VideoProgress
-from src.sockets import client_set, sio
+from src.metrics import sio_emit_seconds, sio_emits
+from src.schemas import (
+    Notify,
+    PostProcessProgress,
+    Startup,
+    VideoProgress,
+    VideoProgressBatch,
+)
+from src.sockets import (
+    ALL_PROGRESS_ROOM,
+    CLIENTS_ROOM,
+    client_set,
+    sio,
+    video_room,
+    video_subscribers,
+)
 
 
 class SioEmitter:
 
     @staticmethod
-    async def _emit_to_client(event: str, data, sid: str | None = None):
+    async def _emit_to_client(
+        event: str, data, sid: str | None = None, room: str = CLIENTS_ROOM
+    ):
         if sid is not None:
             if sid in client_set:
-                await sio.emit(event, data, to=sid)
+                with sio_emit_seconds.time(event=event):
+                    await sio.emit(event, data, to=sid)
+                sio_emits.inc(event=event)
             return
 
         if not client_set:
             return
 
-        for client_id in list(client_set):
-            await sio.emit(event, data, to=client_id)
+        # One emit per room: the packet is encoded once and fanned out by the manager
+        with sio_emit_seconds.time(event=event):
+            await sio.emit(event, data, room=room)
+        sio_emits.inc(event=event)
 
     @staticmethod
     async def message(data):
@@ -25,6 +45,21 @@ class SioEmitter:
     async def status_update(vp: VideoProgress):
         await SioEmitter._emit_to_client("status_update", vp.model_dump())
 
+    @staticmethod
+    async def status_update_batch(batch: VideoProgressBatch):
+        await SioEmitter._emit_to_client(
+            "status_update_batch", batch.model_dump(), room=ALL_PROGRESS_ROOM
+        )
+        for vp in batch.progress:
+            if vp.id in video_subscribers:
+                await SioEmitter._emit_to_client(
+                    "status_update", vp.model_dump(), room=video_room(vp.id)
+                )
+
+    @staticmethod
+    async def postprocess_update(progress: PostProcessProgress):
+        await SioEmitter._emit_to_client("postprocess_update", progress.model_dump())
+
     @staticmethod
     async def notify(notification: Notify):
         await SioEmitter._emit_to_client("notify", notification.model_dump())
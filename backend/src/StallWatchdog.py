@@ -0,0 +1,159 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from pathlib import Path
+
+from src.logger import get_logger
+from src.metrics import registry
+from src.paths import BASE_DIR
+from src.schemas import StallReport
+
+logger = get_logger("backend.stall_watchdog")
+
+STACK_DEPTH = 30
+
+stalls_total = registry.counter(
+    "ytdlp_event_loop_stalls_total", "Event loop stalls past STALL_THRESHOLD"
+)
+
+
+def _short_path(filename: str) -> str:
+    try:
+        return Path(filename).relative_to(BASE_DIR).as_posix()
+    except ValueError:
+        return filename
+
+
+def _blame(stack: traceback.StackSummary) -> str:
+    """The innermost frame in our own code, the line that called whatever
+    blocked, or the innermost frame at all if none is ours."""
+    frames = [
+        frame
+        for frame in stack
+        if frame.filename.startswith(str(BASE_DIR))
+        and "site-packages" not in frame.filename
+    ] or list(stack)
+    if not frames:
+        return ""
+    frame = frames[-1]
+    return f"{_short_path(frame.filename)}:{frame.lineno} in {frame.name}"
+
+
+class StallWatchdog:
+    """Notices when the event loop stops running callbacks and records who
+    held it.
+
+    A task on the loop stamps a heartbeat every ``interval``. A daemon
+    thread checks the stamp and, once it is ``threshold`` late, grabs the
+    loop thread's stack from ``sys._current_frames`` and the task that was
+    running. The report's duration is filled in when the heartbeat resumes.
+    """
+
+    def __init__(self, threshold: float, interval: float = 0.05, history: int = 50):
+        self.threshold = threshold
+        self.interval = interval
+        self.stalls: deque[StallReport] = deque(maxlen=history)
+        self.total = 0
+        self._beat = time.monotonic()
+        self._current: StallReport | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_thread_id: int | None = None
+        self._heartbeat_task: asyncio.Task | None = None
+        self._thread: threading.Thread | None = None
+        self._stopped = threading.Event()
+
+    def start(self):
+        """Call from the loop thread."""
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._beat = time.monotonic()
+        self._heartbeat_task = self._loop.create_task(self._heartbeat())
+        self._stopped.clear()
+        self._thread = threading.Thread(
+            target=self._watch, name="stall-watchdog", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+
+    async def _heartbeat(self):
+        while True:
+            self._beat = time.monotonic()
+            await asyncio.sleep(self.interval)
+
+    def _watch(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                self.check(time.monotonic())
+            except Exception as e:
+                logger.exception("Stall check failed")
+
+    def check(self, now: float):
+        beat = self._beat
+        current = self._current
+        if current is not None and beat != current._beat:
+            # The heartbeat is back, so the stall ended when it stamped
+            current.seconds = beat - current._beat - self.interval
+            current.ongoing = False
+            self._current = None
+            logger.warning(
+                "Event loop blocked for %.3fs at %s (task %s)",
+                current.seconds,
+                current.blame,
+                current.task or "none",
+            )
+            return
+
+        late = now - beat - self.interval
+        if current is not None:
+            current.seconds = late
+        elif late >= self.threshold:
+            self._current = self._capture(beat, late)
+
+    def _capture(self, beat: float, late: float) -> StallReport:
+        frame = sys._current_frames().get(self._loop_thread_id)  # type: ignore
+        stack = traceback.extract_stack(frame) if frame else traceback.StackSummary()
+        report = StallReport(
+            startedAt=time.time() - late,
+            seconds=late,
+            blame=_blame(stack),
+            stack=[
+                line.rstrip("\n")
+                for line in traceback.format_list(stack[-STACK_DEPTH:])
+            ],
+        )
+        report._beat = beat
+
+        task = None
+        try:
+            task = asyncio.current_task(self._loop)
+        except RuntimeError:
+            pass
+        if task is not None:
+            report.task = task.get_name()
+            report.coroutine = getattr(task.get_coro(), "__qualname__", "")
+
+        self.total += 1
+        self.stalls.append(report)
+        stalls_total.inc()
+        return report
+
+    def stats(self) -> dict:
+        return {
+            "thresholdSeconds": self.threshold,
+            "total": self.total,
+            "stalls": [stall.model_dump() for stall in reversed(self.stalls)],
+        }
+
+
+stall_watchdog = StallWatchdog(
+    float(os.getenv("STALL_THRESHOLD", "0.25")),
+    history=int(os.getenv("STALL_HISTORY", "50")),
+)
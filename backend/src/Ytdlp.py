@@ -1,32 +1,34 @@
 import asyncio
-import math
-import platform
-import re
+import os
 import shutil
+import threading
+import time
 from enum import Enum
 from pathlib import Path
 
-import ffmpeg
-from PIL import Image
-from sqlmodel import select, update
-from src.db import FileDB, VideoDB, get_session
+from sqlmodel import update
+from src.BandwidthManager import bandwidth_manager
+from src.db import FileKind, VideoDB, get_async_session, register_video_files
+from src.executors import download_executor
 from src.logger import get_logger
+from src.MetadataCache import extract_info, metadata_cache
+from src.metrics import download_bytes, download_retries
+from src.paths import THUMB_DIR, VIDEO_DIR
+from src.PhaseTimeline import PhaseTimeline
+from src.PostProcessor import post_processor
+from src.ProgressAggregator import progress_aggregator
 from src.req import REQ_DIR
-from src.schemas import DownloadStatus, ThumbnailVTTConfig, Video, VideoProgress
+from src.schemas import DownloadStatus, Video, VideoProgress
+from src.search import index_video_metadata
 from src.SioEmitter import SioEmitter
 from yt_dlp import YoutubeDL
-from yt_dlp.utils import DownloadError
+from yt_dlp.postprocessor.common import PostProcessor as YdlPostProcessor
+from yt_dlp.utils import DownloadError, format_bytes
 
 logger = get_logger("backend.ytdlp")
 
-ANSI_ESCAPE = re.compile(r"\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])")
-
-BASE_DIR = Path(__file__).resolve().parent.parent
-DOWNLOAD_DIR = BASE_DIR / "downloads"
-VIDEO_DIR = DOWNLOAD_DIR / "videos"
-THUMB_DIR = DOWNLOAD_DIR / "thumbnails"
-SPRITE_DIR = DOWNLOAD_DIR / "sprite"
-VTT_DIR = DOWNLOAD_DIR / "vtt"
+# How often a running download writes its byte count to the database
+PROGRESS_SAVE_INTERVAL = float(os.getenv("PROGRESS_SAVE_INTERVAL", "5"))
 
 
 class FilePathType(str, Enum):
@@ -36,25 +38,89 @@ class FilePathType(str, Enum):
     SPRITE = "spriteFilePath"
 
 
+class YdlLogger:
+    """yt-dlp's ``logger`` option. Retries are only reported as messages, so
+    they're counted here; everything else goes to our debug log, matching
+    the quiet options."""
+
+    def _count_retry(self, msg: str):
+        if "Retrying" not in msg:
+            return
+        if "Retrying fragment" in msg:
+            download_retries.inc(kind="fragment")
+        elif msg.startswith("[download]"):
+            download_retries.inc(kind="http")
+        else:
+            download_retries.inc(kind="extractor")
+
+    def debug(self, msg: str):
+        self._count_retry(msg)
+
+    def info(self, msg: str):
+        pass
+
+    def warning(self, msg: str):
+        self._count_retry(msg)
+        logger.debug("yt-dlp: %s", msg)
+
+    def error(self, msg: str):
+        logger.debug("yt-dlp: %s", msg)
+
+
+class RecordFormatPP(YdlPostProcessor):
+    """Runs after format selection, before the download starts, and keeps
+    the selected format id so a resume asks for the same files and finds
+    their .part files."""
+
+    def __init__(self, ytdlp: "Ytdlp"):
+        super().__init__()
+        self.ytdlp = ytdlp
+
+    def run(self, info):
+        self.ytdlp.video.formatId = info.get("format_id") or ""
+        return [], info
+
+
+class HandOffPP(YdlPostProcessor):
+    """Runs once per video, after merging and the move to the final name,
+    and hands the finished file to the rest of the pipeline. The progress
+    hook's "finished" event can't do this: it fires for every format, and
+    for a merged download those are intermediate files the merger deletes."""
+
+    def __init__(self, ytdlp: "Ytdlp"):
+        super().__init__()
+        self.ytdlp = ytdlp
+
+    def run(self, info):
+        asyncio.run_coroutine_threadsafe(
+            self.ytdlp.complete_download(info), self.ytdlp.loop
+        ).result()
+        return [], info
+
+
 class Ytdlp:
     _instances: dict[str, "Ytdlp"] = {}
 
     def __init__(self, video: Video):
         self.canceled = False
+        self.paused = False
+        # Set once the pause has been raised into yt-dlp, from then on the
+        # download can only end
+        self.stopping = False
         self.once = True
+        self.handed_off = False
         self.video = video
         self.loop = asyncio.get_event_loop()
         self.canceled = False
+        self._saved_at = time.monotonic()
+        self._last_bytes = 0
+        # Cuts a bandwidth wait short when the download is paused or canceled
+        self._wake = threading.Event()
+        self.timeline = PhaseTimeline(video.id)
 
         Ytdlp._instances[video.id] = self
 
-        self.thumb_vtt_config = ThumbnailVTTConfig(interval=1)
-        self.thumb_vtt_config.temp_dir = DOWNLOAD_DIR / "temp" / "thumbs"
-        self.thumb_vtt_config.vtt_output_dir = VTT_DIR
-        self.thumb_vtt_config.sprite_output_dir = SPRITE_DIR
-
-        for path in [THUMB_DIR, SPRITE_DIR, VTT_DIR, self.thumb_vtt_config.temp_dir]:
-            path.mkdir(parents=True, exist_ok=True)
+        THUMB_DIR.mkdir(parents=True, exist_ok=True)
 
     @classmethod
     def get_instance(cls, video_id: str) -> "Ytdlp | None":
@@ -68,11 +134,34 @@ class Ytdlp:
     def all_instances(cls) -> list["Ytdlp"]:
         return list(cls._instances.values())
 
-    def clean_ansi(self, text: str) -> str:
-        return ANSI_ESCAPE.sub("", text).strip()
-
     def cancel(self):
         self.canceled = True
+        self._wake.set()
+
+    def pause(self):
+        """Stops at the next progress tick, keeping the .part and fragment
+        files for a later resume."""
+        self.paused = True
+        self.video.downloadStatus = DownloadStatus.PAUSED
+        self._wake.set()
+
+    def resume(self):
+        """Takes back a pause that hasn't reached yt-dlp yet."""
+        self.paused = False
+        self.video.downloadStatus = DownloadStatus.DOWNLOADING
+        self._wake.clear()
+
+    def format_selector(self) -> str:
+        selector = (
+            "bestvideo+bestaudio/best"
+            if self.video.format == "BEST"
+            else self.video.format.lower()
+        )
+        # The recorded formats first, so a resume continues the same files;
+        # the plain selector if the site no longer offers them
+        if self.video.formatId:
+            return f"{self.video.formatId}/{selector}"
+        return selector
 
     async def download_video(self):
         ydl_opts = {
@@ -80,11 +169,7 @@ class Ytdlp:
                 VIDEO_DIR
                 / "%(height)sp_%(extractor_key)s___%(title).50s___%(id)s.%(ext)s"
             ),
-            "format": (
-                "bestvideo+bestaudio/best"
-                if self.video.format == "BEST"
-                else self.video.format.lower()
-            ),
+            "format": self.format_selector(),
             "restrictfilenames": True,
             "noplaylist": True,
             "nooverwrites": True,
@@ -94,6 +179,8 @@ class Ytdlp:
             "no_warnings": True,
             "simulate": False,
             "progress_hooks": [self._progress_wrapper],
+            "postprocessor_hooks": [self._postprocessor_hook],
+            "logger": YdlLogger(),
             "writethumbnail": True,
             "embedthumbnail": True,
             "addmetadata": True,
@@ -111,20 +198,54 @@ class Ytdlp:
             # "verbose": True,
         }
 
+        self.video.downloadStatus = DownloadStatus.DOWNLOADING
+        bandwidth_manager.register(self.video.id)
+        # Phases can't be saved once the video row is gone, they'd break its
+        # foreign key
+        removed = False
         try:
             with YoutubeDL(ydl_opts) as ydl:
-                await self.loop.run_in_executor(
-                    None, lambda: ydl.download([self.video.url])
-                )
+                ydl.add_post_processor(RecordFormatPP(self), when="before_dl")
+                ydl.add_post_processor(HandOffPP(self), when="after_move")
+                info, cached = await self.load_info(ydl)
+                await self.apply_info(info)
+                try:
+                    self.timeline.start("download")
+                    await download_executor.run(ydl.process_ie_result, info, True)
+                except DownloadError:
+                    # Signed format URLs in cached info may have gone stale
+                    if not cached or self.canceled or self.paused:
+                        raise
+                    logger.warning(
+                        "Download from cached metadata failed, extracting %s again",
+                        self.video.url,
+                    )
+                    await metadata_cache.invalidate(self.video.url)
+                    info, _ = await self.load_info(ydl)
+                    self.timeline.start("download")
+                    await download_executor.run(ydl.process_ie_result, info, True)
         except Exception as e:
+            outcome = "paused" if self.paused else "failed"
+            self.timeline.finish("download", self.video.downloadedBytes, outcome)
+            self.timeline.finish_all(outcome)
+            if self.paused:
+                await self.save_progress(DownloadStatus.PAUSED)
+                await SioEmitter.message(self.video.model_dump())
+                logger.info(
+                    "Paused %s after %s bytes",
+                    self.video.id,
+                    self.video.downloadedBytes,
+                )
+                return
             try:
                 logger.exception("Ytdlp download failed")
-                with get_session() as session:
+                async with get_async_session() as session:
                     logger.debug("Removing video %s", self.video.id)
-                    video = session.get(VideoDB, self.video.id)
+                    video = await session.get(VideoDB, self.video.id)
                     if video:
-                        session.delete(video)
-                        session.commit()
+                        await session.delete(video)
+                        await session.commit()
+                    removed = True
                     instance = Ytdlp.get_instance(self.video.id)
                     if instance:
                         instance.cancel()
@@ -137,8 +258,102 @@ class Ytdlp:
                         await SioEmitter.remove_video(self.video.id)
             except Exception as e:
                 logger.exception("Failed while cleaning up a failed download")
+        finally:
+            bandwidth_manager.unregister(self.video.id)
+            if not removed:
+                await self.timeline.save()
+
+    async def load_info(self, ydl: YoutubeDL) -> tuple[dict, bool]:
+        """The video's info dict from the metadata cache, extracting and
+        caching it on a miss. The flag tells whether it came from the cache."""
+        self.timeline.start("extract")
+        info = await metadata_cache.get(self.video.url)
+        if info is not None:
+            logger.debug("Metadata cache hit for %s", self.video.url)
+            self.timeline.finish("extract", detail="cache")
+            return info, True
+
+        info = await download_executor.run(extract_info, ydl, self.video.url)
+        await metadata_cache.store(self.video.url, info)
+        self.timeline.finish("extract", detail="network")
+        return info, False
+
+    def set_info_fields(self, info: dict):
+        self.video.videoId = info["id"]
+        self.video.fullTitle = info.get("fulltitle") or info.get("title") or ""
+        # Extractors may leave these as None until a format is picked
+        self.video.durationString = info.get("duration_string") or ""
+        self.video.resolution = info.get("resolution") or ""
+        self.video.extractor = info.get("extractor_key") or ""
+
+    async def apply_info(self, info: dict):
+        """Shows title, duration and resolution before the first progress
+        tick."""
+        self.set_info_fields(info)
+        await SioEmitter.message(self.video.model_dump())
+        async with get_async_session() as session:
+            stmt = (
+                update(VideoDB)
+                .where(VideoDB.id == self.video.id)  # type: ignore
+                .values(**self.video.model_dump())
+            )
+
+            await session.exec(stmt)  # type: ignore
+            await session.commit()
+
+    async def save_progress(self, status: DownloadStatus | None = None):
+        """Writes only the resume state, so edits made meanwhile through the
+        API aren't overwritten."""
+        values = {
+            "downloadedBytes": self.video.downloadedBytes,
+            "formatId": self.video.formatId,
+        }
+        if status is not None:
+            values["downloadStatus"] = status
+        async with get_async_session() as session:
+            stmt = (
+                update(VideoDB)
+                .where(VideoDB.id == self.video.id)  # type: ignore
+                .values(**values)
+            )
+            await session.exec(stmt)  # type: ignore
+            await session.commit()
+
+    def throttle(self, d):
+        """Holds the download thread while the download is over its share of
+        the bandwidth. yt-dlp calls the hooks after every block it receives,
+        so this paces plain and fragmented downloads alike."""
+        downloaded = d.get("downloaded_bytes") or 0
+        # A merged download starts counting again for its second format
+        received = downloaded - self._last_bytes
+        if received < 0:
+            received = downloaded
+        self._last_bytes = downloaded
+        download_bytes.inc(received)
+
+        delay = bandwidth_manager.reserve(self.video.id, received)
+        while delay > 0 and not self._wake.is_set():
+            # Re-checked every second so a raised limit applies right away
+            self._wake.wait(min(delay, 1.0))
+            delay = bandwidth_manager.pending(self.video.id)
 
     def _progress_wrapper(self, d):
+        if d["status"] == "downloading":
+            self.throttle(d)
+            # The second format of a merged download starts a phase of its own
+            if not self.timeline.is_open("download"):
+                self.timeline.start("download")
+        elif d["status"] == "finished":
+            self.timeline.finish(
+                "download",
+                d.get("downloaded_bytes") or d.get("total_bytes"),
+                d["info_dict"].get("format_id", ""),
+            )
+
+        if self.paused:
+            self.stopping = True
+            raise DownloadError("[Ytdlp] Paused by user.")
+
         if self.canceled:
             file_path = d.get("filename")
             if file_path:
@@ -163,217 +378,124 @@ class Ytdlp:
             raise DownloadError("[Ytdlp] Canceled by user.")
 
         try:
+            # Plain ticks only need the aggregator, which is safe to feed from
+            # this thread, so they skip the round trip through the event loop.
+            if d["status"] == "downloading" and not self.once:
+                vp = self.build_progress(d)
+                progress_aggregator.push(vp)
+                self.video.downloadedBytes = vp.downloadedBytes
+                if time.monotonic() - self._saved_at >= PROGRESS_SAVE_INTERVAL:
+                    self._saved_at = time.monotonic()
+                    asyncio.run_coroutine_threadsafe(self.save_progress(), self.loop)
+                return
+
             asyncio.run_coroutine_threadsafe(self.ytdlp_progress_hook(d), self.loop)
         except Exception as e:
             logger.exception("Error in progress hook emit")
 
+    def _postprocessor_hook(self, d):
+        if d["status"] == "started":
+            self.timeline.start("postprocess", d.get("postprocessor", ""))
+        elif d["status"] == "finished":
+            self.timeline.finish("postprocess")
+
+    def build_progress(self, d) -> VideoProgress:
+        """Reads the raw numbers from the hook dict; formatting is left to clients."""
+        downloaded = d.get("downloaded_bytes") or 0
+        total = d.get("total_bytes") or d.get("total_bytes_estimate")
+        if d["status"] == "finished":
+            percent = 100.0
+        else:
+            percent = downloaded * 100 / total if total else 0.0
+
+        return VideoProgress(
+            id=self.video.id,
+            videoId=d["info_dict"]["id"],
+            status=d["status"],
+            percent=percent,
+            downloadedBytes=downloaded,
+            totalBytes=total,
+            speed=d.get("speed"),
+            eta=d.get("eta"),
+            fragmentIndex=d.get("fragment_index"),
+            fragmentCount=d.get("fragment_count"),
+            rateLimit=bandwidth_manager.rate_for(self.video.id),
+        )
+
     async def ytdlp_progress_hook(self, d):
         try:
-            cleaned_percent = self.clean_ansi(d.get("_percent_str", "0"))
-            cleaned_downloadedSize = self.clean_ansi(
-                d.get("_downloaded_bytes_str", "0")
-            )
-            cleaned_totalSize = self.clean_ansi(d.get("_total_bytes_str", "0"))
-            cleaned_eta = self.clean_ansi(d.get("_eta_str", "0"))
-            cleaned_speed = self.clean_ansi(d.get("_speed_str", "0"))
+            vp = self.build_progress(d)
 
             if d["status"] == "downloading":
                 if self.once:
                     self.once = False
-                    self.video.videoId = d["info_dict"]["id"]
-                    self.video.fullTitle = d["info_dict"]["fulltitle"]
-                    self.video.durationString = d["info_dict"]["duration_string"]
-                    self.video.resolution = d["info_dict"].get("resolution", "")
-                    self.video.size = cleaned_totalSize
+                    self.set_info_fields(d["info_dict"])
+                    self.video.size = format_bytes(vp.totalBytes)
                     await SioEmitter.message(self.video.model_dump())
-                    with get_session() as session:
+                    async with get_async_session() as session:
                         stmt = (
                             update(VideoDB)
                             .where(VideoDB.id == self.video.id)  # type: ignore
                             .values(**self.video.model_dump())
                         )
 
-                        session.exec(stmt)  # type: ignore
-                        session.commit()
-
-                vp = VideoProgress(
-                    id=self.video.id,
-                    videoId=d["info_dict"]["id"],
-                    percent=cleaned_percent,
-                    downloadedSize=cleaned_downloadedSize,
-                    totalSize=cleaned_totalSize,
-                    eta=cleaned_eta,
-                    speed=cleaned_speed,
-                )
+                        await session.exec(stmt)  # type: ignore
+                        await session.commit()
 
-                await SioEmitter.status_update(vp)
+                progress_aggregator.push(vp)
 
             else:
-                self.video.downloadStatus = DownloadStatus.COMPLETED
-                self.video.videoId = d["info_dict"]["id"]
-                self.video.fullTitle = d["info_dict"]["fulltitle"]
-                self.video.durationString = d["info_dict"]["duration_string"]
-                self.video.resolution = d["info_dict"].get("resolution", "")
-                self.video.size = cleaned_totalSize
-
-                self.video.videoPathId = self.setFileGetID(
-                    Path(d.get("filename")).as_posix(),
-                )
+                # The file is handed on by HandOffPP once it's final
+                progress_aggregator.push(vp)
 
-                original_thumb_path = Path(d["info_dict"]["thumbnails"][-1]["filepath"])
-                final_thumb_path = THUMB_DIR / original_thumb_path.name
-                shutil.move(str(original_thumb_path), str(final_thumb_path))
+        except Exception as e:
+            logger.exception("YTDLP progress hook failed")
 
-                self.video.thumbnailPathId = self.setFileGetID(
-                    final_thumb_path.as_posix(),
-                )
+    async def complete_download(self, info: dict):
+        """Registers the final file and its thumbnail and queues the sprite
+        job. ``info["filepath"]`` is the merged file under its final name."""
+        if self.handed_off:
+            return
+        self.handed_off = True
+        try:
+            file_path = Path(info["filepath"])
+            self.video.downloadStatus = DownloadStatus.COMPLETED
+            self.set_info_fields(info)
+            self.video.downloadedBytes = file_path.stat().st_size
+            self.video.size = format_bytes(self.video.downloadedBytes)
+
+            files = [(file_path.as_posix(), FileKind.VIDEO)]
+            thumbnails = [t for t in info.get("thumbnails") or [] if t.get("filepath")]
+            if thumbnails:
+                original_thumb_path = Path(thumbnails[-1]["filepath"])
+                final_thumb_path = THUMB_DIR / original_thumb_path.name
+                with self.timeline.phase("thumbnail_move"):
+                    shutil.move(str(original_thumb_path), str(final_thumb_path))
+                files.append((final_thumb_path.as_posix(), FileKind.THUMBNAIL))
 
-                vtt_path = await self.thumbgen(d)
-                if vtt_path:
-                    self.video.vttPathId = self.setFileGetID(
-                        vtt_path.as_posix(),
-                    )
+            with self.timeline.phase("db_update"):
+                file_ids = await register_video_files(self.video.id, files)
+                self.video.videoPathId = file_ids[0]
+                if thumbnails:
+                    self.video.thumbnailPathId = file_ids[1]
 
-                with get_session() as session:
+                async with get_async_session() as session:
                     stmt = (
                         update(VideoDB)
                         .where(VideoDB.id == self.video.id)  # type: ignore
                         .values(**self.video.model_dump())
                     )
 
-                    session.exec(stmt)  # type: ignore
-                    session.commit()
-
-                vp = VideoProgress(
-                    id=self.video.id,
-                    videoId=d["info_dict"]["id"],
-                    percent=cleaned_percent,
-                    downloadedSize=cleaned_downloadedSize,
-                    totalSize=cleaned_totalSize,
-                    eta=cleaned_eta,
-                    speed=cleaned_speed,
-                )
-
-                await SioEmitter.status_update(vp)
-
-                await SioEmitter.message(self.video.model_dump())
-
-        except Exception as e:
-            logger.exception("YTDLP progress hook failed")
-
-    async def thumbgen(self, d: dict):
-        thumbs_dir = None
-        try:
-            filepath = d.get("filename")
-            if not filepath or not Path(filepath).exists():
-                logger.warning("No valid filepath in hook data.")
-                return
-
-            filepath = Path(filepath)
-            video_name = filepath.stem
-            thumbs_dir = self.thumb_vtt_config.temp_dir / video_name
-            thumbs_dir.mkdir(parents=True, exist_ok=True)
-
-            thumb_pattern = str(thumbs_dir / "thumb%04d.jpg")
-
-            binary_name = "ffmpeg.exe" if platform.system() == "Windows" else "ffmpeg"
-            ffmpeg_path = Path("req") / binary_name
-
-            try:
-                (
-                    ffmpeg.input(str(filepath))
-                    .output(
-                        thumb_pattern,
-                        vf=f"fps=1/{self.thumb_vtt_config.interval}",
-                        loglevel="error",
-                    )
-                    .run(cmd=str(ffmpeg_path))
-                )
-            except ffmpeg.Error as e:
-                logger.exception("FFmpeg thumbnail generation failed")
-                return
+                    await session.exec(stmt)  # type: ignore
+                    await session.commit()
 
-            thumbs = sorted(thumbs_dir.glob("thumb*.jpg"))
-            if not thumbs:
-                logger.warning("No thumbnails found.")
-                return
-
-            with Image.open(thumbs[0]) as first_thumb:
-                thumb_w, thumb_h = first_thumb.size
-
-            columns = self.thumb_vtt_config.columns
-            rows = math.ceil(len(thumbs) / columns)
-            sprite = Image.new("RGB", (columns * thumb_w, rows * thumb_h))
-
-            sprite_name = f"{video_name}_sprite.jpg"
-            sprite_path = SPRITE_DIR / sprite_name
-
-            for idx, thumb_path in enumerate(thumbs):
-                x = (idx % columns) * thumb_w
-                y = (idx // columns) * thumb_h
-                with Image.open(thumb_path) as img:
-                    sprite.paste(img, (x, y))
-
-            sprite.save(sprite_path)
-            logger.info("Sprite saved: %s", sprite_path)
-
-            self.video.vttSpritePathId = self.setFileGetID(sprite_path.as_posix())
-
-            def format_timestamp(total_seconds: int) -> str:
-                hrs = total_seconds // 3600
-                mins = (total_seconds % 3600) // 60
-                secs = total_seconds % 60
-                return f"{hrs:02}:{mins:02}:{secs:02}.000"
-
-            interval = self.thumb_vtt_config.interval
-            vtt_lines = ["WEBVTT\n"]
-
-            sprite_url = self.video.vttSpritePathId
-
-            for idx in range(len(thumbs)):
-                x = (idx % columns) * thumb_w
-                y = (idx // columns) * thumb_h
-                start_time = format_timestamp(idx * interval)
-                end_time = format_timestamp((idx + 1) * interval)
-                vtt_lines.append(f"{start_time} --> {end_time}")
-                vtt_lines.append(f"{sprite_url}#xywh={x},{y},{thumb_w},{thumb_h}\n")
-
-            vtt_path = VTT_DIR / f"{video_name}_thumbs.vtt"
-            vtt_path.write_text("\n".join(vtt_lines), encoding="utf-8")
-            logger.info("VTT saved: %s", vtt_path)
-
-            return vtt_path
-
-        except Exception as e:
-            logger.exception("Thumb generation failed")
-            import traceback
-
-            traceback.print_exc()
-            return None
-        finally:
-            if thumbs_dir and thumbs_dir.exists():
-                try:
-                    shutil.rmtree(thumbs_dir)
-                    logger.info("Cleaned up: %s", thumbs_dir)
-                except Exception as e:
-                    logger.exception("Failed to cleanup %s", thumbs_dir)
-
-    def setFileGetID(self, file_path: str) -> str:
-        try:
-            with get_session() as session:
-                stmt = select(FileDB).where(FileDB.filePath == file_path)
-                result = session.exec(stmt)
-                existing = result.one_or_none()
+            await SioEmitter.message(self.video.model_dump())
 
-                if existing:
-                    return str(existing.id)
+            await post_processor.submit(self.video.id, file_path)
 
-                new_file = FileDB(filePath=file_path)
-                session.add(new_file)
-                session.commit()
-                session.refresh(new_file)
-                return str(new_file.id)
+            with self.timeline.phase("index"):
+                await index_video_metadata(self.video.id, info)
+            await self.timeline.save()
 
         except Exception as e:
-            logger.exception("Ytdlp.setFileGetID failed")
-            return ""
+            logger.exception("Handing off the finished download failed")
@@ -1,11 +1,17 @@
+import os
+import time
 import uuid
-from contextlib import contextmanager
+from contextlib import asynccontextmanager, contextmanager
 from enum import Enum
 from pathlib import Path
 from typing import Optional
 
-from sqlalchemy import create_engine
-from sqlmodel import Field, Session, SQLModel
+from sqlalchemy import Connection, Engine, Index, create_engine, event
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlmodel import Field, Relationship, Session, SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from src.metrics import db_query_seconds
 
 Path("./data").mkdir(parents=True, exist_ok=True)
 
@@ -29,6 +35,20 @@ class DownloadStatus(str, Enum):
     FAILED = "failed"
 
 
+class FileKind(str, Enum):
+    VIDEO = "video"
+    THUMBNAIL = "thumbnail"
+    VTT = "vtt"
+    SPRITE = "sprite"
+
+
+class PostProcessStatus(str, Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
 def generateUUID() -> str:
     return str(uuid.uuid4()).replace("-", "_")
 
@@ -52,28 +72,289 @@ class VideoDB(SQLModel, table=True):
     thumbnailPathId: str = Field()
     vttPathId: str = Field()
     vttSpritePathId: str = Field()
+    extractor: str = Field(default="")
+    createdAt: float = Field(default_factory=time.time)
+    # Progress of an unfinished download, kept so a pause or restart picks
+    # up the .part file with the same formats
+    downloadedBytes: int = Field(default=0)
+    formatId: str = Field(default="")
+
+    # Keyset pagination walks (createdAt, id) newest first, optionally within
+    # one status or extractor, so each list page is an index range scan.
+    __table_args__ = (
+        Index("ix_videodb_created_id", "createdAt", "id"),
+        Index("ix_videodb_status_created_id", "downloadStatus", "createdAt", "id"),
+        Index("ix_videodb_extractor_created_id", "extractor", "createdAt", "id"),
+    )
+
+    # Every file the video owns, sprite sheets past the first one included.
+    # The database cascades deletes, so the ORM never loads them to delete.
+    files: list["FileDB"] = Relationship(back_populates="video", passive_deletes="all")
 
 
 class FileDB(SQLModel, table=True):
     id: str = Field(default_factory=generateUUID, primary_key=True)
+    # The unique constraint doubles as the index for path lookups
     filePath: str = Field(unique=True)
+    videoId: Optional[str] = Field(
+        default=None, foreign_key="videodb.id", ondelete="CASCADE", index=True
+    )
+    kind: str = Field(default="")
+    # sha256 of the contents, filled in lazily by the dedupe scan
+    contentHash: Optional[str] = Field(default=None, index=True)
+
+    video: Optional[VideoDB] = Relationship(back_populates="files")
+
+
+class PostProcessJobDB(SQLModel, table=True):
+    id: str = Field(default_factory=generateUUID, primary_key=True)
+    videoId: str = Field(index=True)
+    filePath: str = Field()
+    status: str = Field(default=PostProcessStatus.PENDING, index=True)
+    attempts: int = Field(default=0)
+    error: str = Field(default="")
+    createdAt: float = Field(default_factory=time.time)
+
+
+class VideoPhaseDB(SQLModel, table=True):
+    """One step of a download: extraction, a format's download, a yt-dlp
+    postprocessor, the sprite and so on."""
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    videoId: str = Field(foreign_key="videodb.id", ondelete="CASCADE", index=True)
+    name: str = Field()
+    detail: str = Field(default="")
+    startedAt: float = Field()
+    seconds: float = Field()
+    bytes: Optional[int] = Field(default=None)
+
+
+class MetadataCacheDB(SQLModel, table=True):
+    # "{extractor_key}:{id}", the same pair yt-dlp's download archive uses
+    key: str = Field(primary_key=True)
+    extractor: str = Field(default="")
+    videoId: str = Field(default="")
+    url: str = Field(index=True)
+    # Sanitized info dict, the same JSON yt-dlp writes to .info.json
+    info: str = Field()
+    fetchedAt: float = Field(default_factory=time.time)
+    expiresAt: float = Field(index=True)
+
+
+# SQLite tuning applied to every new pool connection. WAL lets readers run
+# alongside the single writer, and busy_timeout makes writers from executor
+# threads wait for the lock instead of failing with "database is locked".
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000")),
+    "foreign_keys": "ON",
+    "temp_store": "MEMORY",
+    "cache_size": -16000,
+}
+
+
+def _install_pragmas(engine: Engine, pragmas: dict):
+    @event.listens_for(engine, "connect")
+    def _apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+QUERY_OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE"}
+
+
+def _install_query_timing(engine: Engine):
+    """Feeds every statement's execution time, from both the sync and the
+    async sessions, into the db_query_seconds histogram."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _started(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _finished(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        operation = statement.lstrip().split(None, 1)[0].upper()
+        db_query_seconds.observe(
+            elapsed, operation=operation if operation in QUERY_OPERATIONS else "OTHER"
+        )
+
+
+def _pool_args() -> dict:
+    return {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "5")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+    }
 
 
-# Sync SQLAlchemy database engine
+def make_engine(url: str, pragmas: dict | None = SQLITE_PRAGMAS, **kwargs) -> Engine:
+    engine = create_engine(
+        url, connect_args={"check_same_thread": False}, **_pool_args(), **kwargs
+    )
+    if pragmas:
+        _install_pragmas(engine, pragmas)
+    _install_query_timing(engine)
+    return engine
+
+
+def make_async_engine(
+    url: str, pragmas: dict | None = SQLITE_PRAGMAS, **kwargs
+) -> AsyncEngine:
+    async_engine = create_async_engine(url, **_pool_args(), **kwargs)
+    if pragmas:
+        _install_pragmas(async_engine.sync_engine, pragmas)
+    _install_query_timing(async_engine.sync_engine)
+    return async_engine
+
+
+# Sync SQLAlchemy database engine, used for schema setup and scripts
 DATABASE_URL = "sqlite:///./data/data.sqlite"
-engine = create_engine(
+engine = make_engine(
     DATABASE_URL,
     # echo=True
 )
 
+# Async engine used by request handlers and anything else on the event loop
+ASYNC_DATABASE_URL = "sqlite+aiosqlite:///./data/data.sqlite"
+async_engine = make_async_engine(ASYNC_DATABASE_URL)
+
+# Objects stay readable after commit, so callers don't pay a SELECT per
+# attribute access once the transaction is done.
+SessionFactory = sessionmaker(engine, class_=Session, expire_on_commit=False)
+AsyncSessionFactory = async_sessionmaker(
+    async_engine, class_=AsyncSession, expire_on_commit=False
+)
+
+
+# Columns added after the first release, with the DDL used to add them to
+# databases created before they existed.
+ADDED_COLUMNS = {
+    "videodb": {
+        "extractor": "VARCHAR NOT NULL DEFAULT ''",
+        "createdAt": "FLOAT NOT NULL DEFAULT 0",
+        "downloadedBytes": "INTEGER NOT NULL DEFAULT 0",
+        "formatId": "VARCHAR NOT NULL DEFAULT ''",
+    },
+    "filedb": {
+        "videoId": "VARCHAR REFERENCES videodb (id) ON DELETE CASCADE",
+        "kind": "VARCHAR NOT NULL DEFAULT ''",
+        "contentHash": "VARCHAR",
+    },
+}
+
+# VideoDB columns that point at one file each, and the kind of that file
+FILE_KIND_COLUMNS = {
+    FileKind.VIDEO: "videoPathId",
+    FileKind.THUMBNAIL: "thumbnailPathId",
+    FileKind.VTT: "vttPathId",
+    FileKind.SPRITE: "vttSpritePathId",
+}
+
+
+def _add_columns(conn: Connection, table: str) -> list[str]:
+    existing = {row[1] for row in conn.exec_driver_sql(f"PRAGMA table_info({table})")}
+    added = []
+    for name, ddl in ADDED_COLUMNS[table].items():
+        if name not in existing:
+            conn.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN {name} {ddl}")
+            added.append(name)
+    return added
+
+
+def _create_indexes(conn: Connection, model: type[SQLModel]):
+    # create_all skips tables that already exist, indexes included
+    for index in model.__table__.indexes:  # type: ignore
+        index.create(conn, checkfirst=True)
+
+
+def _migrate_videodb(conn: Connection):
+    _add_columns(conn, "videodb")
+
+    # Rows from before createdAt existed keep their insertion order and sort
+    # as older than anything added since.
+    conn.exec_driver_sql("UPDATE videodb SET createdAt = rowid WHERE createdAt = 0")
+    _create_indexes(conn, VideoDB)
+
+
+def _migrate_filedb(conn: Connection):
+    if {"videoId", "kind"} & set(_add_columns(conn, "filedb")):
+        _backfill_file_owners(conn)
+    _create_indexes(conn, FileDB)
+
+
+def _backfill_file_owners(conn: Connection):
+    """Links files from before FileDB.videoId existed to the video using them."""
+    for kind, id_column in FILE_KIND_COLUMNS.items():
+        conn.exec_driver_sql(
+            f"""
+            UPDATE filedb SET kind = ?,
+                videoId = (SELECT id FROM videodb WHERE {id_column} = filedb.id)
+            WHERE videoId IS NULL AND id IN (SELECT {id_column} FROM videodb)
+            """,
+            (kind.value,),
+        )
+
+    # Only the first sprite sheet was referenced, the rest share its name
+    # with a different _NNN.jpg suffix.
+    first_sheets = conn.exec_driver_sql(
+        "SELECT videoId, filePath FROM filedb WHERE kind = ?", (FileKind.SPRITE.value,)
+    ).all()
+    suffix_length = len("_000.jpg")
+    for video_id, file_path in first_sheets:
+        prefix = file_path[:-suffix_length]
+        conn.exec_driver_sql(
+            """
+            UPDATE filedb SET videoId = ?, kind = ?
+            WHERE videoId IS NULL AND length(filePath) = ?
+                AND substr(filePath, 1, ?) = ?
+            """,
+            (video_id, FileKind.SPRITE.value, len(file_path), len(prefix), prefix),
+        )
+
 
 # Init the database
 def init_db():
     SQLModel.metadata.create_all(engine)
+    with engine.begin() as conn:
+        _migrate_videodb(conn)
+        _migrate_filedb(conn)
 
 
 # Sync session context manager
 @contextmanager
 def get_session():
-    with Session(engine) as session:
+    with SessionFactory() as session:
         yield session
+
+
+# Async session context manager
+@asynccontextmanager
+async def get_async_session():
+    async with AsyncSessionFactory() as session:
+        yield session
+
+
+async def register_video_files(
+    video_id: str, files: list[tuple[str, FileKind]]
+) -> list[str]:
+    """Resolves ``(path, kind)`` pairs to FileDB ids owned by the video, in one
+    session and one commit."""
+    file_paths = [file_path for file_path, _ in files]
+    async with get_async_session() as session:
+        stmt = select(FileDB).where(FileDB.filePath.in_(file_paths))  # type: ignore
+        result = await session.exec(stmt)
+        existing = {file.filePath: file for file in result.all()}
+
+        for file_path, kind in files:
+            file = existing.get(file_path)
+            if file is None:
+                file = existing[file_path] = FileDB(filePath=file_path)
+            file.videoId = video_id
+            file.kind = kind
+            session.add(file)
+
+        await session.commit()
+        return [str(existing[file_path].id) for file_path in file_paths]
@@ -0,0 +1,176 @@
+"""Finds byte-identical media files and folds them into hardlinks.
+
+Files are grouped by size first, which the directory listing gives for
+free; only files sharing their size with another one are hashed, once per
+inode, so copies that are already linked together aren't read twice.
+Hashes of files FileDB knows are kept in ``FileDB.contentHash`` and reused
+by later scans.
+"""
+
+import hashlib
+import os
+from collections import defaultdict
+from pathlib import Path
+
+from sqlalchemy import text
+from sqlmodel import select
+from src.db import FileDB, get_async_session
+from src.executors import media_executor
+from src.logger import get_logger
+from src.paths import VIDEO_DIR
+
+logger = get_logger("backend.dedupe")
+
+HASH_ALGORITHM = "sha256"
+# Files yt-dlp is still writing
+PARTIAL_SUFFIXES = (".part", ".ytdl", ".temp")
+
+
+def hash_file(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, HASH_ALGORITHM).hexdigest()
+
+
+def _files_by_size(directory: str) -> tuple[dict, int]:
+    # size -> (st_dev, st_ino) -> paths sharing that inode
+    by_size: dict[int, dict[tuple[int, int], list[str]]] = defaultdict(
+        lambda: defaultdict(list)
+    )
+    scanned = 0
+    for root, _, names in os.walk(directory):
+        for name in names:
+            if name.endswith(PARTIAL_SUFFIXES):
+                continue
+            path = Path(root, name)
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            scanned += 1
+            if stat.st_size:
+                by_size[stat.st_size][(stat.st_dev, stat.st_ino)].append(
+                    path.as_posix()
+                )
+    return by_size, scanned
+
+
+def find_duplicates(directory: str, known: dict[str, str]) -> dict:
+    """Blocking, run it in the media executor. ``known`` maps paths to hashes
+    from earlier scans; the hashes computed here come back under
+    ``hashes``."""
+    by_size, scanned = _files_by_size(directory)
+    groups = []
+    hashes: dict[str, str] = {}
+    hashed = 0
+    for size, inodes in by_size.items():
+        if len(inodes) < 2:
+            continue
+
+        copies: dict[str, list[list[str]]] = defaultdict(list)
+        for paths in inodes.values():
+            digest = next((known[path] for path in paths if path in known), None)
+            if digest is None:
+                digest = hash_file(paths[0])
+                hashed += 1
+            hashes.update((path, digest) for path in paths if known.get(path) != digest)
+            copies[digest].append(paths)
+
+        for digest, linked in copies.items():
+            if len(linked) > 1:
+                # The most linked inode comes first and is the one kept
+                linked.sort(key=len, reverse=True)
+                groups.append(
+                    {
+                        "contentHash": digest,
+                        "size": size,
+                        "copies": len(linked),
+                        "reclaimableBytes": size * (len(linked) - 1),
+                        "paths": [path for paths in linked for path in paths],
+                    }
+                )
+
+    groups.sort(key=lambda group: group["reclaimableBytes"], reverse=True)
+    return {
+        "scannedFiles": scanned,
+        "hashedFiles": hashed,
+        "reclaimableBytes": sum(group["reclaimableBytes"] for group in groups),
+        "groups": groups,
+        "hashes": hashes,
+    }
+
+
+def _link_group(group: dict) -> tuple[int, int]:
+    """Replaces every copy with a hardlink to the first path. Each file is
+    hashed again first, the scan's hashes may be from an earlier run."""
+    keep = group["paths"][0]
+    keep_stat = os.stat(keep)
+    if hash_file(keep) != group["contentHash"]:
+        return 0, 0
+
+    linked = reclaimed = 0
+    for path in group["paths"][1:]:
+        stat = os.stat(path)
+        if stat.st_dev != keep_stat.st_dev or stat.st_ino == keep_stat.st_ino:
+            continue
+        if hash_file(path) != group["contentHash"]:
+            continue
+        temp = f"{path}.dedupe"
+        os.link(keep, temp)
+        try:
+            os.replace(temp, path)
+        except OSError:
+            os.unlink(temp)
+            raise
+        linked += 1
+        if stat.st_nlink == 1:
+            reclaimed += stat.st_size
+    return linked, reclaimed
+
+
+def link_duplicates(directory: str, known: dict[str, str]) -> dict:
+    """Blocking, run it in the media executor. Scans like
+    ``find_duplicates`` and hardlinks every duplicate it finds."""
+    report = find_duplicates(directory, known)
+    linked_files = reclaimed_bytes = 0
+    for group in report["groups"]:
+        try:
+            linked, reclaimed = _link_group(group)
+        except OSError:
+            logger.exception("Failed to link copies of %s", group["paths"][0])
+            continue
+        linked_files += linked
+        reclaimed_bytes += reclaimed
+    return {**report, "linkedFiles": linked_files, "reclaimedBytes": reclaimed_bytes}
+
+
+async def _known_hashes() -> dict[str, str]:
+    stmt = select(FileDB.filePath, FileDB.contentHash).where(
+        FileDB.contentHash.is_not(None)  # type: ignore
+    )
+    async with get_async_session() as session:
+        return dict((await session.exec(stmt)).all())  # type: ignore
+
+
+async def _store_hashes(hashes: dict[str, str]):
+    if not hashes:
+        return
+    async with get_async_session() as session:
+        await session.execute(
+            text("UPDATE filedb SET contentHash = :digest WHERE filePath = :path"),
+            [{"path": path, "digest": digest} for path, digest in hashes.items()],
+        )
+        await session.commit()
+
+
+async def dedupe_videos(link: bool = False) -> dict:
+    """Reports identical files under the video directory, hardlinking them
+    when ``link`` is set."""
+    scan = link_duplicates if link else find_duplicates
+    result = await media_executor.run(scan, VIDEO_DIR.as_posix(), await _known_hashes())
+    await _store_hashes(result.pop("hashes"))
+    logger.info(
+        "Dedupe scan of %s files: %s bytes reclaimable",
+        result["scannedFiles"],
+        result["reclaimableBytes"],
+    )
+    return result
@@ -0,0 +1,116 @@
+import asyncio
+import functools
+import multiprocessing
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable
+
+from src.logger import get_logger
+
+logger = get_logger("backend.executors")
+
+
+class BoundedExecutor:
+    """Lazily created, fixed size pool that keeps queue depth and utilization counters.
+
+    Counters are only touched from the event loop, so they need no locking.
+    """
+
+    def __init__(self, name: str, factory: Callable[..., Executor], max_workers: int):
+        self.name = name
+        self.max_workers = max(1, max_workers)
+        self._factory = factory
+        self._executor: Executor | None = None
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.total_seconds = 0.0
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            self._executor = self._factory(max_workers=self.max_workers)
+            logger.info(
+                "Started %s executor with %s worker(s)", self.name, self.max_workers
+            )
+        return self._executor
+
+    @property
+    def in_flight(self) -> int:
+        return self.submitted - self.completed - self.failed
+
+    async def run(self, fn: Callable, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        self.submitted += 1
+        started = time.perf_counter()
+        try:
+            result = await loop.run_in_executor(
+                self.executor, functools.partial(fn, *args, **kwargs)
+            )
+        except BaseException:
+            self.failed += 1
+            raise
+        finally:
+            self.total_seconds += time.perf_counter() - started
+        self.completed += 1
+        return result
+
+    def stats(self) -> dict:
+        in_flight = self.in_flight
+        running = min(in_flight, self.max_workers)
+        finished = self.completed + self.failed
+        return {
+            "maxWorkers": self.max_workers,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "running": running,
+            "queueDepth": max(0, in_flight - self.max_workers),
+            "utilization": running / self.max_workers,
+            "avgSeconds": self.total_seconds / finished if finished else 0.0,
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# yt-dlp downloads block on network and disk, so they get threads sized to the
+# download scheduler. Metadata probes and playlist expansion get threads of
+# their own, a running download holds its thread for the whole transfer.
+# Sprite assembly is CPU bound and gets its own processes.
+download_executor = BoundedExecutor(
+    "download",
+    ThreadPoolExecutor,
+    int(os.getenv("DOWNLOAD_WORKERS", os.getenv("DOWNLOAD_MAX_CONCURRENT", "3"))),
+)
+metadata_executor = BoundedExecutor(
+    "metadata", ThreadPoolExecutor, int(os.getenv("METADATA_WORKERS", "4"))
+)
+# Forking a process that already runs SQLite, yt-dlp and watchdog threads
+# can copy a held logging or console lock into the child, so the workers come
+# from a fork server, or are spawned where there is none.
+MEDIA_START_METHOD = (
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+media_executor = BoundedExecutor(
+    "media",
+    functools.partial(
+        ProcessPoolExecutor,
+        mp_context=multiprocessing.get_context(MEDIA_START_METHOD),
+    ),
+    int(os.getenv("MEDIA_WORKERS", max(1, (os.cpu_count() or 2) // 2))),
+)
+
+EXECUTORS = [download_executor, metadata_executor, media_executor]
+
+
+def executor_stats() -> dict:
+    return {executor.name: executor.stats() for executor in EXECUTORS}
+
+
+def shutdown_executors():
+    for executor in EXECUTORS:
+        executor.shutdown()
@@ -0,0 +1,193 @@
+"""Turns a batch of URLs into queued video rows.
+
+Single video URLs are recognised by their extractor and need no network
+call at all: the extractor's URL pattern already yields the video id.
+Anything else (playlists, channels, unknown sites) is expanded with one
+flat ``extract_info`` per URL, which lists the entries without resolving
+each video.
+"""
+
+from sqlmodel import or_, select
+from src.db import VideoDB, generateUUID, get_async_session
+from src.logger import get_logger
+from src.schemas import BatchEntry, Video, VideoBatchRequest
+from yt_dlp import YoutubeDL
+from yt_dlp.extractor import gen_extractor_classes
+from yt_dlp.utils import DownloadError
+
+logger = get_logger("backend.ingest")
+
+FLAT_OPTS = {
+    "extract_flat": "in_playlist",
+    "skip_download": True,
+    "cachedir": False,
+    "quiet": True,
+    "no_warnings": True,
+    # One broken entry shouldn't drop the rest of a playlist
+    "ignoreerrors": True,
+}
+
+# SQLite caps bound parameters per statement
+IN_CHUNK = 500
+
+_extractors: list | None = None
+
+
+def match_extractor(url: str):
+    """Blocking, the first call loads every extractor class and compiling
+    their URL patterns takes about half a second. Callers on the event loop
+    go through a thread."""
+    global _extractors
+    if _extractors is None:
+        _extractors = list(gen_extractor_classes())
+    return next((ie for ie in _extractors if ie.suitable(url)), None)
+
+
+def warm_extractors():
+    """Blocking, run at startup so the first request doesn't pay for
+    loading the extractors. A URL no site claims reaches the generic
+    extractor at the end of the list, compiling every pattern on the way."""
+    match_extractor("https://example.invalid/")
+
+
+def single_video_entry(url: str) -> BatchEntry | None:
+    ie = match_extractor(url)
+    if ie is None or getattr(ie, "_RETURN_TYPE", None) != "video":
+        return None
+    video_id = ie.get_temp_id(url)
+    if not video_id:
+        return None
+    return BatchEntry(url=url, videoId=video_id, extractor=ie.ie_key())
+
+
+def flatten(info: dict) -> list[BatchEntry]:
+    if info.get("_type") in ("playlist", "multi_video"):
+        entries = []
+        for entry in info.get("entries") or []:
+            if entry:
+                entries.extend(flatten(entry))
+        return entries
+
+    url = info.get("webpage_url") or info.get("url")
+    if not url or not info.get("id"):
+        return []
+    return [
+        BatchEntry(
+            url=url,
+            videoId=str(info["id"]),
+            fullTitle=info.get("title") or "",
+            extractor=info.get("extractor_key") or info.get("ie_key") or "",
+        )
+    ]
+
+
+def expand_urls(urls: list[str]) -> tuple[list[BatchEntry], list[dict]]:
+    """Blocking, run it in the metadata executor."""
+    entries: list[BatchEntry] = []
+    errors: list[dict] = []
+    pending = []
+    for url in urls:
+        entry = single_video_entry(url)
+        if entry:
+            entries.append(entry)
+        else:
+            pending.append(url)
+
+    if pending:
+        with YoutubeDL(FLAT_OPTS) as ydl:  # type: ignore
+            for url in pending:
+                try:
+                    info = ydl.extract_info(url, download=False)
+                except DownloadError as e:
+                    errors.append({"url": url, "error": str(e)})
+                    continue
+                if not info:
+                    errors.append({"url": url, "error": "Nothing found at this URL"})
+                    continue
+                entries.extend(flatten(info))  # type: ignore
+
+    logger.info(
+        "Expanded %s URL(s) into %s entries, %s via extract_info",
+        len(urls),
+        len(entries),
+        len(pending),
+    )
+    return entries, errors
+
+
+def identify(video: Video) -> Video:
+    """Fills in videoId and extractor from the URL when that needs no
+    network call, so the row can be checked for duplicates before it's
+    queued. Blocking, see match_extractor."""
+    if not video.videoId or not video.extractor:
+        entry = single_video_entry(video.url)
+        if entry:
+            video.videoId = video.videoId or entry.videoId
+            video.extractor = video.extractor or entry.extractor
+    return video
+
+
+def duplicate_statement(video: Video):
+    """Rows holding the same video in the same format. Rows from before the
+    extractor column was filled match any extractor."""
+    stmt = select(VideoDB).where(
+        VideoDB.videoId == video.videoId, VideoDB.format == video.format
+    )
+    if video.extractor:
+        stmt = stmt.where(
+            or_(VideoDB.extractor == video.extractor, VideoDB.extractor == "")
+        )
+    return stmt
+
+
+def _seen(keys: set[tuple[str, str]], extractor: str, video_id: str) -> bool:
+    if (extractor, video_id) in keys or ("", video_id) in keys:
+        return True
+    return not extractor and any(key[1] == video_id for key in keys)
+
+
+async def insert_batch(
+    entries: list[BatchEntry], request: VideoBatchRequest
+) -> tuple[list[Video], list[dict]]:
+    """Inserts every entry not already in the library, or earlier in the
+    batch, as the same (extractor, videoId) in the requested format, all in
+    one transaction."""
+    video_ids = list({entry.videoId for entry in entries})
+    async with get_async_session() as session:
+        existing: set[tuple[str, str]] = set()
+        for start in range(0, len(video_ids), IN_CHUNK):
+            chunk = video_ids[start : start + IN_CHUNK]
+            stmt = select(VideoDB.extractor, VideoDB.videoId).where(
+                VideoDB.videoId.in_(chunk),  # type: ignore
+                VideoDB.format == request.format,
+            )
+            existing.update(tuple(row) for row in (await session.exec(stmt)).all())
+
+        seen: set[tuple[str, str]] = set()
+        added: list[Video] = []
+        skipped: list[dict] = []
+        for entry in entries:
+            reason = None
+            if _seen(existing, entry.extractor, entry.videoId):
+                reason = "exists"
+            elif _seen(seen, entry.extractor, entry.videoId):
+                reason = "duplicate"
+            if reason:
+                skipped.append(
+                    {"url": entry.url, "videoId": entry.videoId, "reason": reason}
+                )
+                continue
+            seen.add((entry.extractor, entry.videoId))
+            added.append(
+                Video(
+                    id=generateUUID(),
+                    format=request.format,
+                    type=request.type,
+                    **entry.model_dump(),
+                )
+            )
+
+        session.add_all(VideoDB(**video.model_dump()) for video in added)
+        await session.commit()
+
+    return added, skipped
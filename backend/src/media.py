@@ -0,0 +1,158 @@
+"""Streaming of large media files for the player.
+
+``MediaFileResponse`` is aiohttp's FileResponse (Range, ETag, 304) with the
+body path pinned down: the kernel's sendfile when the transport supports
+it, otherwise reads of ``MEDIA_CHUNK_SIZE`` in the default executor. Every
+stream holds a ``MediaStreams`` slot for its whole body and reports bytes,
+time and the path used when it ends.
+
+Pinning the path overrides FileResponse's private ``_sendfile`` and uses
+``_sendfile_fallback`` and ``request._loop``, so pyproject.toml caps aiohttp
+below the next minor release and tests/test_media.py serves real files
+through both paths. Check both again before raising the cap.
+"""
+
+import asyncio
+import os
+import time
+from collections import deque
+from typing import IO, Any
+
+from aiohttp import web
+from aiohttp.web_fileresponse import NOSENDFILE
+from src.logger import get_logger
+from src.schemas import MediaStreamStats
+
+logger = get_logger("backend.media")
+
+MEDIA_CHUNK_SIZE = int(os.getenv("MEDIA_CHUNK_SIZE", str(1024 * 1024)))
+# MEDIA_SENDFILE=0 forces the chunked path, e.g. on filesystems where
+# sendfile misbehaves
+MEDIA_SENDFILE = os.getenv("MEDIA_SENDFILE", "1") != "0" and not NOSENDFILE
+
+
+class MediaStreams:
+    """Caps concurrent media bodies and keeps per-stream throughput."""
+
+    def __init__(self, max_streams: int, queue_timeout: float, history: int = 50):
+        self.max_streams = max_streams
+        self.queue_timeout = queue_timeout
+        self._slots = asyncio.Semaphore(max_streams)
+        self._next_id = 0
+        self.active: dict[int, MediaStreamStats] = {}
+        self.recent: deque[MediaStreamStats] = deque(maxlen=history)
+        self.rejected = 0
+        self.total_bytes = 0
+        self.by_mode: dict[str, int] = {}
+
+    async def acquire(self, file_id: str) -> MediaStreamStats:
+        """Waits up to ``queue_timeout`` for a free slot, raising TimeoutError."""
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+        except TimeoutError:
+            self.rejected += 1
+            raise
+
+        self._next_id += 1
+        stream = MediaStreamStats(
+            id=self._next_id, fileId=file_id, startedAt=time.time()
+        )
+        stream._started = time.perf_counter()
+        self.active[stream.id] = stream
+        return stream
+
+    def release(self, stream: MediaStreamStats):
+        if self.active.pop(stream.id, None) is None:
+            return
+        self._slots.release()
+
+        stream.seconds = time.perf_counter() - stream._started
+        if stream.seconds > 0:
+            stream.mbps = stream.bytes / stream.seconds / 1_000_000
+        self.recent.append(stream)
+        self.total_bytes += stream.bytes
+        self.by_mode[stream.mode] = self.by_mode.get(stream.mode, 0) + 1
+        logger.debug(
+            "Stream %s of %s: %s bytes in %.3fs via %s",
+            stream.id,
+            stream.fileId,
+            stream.bytes,
+            stream.seconds,
+            stream.mode,
+        )
+
+    def stats(self) -> dict:
+        return {
+            "maxStreams": self.max_streams,
+            "activeStreams": len(self.active),
+            "rejected": self.rejected,
+            "totalBytes": self.total_bytes,
+            "streamsByMode": self.by_mode,
+            "active": [s.model_dump() for s in self.active.values()],
+            "recent": [s.model_dump() for s in self.recent],
+        }
+
+
+media_streams = MediaStreams(
+    int(os.getenv("MEDIA_MAX_STREAMS", "8")),
+    float(os.getenv("MEDIA_QUEUE_TIMEOUT", "10")),
+)
+
+
+def _advise_sequential(fobj: IO[Any], offset: int, count: int):
+    # Lets the kernel read ahead more aggressively on the chunked path
+    if hasattr(os, "posix_fadvise"):
+        try:
+            os.posix_fadvise(fobj.fileno(), offset, count, os.POSIX_FADV_SEQUENTIAL)
+        except OSError:
+            pass
+
+
+class MediaFileResponse(web.FileResponse):
+    """Sends one media body while holding the stream slot it was given,
+    releasing it once the body is written or the client goes away."""
+
+    def __init__(
+        self,
+        path,
+        stream: MediaStreamStats,
+        streams: MediaStreams = media_streams,
+        chunk_size: int = MEDIA_CHUNK_SIZE,
+        headers=None,
+    ):
+        super().__init__(path, chunk_size=chunk_size, headers=headers)
+        self.stream = stream
+        self.streams = streams
+
+    async def prepare(self, request):
+        try:
+            return await super().prepare(request)
+        finally:
+            self.streams.release(self.stream)
+
+    async def _sendfile(self, request, fobj: IO[Any], offset: int, count: int):
+        self.stream.offset = offset
+        writer = await web.StreamResponse.prepare(self, request)
+        assert writer is not None
+
+        if MEDIA_SENDFILE and not self.compression:
+            transport = request.transport
+            if transport is None:
+                raise ConnectionResetError("Connection lost")
+            try:
+                # No silent fallback, so the mode reported is the one used
+                await request._loop.sendfile(
+                    transport, fobj, offset, count, fallback=False
+                )
+                self.stream.mode = "sendfile"
+                self.stream.bytes = count
+                await web.StreamResponse.write_eof(self)
+                return writer
+            except (asyncio.SendfileNotAvailableError, NotImplementedError):
+                pass
+
+        self.stream.mode = "chunked"
+        _advise_sequential(fobj, offset, count)
+        await self._sendfile_fallback(writer, fobj, offset, count)
+        self.stream.bytes = count
+        return writer
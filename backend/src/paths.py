@@ -0,0 +1,10 @@
+import os
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+DOWNLOAD_DIR = Path(os.getenv("DOWNLOAD_DIR", BASE_DIR / "downloads"))
+VIDEO_DIR = DOWNLOAD_DIR / "videos"
+THUMB_DIR = DOWNLOAD_DIR / "thumbnails"
+SPRITE_DIR = DOWNLOAD_DIR / "sprite"
+VTT_DIR = DOWNLOAD_DIR / "vtt"
+TEMP_THUMB_DIR = DOWNLOAD_DIR / "temp" / "thumbs"
@@ -0,0 +1,63 @@
+"""Sampling profiler for the live backend.
+
+A thread reads every other thread's stack through ``sys._current_frames`` at
+a fixed interval and counts identical stacks. The result uses the folded
+format flamegraph.pl, inferno and speedscope read: one
+``thread;caller;callee count`` line per distinct stack. Sprite work runs in
+the media process pool and is not seen here.
+"""
+
+import sys
+import sysconfig
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+from src.paths import BASE_DIR
+
+SAMPLE_INTERVAL = 0.005
+MAX_SECONDS = 60
+STDLIB_DIR = Path(sysconfig.get_paths()["stdlib"])
+
+
+def frame_label(frame) -> str:
+    code = frame.f_code
+    path = Path(code.co_filename)
+    if "site-packages" in path.parts:
+        path = Path(*path.parts[path.parts.index("site-packages") + 1 :])
+    elif path.is_relative_to(BASE_DIR):
+        path = path.relative_to(BASE_DIR)
+    elif path.is_relative_to(STDLIB_DIR):
+        path = path.relative_to(STDLIB_DIR)
+    # ";" separates frames in the folded format
+    label = f"{code.co_qualname} ({path.as_posix()}:{code.co_firstlineno})"
+    return label.replace(";", ",")
+
+
+def sample_stacks(
+    seconds: float, interval: float = SAMPLE_INTERVAL, thread: str = ""
+) -> Counter[str]:
+    """Samples for ``seconds``, only threads whose name starts with
+    ``thread`` if given."""
+    own = threading.get_ident()
+    stacks: Counter[str] = Counter()
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            name = names.get(ident, str(ident))
+            if ident == own or not name.startswith(thread):
+                continue
+            labels = []
+            while frame is not None:
+                labels.append(frame_label(frame))
+                frame = frame.f_back
+            labels.append(name)
+            stacks[";".join(reversed(labels))] += 1
+        time.sleep(interval)
+    return stacks
+
+
+def folded(stacks: Counter[str]) -> str:
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
@@ -1,8 +1,10 @@
+import time
 from enum import Enum
 from pathlib import Path
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr, field_validator
 from src.db import QualityFormat
+from yt_dlp.utils import parse_bytes
 
 
 class DownloadStatus(str, Enum):
@@ -32,16 +34,36 @@ class Video(BaseModel):
     thumbnailPathId: str = ""
     vttPathId: str = ""
     vttSpritePathId: str = ""
+    extractor: str = ""
+    downloadedBytes: int = 0
+    formatId: str = ""
 
 
 class VideoProgress(BaseModel):
     id: str
     videoId: str
-    eta: str
-    percent: str
-    speed: str
-    downloadedSize: str
-    totalSize: str
+    status: str = "downloading"
+    percent: float = 0.0
+    downloadedBytes: int = 0
+    totalBytes: float | None = None
+    speed: float | None = Field(default=None, description="Bytes per second")
+    eta: float | None = Field(default=None, description="Seconds remaining")
+    fragmentIndex: int | None = None
+    fragmentCount: int | None = None
+    rateLimit: float | None = Field(
+        default=None, description="Bytes per second this download may use"
+    )
+    ts: float = Field(
+        default_factory=time.time, description="When the hook reported it, Unix time"
+    )
+
+
+class VideoProgressBatch(BaseModel):
+    progress: list[VideoProgress]
+    totalSpeed: float = Field(
+        default=0.0, description="Bytes per second across all active downloads"
+    )
+    ts: float = Field(default_factory=time.time, description="Flush time, Unix time")
 
 
 class Notify(BaseModel):
@@ -64,13 +86,207 @@ class Startup(BaseModel):
     typee: str = TriStatus.ONGOING
 
 
+class ThumbnailMode(str, Enum):
+    DECODE = "decode"
+    KEYFRAME = "keyframe"
+
+
 class ThumbnailVTTConfig(BaseModel):
     temp_dir: Path = Field(default=Path("./downloads/temp/thumbs"))
     vtt_output_dir: Path = Field(default=Path("./downloads/vtt"))
     sprite_output_dir: Path = Field(default=Path("./downloads/sprite"))
     interval: int = Field(default=10, gt=0, description="Seconds between thumbnails")
     columns: int = Field(default=10, gt=0, description="Number of thumbnails per row")
+    sheet_rows: int = Field(
+        default=10, gt=0, description="Rows per sprite sheet before a new one starts"
+    )
+    mode: ThumbnailMode = Field(
+        default=ThumbnailMode.DECODE,
+        description="decode scans every frame; keyframe seeks keyframes and scales in ffmpeg",
+    )
+    thumb_width: int = Field(
+        default=160, gt=0, description="Tile width, height keeps the aspect ratio"
+    )
 
     @property
     def fps(self) -> float:
         return 1 / self.interval
+
+
+class DownloadSchedulerConfig(BaseModel):
+    max_concurrent: int = Field(
+        default=3, gt=0, description="Downloads allowed to run at the same time"
+    )
+    per_host_limit: int = Field(
+        default=2, gt=0, description="Default cap on running downloads per host"
+    )
+    host_limits: dict[str, int] = Field(
+        default_factory=dict,
+        description="Per-host overrides, e.g. {'youtube.com': 1}, each covering its subdomains",
+    )
+
+    def limit_for(self, host: str) -> int:
+        return self.host_limits.get(host, self.per_host_limit)
+
+
+def parse_rate(value):
+    """Bytes per second from a number or a size like ``"2M"``; empty means no
+    limit."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, str):
+        rate = parse_bytes(value.strip())
+        if rate is None:
+            raise ValueError(f"Not a rate: {value!r}")
+        return rate
+    return value
+
+
+def minute_of_day(value: str) -> int:
+    hours, minutes = value.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+class BandwidthWindow(BaseModel):
+    start: str = Field(pattern=r"^([01]\d|2[0-3]):[0-5]\d$", description="HH:MM")
+    end: str = Field(pattern=r"^([01]\d|2[0-3]):[0-5]\d$", description="HH:MM")
+    limit: int | None = Field(default=None, gt=0, description="Bytes per second")
+
+    _parse_limit = field_validator("limit", mode="before")(parse_rate)
+
+    def contains(self, minute: int) -> bool:
+        start, end = minute_of_day(self.start), minute_of_day(self.end)
+        if start <= end:
+            return start <= minute < end
+        # Wraps past midnight, e.g. 22:00-06:00
+        return minute >= start or minute < end
+
+
+class BandwidthConfig(BaseModel):
+    globalLimit: int | None = Field(
+        default=None, gt=0, description="Bytes per second shared by all downloads"
+    )
+    schedule: list[BandwidthWindow] = Field(
+        default_factory=list,
+        description="Time-of-day windows replacing globalLimit, first match wins",
+    )
+
+    _parse_limit = field_validator("globalLimit", mode="before")(parse_rate)
+
+    def limit_at(self, minute: int) -> int | None:
+        for window in self.schedule:
+            if window.contains(minute):
+                return window.limit
+        return self.globalLimit
+
+
+class BandwidthOverride(BaseModel):
+    limit: int | None = Field(
+        default=None, gt=0, description="Bytes per second, null removes the cap"
+    )
+
+    _parse_limit = field_validator("limit", mode="before")(parse_rate)
+
+
+class SpriteResult(BaseModel):
+    sheets: list[Path]
+    count: int
+    thumb_w: int
+    thumb_h: int
+    columns: int
+    rows: int
+
+
+class PostProcessProgress(BaseModel):
+    id: str
+    jobId: str
+    status: str
+    stage: str = ""
+    error: str = ""
+
+
+def split_csv(value):
+    """Lets list query params be passed as ``a,b,c``."""
+    if isinstance(value, str):
+        return [item.strip() for item in value.split(",") if item.strip()]
+    return value
+
+
+class VideoListQuery(BaseModel):
+    limit: int = Field(default=50, ge=1, le=500)
+    cursor: str | None = Field(
+        default=None, description="nextCursor from the previous page"
+    )
+    downloadStatus: str | None = None
+    watched: bool | None = None
+    audioOnly: bool | None = None
+    extractor: str | None = None
+    q: str | None = Field(default=None, description="Substring of fullTitle")
+    fields: list[str] | None = Field(
+        default=None, description="Columns to return, e.g. id,fullTitle"
+    )
+    withFiles: bool = Field(
+        default=False, description="Include each video's FileDB records"
+    )
+
+    @field_validator("fields", mode="before")
+    @classmethod
+    def split_fields(cls, value):
+        return split_csv(value)
+
+
+class SearchQuery(BaseModel):
+    q: str = Field(min_length=1)
+    limit: int = Field(default=20, ge=1, le=100)
+    offset: int = Field(default=0, ge=0)
+    fields: list[str] | None = None
+
+    @field_validator("fields", mode="before")
+    @classmethod
+    def split_fields(cls, value):
+        return split_csv(value)
+
+
+class FileLookup(BaseModel):
+    fileId: str
+    filePath: Path
+    kind: str = ""
+    videoId: str | None = None
+    downloaded: bool = True
+
+
+class MediaStreamStats(BaseModel):
+    id: int
+    fileId: str
+    startedAt: float
+    mode: str = "none"
+    offset: int = 0
+    bytes: int = 0
+    seconds: float = 0.0
+    mbps: float = 0.0
+    _started: float = PrivateAttr(default=0.0)
+
+
+class StallReport(BaseModel):
+    startedAt: float
+    seconds: float
+    ongoing: bool = True
+    task: str = ""
+    coroutine: str = ""
+    blame: str = Field(default="", description="Innermost project frame")
+    stack: list[str] = Field(default_factory=list)
+    _beat: float = PrivateAttr(default=0.0)
+
+
+class BatchEntry(BaseModel):
+    url: str
+    videoId: str
+    fullTitle: str = ""
+    extractor: str = ""
+
+
+class VideoBatchRequest(BaseModel):
+    urls: list[str] = Field(min_length=1, max_length=1000)
+    format: str = QualityFormat.BEST
+    type: str = "download"
+    priority: int = 0
@@ -0,0 +1,166 @@
+"""Full-text search over the video library with SQLite FTS5.
+
+``video_fts`` shares rowids with ``videodb``. Triggers copy fullTitle and url
+on every insert, title/url change and delete, so the index never needs a
+separate sync step. uploader and description are not videodb columns; they
+come from the info json yt-dlp writes next to each video and are filled in
+once the download finishes.
+"""
+
+import json
+from pathlib import Path
+
+from sqlalchemy import Connection, Select, column, table, text
+from sqlmodel import select
+from src.db import FileDB, VideoDB, engine, get_async_session
+from src.logger import get_logger
+from src.video_query import projected_columns
+
+logger = get_logger("backend.search")
+
+video_fts = table(
+    "video_fts",
+    column("videoId"),
+    column("fullTitle"),
+    column("url"),
+    column("uploader"),
+    column("description"),
+    column("rank"),
+)
+
+# Weights per column for bm25, in table order: videoId, fullTitle, url,
+# uploader, description. A title hit outranks the same words in a description.
+BM25_WEIGHTS = (0.0, 10.0, 1.0, 5.0, 1.0)
+BM25_RANK = f"bm25({', '.join(str(w) for w in BM25_WEIGHTS)})"
+
+SEARCH_SCHEMA = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS video_fts USING fts5(
+        videoId UNINDEXED, fullTitle, url, uploader, description,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    # Stored as the table's default so ORDER BY rank uses these weights
+    f"INSERT INTO video_fts (video_fts, rank) VALUES ('rank', '{BM25_RANK}')",
+    """
+    CREATE TRIGGER IF NOT EXISTS videodb_fts_insert AFTER INSERT ON videodb BEGIN
+        INSERT INTO video_fts (rowid, videoId, fullTitle, url, uploader, description)
+        VALUES (new.rowid, new.id, new.fullTitle, new.url, '', '');
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS videodb_fts_update AFTER UPDATE OF fullTitle, url ON videodb
+    WHEN old.fullTitle IS NOT new.fullTitle OR old.url IS NOT new.url BEGIN
+        UPDATE video_fts SET fullTitle = new.fullTitle, url = new.url
+        WHERE rowid = new.rowid;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS videodb_fts_delete AFTER DELETE ON videodb BEGIN
+        DELETE FROM video_fts WHERE rowid = old.rowid;
+    END
+    """,
+]
+
+
+def info_json_path(video_path: Path) -> Path:
+    """yt-dlp names the info json after the video, e.g. clip.mp4 -> clip.info.json"""
+    return video_path.with_suffix(".info.json")
+
+
+def read_info_json(video_path: Path) -> dict:
+    try:
+        return json.loads(info_json_path(video_path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def _backfill(conn: Connection):
+    conn.exec_driver_sql("""
+        INSERT INTO video_fts (rowid, videoId, fullTitle, url, uploader, description)
+        SELECT rowid, id, fullTitle, url, '', '' FROM videodb
+        """)
+
+    rows = conn.execute(
+        select(VideoDB.id, FileDB.filePath).join(  # type: ignore
+            FileDB, FileDB.id == VideoDB.videoPathId  # type: ignore
+        )
+    ).all()
+    for video_id, file_path in rows:
+        info = read_info_json(Path(file_path))
+        if info:
+            conn.execute(_metadata_update(), _metadata_params(video_id, info))
+    logger.info("Search index built for %s video(s)", len(rows))
+
+
+def create_search_index(conn: Connection):
+    """Creates the FTS table and triggers, indexing the existing library the
+    first time the table is created."""
+    exists = conn.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'video_fts'"
+    ).first()
+    for statement in SEARCH_SCHEMA:
+        conn.exec_driver_sql(statement)
+    if not exists:
+        _backfill(conn)
+
+
+def init_search_index():
+    with engine.begin() as conn:
+        create_search_index(conn)
+
+
+def _metadata_update():
+    return text("""
+        UPDATE video_fts SET uploader = :uploader, description = :description
+        WHERE rowid = (SELECT rowid FROM videodb WHERE id = :id)
+        """)
+
+
+def _metadata_params(video_id: str, info: dict) -> dict:
+    return {
+        "id": video_id,
+        "uploader": info.get("uploader") or info.get("channel") or "",
+        "description": info.get("description") or "",
+    }
+
+
+async def index_video_metadata(video_id: str, info: dict):
+    """Adds the uploader and description from a yt-dlp info dict to the index."""
+    async with get_async_session() as session:
+        await session.execute(_metadata_update(), _metadata_params(video_id, info))
+        await session.commit()
+
+
+def match_expression(q: str) -> str:
+    """Turns free text into an FTS5 query that can't raise a syntax error.
+
+    Every word is quoted so operators and punctuation are matched literally,
+    and the last word matches as a prefix so results show up while typing.
+    """
+    terms = ['"' + word.replace('"', '""') + '"' for word in q.split()]
+    if not terms:
+        raise ValueError("Search query is empty")
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+def search_statement(
+    q: str, limit: int, offset: int = 0, fields: list[str] | None = None
+) -> Select:
+    # Rank and cut the page inside the FTS table first, so only the returned
+    # hits are joined against videodb
+    match = text("video_fts MATCH :match").bindparams(match=match_expression(q))
+    hits = (
+        select(video_fts.c.videoId, video_fts.c.rank)
+        .where(match)
+        .order_by(video_fts.c.rank)
+        .offset(offset)
+        .limit(limit + 1)
+        .subquery("hits")
+    )
+    return (
+        select(*projected_columns(fields), hits.c.rank)
+        .join_from(hits, VideoDB, VideoDB.id == hits.c.videoId)  # type: ignore
+        .order_by(hits.c.rank)
+    )
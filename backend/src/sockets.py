@@ -1,5 +1,47 @@
 import socketio
 
-sio = socketio.AsyncServer(async_mode='aiohttp', cors_allowed_origins="*")
+sio = socketio.AsyncServer(async_mode="aiohttp", cors_allowed_origins="*")
 
 client_set = set()
+
+# Every client joins CLIENTS_ROOM. Progress goes to ALL_PROGRESS_ROOM unless the
+# client subscribed to specific videos, in which case it only sits in their
+# per-video rooms.
+CLIENTS_ROOM = "clients"
+ALL_PROGRESS_ROOM = "progress:all"
+
+video_subscribers: dict[str, set[str]] = {}
+
+
+def video_room(video_id: str) -> str:
+    return f"video:{video_id}"
+
+
+async def join_default_rooms(sid: str):
+    await sio.enter_room(sid, CLIENTS_ROOM)
+    await sio.enter_room(sid, ALL_PROGRESS_ROOM)
+
+
+async def subscribe_video(sid: str, video_id: str):
+    video_subscribers.setdefault(video_id, set()).add(sid)
+    await sio.enter_room(sid, video_room(video_id))
+    await sio.leave_room(sid, ALL_PROGRESS_ROOM)
+
+
+async def unsubscribe_video(sid: str, video_id: str):
+    subscribers = video_subscribers.get(video_id)
+    if subscribers is not None:
+        subscribers.discard(sid)
+        if not subscribers:
+            del video_subscribers[video_id]
+    await sio.leave_room(sid, video_room(video_id))
+
+    if not any(sid in sids for sids in video_subscribers.values()):
+        await sio.enter_room(sid, ALL_PROGRESS_ROOM)
+
+
+def forget_client(sid: str):
+    for video_id in [v for v, sids in video_subscribers.items() if sid in sids]:
+        video_subscribers[video_id].discard(sid)
+        if not video_subscribers[video_id]:
+            del video_subscribers[video_id]
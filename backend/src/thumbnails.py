@@ -0,0 +1,273 @@
+"""Sprite and VTT building blocks.
+
+Everything here is a plain module level function so it can be shipped to the
+media process pool without dragging the event loop or DB session along.
+"""
+
+import math
+import platform
+import shutil
+from pathlib import Path
+
+import ffmpeg
+from PIL import Image
+from src.logger import get_logger
+from src.schemas import SpriteResult, ThumbnailMode, ThumbnailVTTConfig
+
+logger = get_logger("backend.thumbnails")
+
+
+def _binary(name: str) -> str:
+    binary_name = f"{name}.exe" if platform.system() == "Windows" else name
+    local = Path("req") / binary_name
+    return str(local) if local.exists() else name
+
+
+def ffmpeg_cmd() -> str:
+    return _binary("ffmpeg")
+
+
+def ffprobe_cmd() -> str:
+    return _binary("ffprobe")
+
+
+def sheet_path(sprite_prefix: Path, index: int) -> Path:
+    return sprite_prefix.with_name(f"{sprite_prefix.name}_{index:03}.jpg")
+
+
+def sprite_sheet_paths(first_sheet: Path) -> list[Path]:
+    """Returns every sheet belonging to the sprite that starts with ``first_sheet``."""
+    prefix = first_sheet.stem.rsplit("_", 1)[0]
+    return sorted(first_sheet.parent.glob(f"{prefix}_[0-9][0-9][0-9].jpg"))
+
+
+class SpriteSheetWriter:
+    """Fills fixed size sheets tile by tile and saves each one as soon as it is full,
+    so only one sheet is ever held in memory regardless of video length.
+    """
+
+    def __init__(
+        self, sprite_prefix: Path, tile_w: int, tile_h: int, columns: int, rows: int
+    ):
+        self.sprite_prefix = sprite_prefix
+        self.tile_w = tile_w
+        self.tile_h = tile_h
+        self.columns = columns
+        self.rows = rows
+        self.count = 0
+        self.sheets: list[Path] = []
+        self._sheet: Image.Image | None = None
+
+    @property
+    def per_sheet(self) -> int:
+        return self.columns * self.rows
+
+    def add(self, tile: Image.Image):
+        if self._sheet is None:
+            self._sheet = Image.new(
+                "RGB", (self.columns * self.tile_w, self.rows * self.tile_h)
+            )
+
+        if tile.size != (self.tile_w, self.tile_h):
+            tile = tile.resize((self.tile_w, self.tile_h))
+
+        slot = self.count % self.per_sheet
+        x = (slot % self.columns) * self.tile_w
+        y = (slot // self.columns) * self.tile_h
+        self._sheet.paste(tile, (x, y))
+        self.count += 1
+
+        if self.count % self.per_sheet == 0:
+            self._flush(self.rows)
+
+    def close(self) -> SpriteResult | None:
+        remainder = self.count % self.per_sheet
+        if self._sheet is not None and remainder:
+            self._flush(math.ceil(remainder / self.columns))
+        if not self.count:
+            return None
+
+        return SpriteResult(
+            sheets=self.sheets,
+            count=self.count,
+            thumb_w=self.tile_w,
+            thumb_h=self.tile_h,
+            columns=self.columns,
+            rows=self.rows,
+        )
+
+    def _flush(self, used_rows: int):
+        sheet = self._sheet
+        if used_rows < self.rows:
+            sheet = sheet.crop(
+                (0, 0, self.columns * self.tile_w, used_rows * self.tile_h)
+            )
+
+        path = sheet_path(self.sprite_prefix, len(self.sheets))
+        sheet.save(path)
+        self.sheets.append(path)
+        self._sheet = None
+        logger.debug("Sprite sheet saved: %s", path)
+
+
+def build_sprite(
+    video_path: Path, sprite_prefix: Path, config: ThumbnailVTTConfig
+) -> SpriteResult | None:
+    if config.mode == ThumbnailMode.KEYFRAME:
+        sprite = build_sprite_keyframe(video_path, sprite_prefix, config)
+    else:
+        sprite = build_sprite_decode(video_path, sprite_prefix, config)
+
+    if sprite:
+        logger.info(
+            "Sprite saved: %s tile(s) over %s sheet(s) for %s",
+            sprite.count,
+            len(sprite.sheets),
+            video_path.name,
+        )
+    return sprite
+
+
+def build_sprite_decode(
+    video_path: Path, sprite_prefix: Path, config: ThumbnailVTTConfig
+) -> SpriteResult | None:
+    """Decodes every frame and writes one tile sized JPEG per interval to a temp dir."""
+    thumbs_dir = config.temp_dir / video_path.stem
+    thumbs_dir.mkdir(parents=True, exist_ok=True)
+    try:
+        try:
+            (
+                ffmpeg.input(str(video_path))
+                .output(
+                    str(thumbs_dir / "thumb%06d.jpg"),
+                    vf=f"fps=1/{config.interval},scale={config.thumb_width}:-2",
+                    loglevel="error",
+                )
+                .run(cmd=ffmpeg_cmd())
+            )
+        except ffmpeg.Error as e:
+            logger.exception("FFmpeg thumbnail generation failed")
+            return None
+
+        thumbs = sorted(thumbs_dir.glob("thumb*.jpg"))
+        if not thumbs:
+            logger.warning("No thumbnails found.")
+            return None
+
+        with Image.open(thumbs[0]) as first_thumb:
+            thumb_w, thumb_h = first_thumb.size
+
+        writer = SpriteSheetWriter(
+            sprite_prefix, thumb_w, thumb_h, config.columns, config.sheet_rows
+        )
+        for thumb_path in thumbs:
+            with Image.open(thumb_path) as img:
+                writer.add(img)
+        return writer.close()
+    finally:
+        try:
+            shutil.rmtree(thumbs_dir)
+            logger.info("Cleaned up: %s", thumbs_dir)
+        except Exception as e:
+            logger.exception("Failed to cleanup %s", thumbs_dir)
+
+
+def probe_video(video_path: Path) -> tuple[int, int, float]:
+    info = ffmpeg.probe(str(video_path), cmd=ffprobe_cmd(), select_streams="v:0")
+    stream = info["streams"][0]
+    duration = float(stream.get("duration") or info["format"].get("duration") or 0)
+    return int(stream["width"]), int(stream["height"]), duration
+
+
+def tile_size(width: int, height: int, thumb_width: int) -> tuple[int, int]:
+    """Scales to thumb_width keeping aspect, rounded to even sizes for the scaler."""
+    tile_w = max(2, thumb_width - thumb_width % 2)
+    tile_h = max(2, round(tile_w * height / width / 2) * 2)
+    return tile_w, tile_h
+
+
+def build_sprite_keyframe(
+    video_path: Path, sprite_prefix: Path, config: ThumbnailVTTConfig
+) -> SpriteResult | None:
+    """Decodes keyframes only, scales them inside ffmpeg and pastes raw RGB frames
+    from the pipe straight into the sprite, so nothing is written to a temp dir.
+
+    The fps filter repeats the last keyframe to fill the gaps, so there is
+    still one tile per interval and the VTT cue boundaries match decode mode.
+    Each tile is the nearest preceding keyframe, though: where keyframes are
+    further apart than ``interval``, a tile can show a frame several seconds
+    before its cue starts.
+    """
+    try:
+        width, height, _ = probe_video(video_path)
+    except (ffmpeg.Error, KeyError, IndexError, ValueError) as e:
+        logger.exception("FFprobe failed for %s", video_path)
+        return None
+
+    tile_w, tile_h = tile_size(width, height, config.thumb_width)
+    frame_bytes = tile_w * tile_h * 3
+    writer = SpriteSheetWriter(
+        sprite_prefix, tile_w, tile_h, config.columns, config.sheet_rows
+    )
+
+    process = (
+        ffmpeg.input(str(video_path), skip_frame="nokey")
+        .output(
+            "pipe:",
+            format="rawvideo",
+            pix_fmt="rgb24",
+            vf=f"fps=1/{config.interval},scale={tile_w}:{tile_h}",
+            an=None,
+            loglevel="error",
+        )
+        .run_async(cmd=ffmpeg_cmd(), pipe_stdout=True)
+    )
+
+    try:
+        while True:
+            frame = process.stdout.read(frame_bytes)
+            if len(frame) < frame_bytes:
+                break
+            writer.add(Image.frombytes("RGB", (tile_w, tile_h), frame))
+    finally:
+        process.stdout.close()
+        returncode = process.wait()
+
+    sprite = writer.close()
+    if returncode != 0 or sprite is None:
+        logger.warning("FFmpeg keyframe extraction failed for %s", video_path)
+        return None
+    return sprite
+
+
+def format_timestamp(total_seconds: int) -> str:
+    hrs = total_seconds // 3600
+    mins = (total_seconds % 3600) // 60
+    secs = total_seconds % 60
+    return f"{hrs:02}:{mins:02}:{secs:02}.000"
+
+
+def write_vtt(
+    vtt_path: Path,
+    sheet_urls: list[str],
+    sprite: SpriteResult,
+    config: ThumbnailVTTConfig,
+) -> Path:
+    interval = config.interval
+    per_sheet = sprite.columns * sprite.rows
+    vtt_lines = ["WEBVTT\n"]
+
+    for idx in range(sprite.count):
+        sheet, slot = divmod(idx, per_sheet)
+        x = (slot % sprite.columns) * sprite.thumb_w
+        y = (slot // sprite.columns) * sprite.thumb_h
+        start_time = format_timestamp(idx * interval)
+        end_time = format_timestamp((idx + 1) * interval)
+        vtt_lines.append(f"{start_time} --> {end_time}")
+        vtt_lines.append(
+            f"{sheet_urls[sheet]}#xywh={x},{y},{sprite.thumb_w},{sprite.thumb_h}\n"
+        )
+
+    vtt_path.write_text("\n".join(vtt_lines), encoding="utf-8")
+    logger.info("VTT saved: %s", vtt_path)
+    return vtt_path
@@ -0,0 +1,112 @@
+"""Keyset paginated listing of the video table.
+
+Pages are ordered newest first on ``(createdAt, id)``. The cursor is the sort
+key of the last row returned, so fetching page N costs the same as page 1
+instead of scanning and discarding N * limit rows like OFFSET would.
+"""
+
+import base64
+import json
+
+from sqlalchemy import Select, tuple_
+from sqlmodel import select
+from src.db import FileDB, VideoDB
+from src.schemas import VideoListQuery
+
+VIDEO_COLUMNS = VideoDB.__table__.c  # type: ignore
+
+# Always selected so every item can be identified and the next cursor built
+KEY_FIELDS = ("id", "createdAt")
+
+
+def encode_cursor(created_at: float, video_id: str) -> str:
+    raw = json.dumps([created_at, video_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[float, str]:
+    try:
+        created_at, video_id = json.loads(base64.urlsafe_b64decode(cursor))
+        return float(created_at), str(video_id)
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def projected_columns(fields: list[str] | None) -> list:
+    if not fields:
+        return list(VIDEO_COLUMNS)
+
+    unknown = sorted(set(fields) - set(VIDEO_COLUMNS.keys()))
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+
+    names = list(KEY_FIELDS) + [name for name in fields if name not in KEY_FIELDS]
+    return [VIDEO_COLUMNS[name] for name in names]
+
+
+def video_list_statement(query: VideoListQuery) -> Select:
+    stmt = select(*projected_columns(query.fields))
+
+    if query.downloadStatus is not None:
+        stmt = stmt.where(VideoDB.downloadStatus == query.downloadStatus)
+    if query.watched is not None:
+        stmt = stmt.where(VideoDB.watched == query.watched)
+    if query.audioOnly is not None:
+        stmt = stmt.where(VideoDB.audioOnly == query.audioOnly)
+    if query.extractor is not None:
+        stmt = stmt.where(VideoDB.extractor == query.extractor)
+    if query.q:
+        stmt = stmt.where(VideoDB.fullTitle.contains(query.q, autoescape=True))  # type: ignore
+
+    if query.cursor:
+        created_at, video_id = decode_cursor(query.cursor)
+        stmt = stmt.where(
+            tuple_(VideoDB.createdAt, VideoDB.id) < tuple_(created_at, video_id)
+        )
+
+    # One extra row tells whether another page exists without a COUNT query
+    stmt = stmt.order_by(VideoDB.createdAt.desc(), VideoDB.id.desc()).limit(  # type: ignore
+        query.limit + 1
+    )
+    return with_files(stmt) if query.withFiles else stmt
+
+
+def with_files(stmt: Select) -> Select:
+    """Joins the files owned by each video of the page onto it, one row per
+    file, so a page with files is still a single query."""
+    page = stmt.subquery("page")
+    return (
+        select(
+            page,
+            FileDB.id.label("fileId"),  # type: ignore
+            FileDB.kind.label("fileKind"),  # type: ignore
+            FileDB.filePath,
+        )
+        .outerjoin(FileDB, FileDB.videoId == page.c.id)  # type: ignore
+        .order_by(page.c.createdAt.desc(), page.c.id.desc(), FileDB.filePath)
+    )
+
+
+def group_files(rows: list) -> list[dict]:
+    videos: dict[str, dict] = {}
+    for row in rows:
+        data = dict(row._mapping)
+        file = {
+            "id": data.pop("fileId"),
+            "kind": data.pop("fileKind"),
+            "filePath": data.pop("filePath"),
+        }
+        video = videos.setdefault(data["id"], {**data, "files": []})
+        if file["id"] is not None:
+            video["files"].append(file)
+    return list(videos.values())
+
+
+def page_from_rows(rows: list, limit: int, files: bool = False) -> dict:
+    videos = group_files(rows) if files else [dict(row._mapping) for row in rows]
+    items = videos[:limit]
+    next_cursor = None
+    if len(videos) > limit:
+        last = items[-1]
+        next_cursor = encode_cursor(last["createdAt"], last["id"])
+    return {"items": items, "nextCursor": next_cursor}
@@ -1,13 +1,32 @@
 import asyncio
+import json
 from http import HTTPStatus
 from pathlib import Path
 
 from aiohttp import web
+from pydantic import ValidationError
 from sqlmodel import select
-from src.db import FileDB, VideoDB, get_session
+from src.BandwidthManager import bandwidth_manager
+from src.db import FileDB, VideoDB, get_async_session
+from src.DownloadStarter import download_starter
+from src.executors import metadata_executor
+from src.FileLookupCache import file_lookup_cache
+from src.ingest import duplicate_statement, expand_urls, identify, insert_batch
 from src.logger import get_logger
-from src.schemas import Video
+from src.MetadataCache import metadata_cache, probe_info, summarize
+from src.PhaseTimeline import load_timeline
+from src.schemas import (
+    BandwidthOverride,
+    DownloadStatus,
+    SearchQuery,
+    Video,
+    VideoBatchRequest,
+    VideoListQuery,
+)
+from src.search import search_statement
+from src.video_query import page_from_rows, video_list_statement
 from src.Ytdlp import Ytdlp
+from yt_dlp.utils import DownloadError
 
 logger = get_logger("backend.video_route")
 video_router = web.RouteTableDef()
@@ -18,18 +37,96 @@ def model_to_dict(instance):
 
 
 @video_router.get("/api/videos")
-async def get_videos(request):
-    with get_session() as session:
-        result = session.exec(select(VideoDB))
-        videos = result.all()
-        return web.json_response([model_to_dict(video) for video in videos])
+async def get_videos(request: web.Request):
+    """Lists videos newest first, one page at a time.
+
+    Query params: limit, cursor (nextCursor of the previous page), the
+    downloadStatus/watched/audioOnly/extractor filters, q to match fullTitle
+    and fields to project, e.g. ``fields=fullTitle,thumbnailPathId``.
+    ``withFiles=true`` adds each video's file records, fetched in the same
+    query.
+    """
+    try:
+        query = VideoListQuery(**request.query)
+        stmt = video_list_statement(query)
+    except (ValidationError, ValueError) as e:
+        return web.json_response({"error": str(e)}, status=HTTPStatus.BAD_REQUEST)
+
+    async with get_async_session() as session:
+        rows = (await session.exec(stmt)).all()  # type: ignore
+        return web.json_response(
+            page_from_rows(list(rows), query.limit, query.withFiles)
+        )
+
+
+@video_router.get("/api/search")
+async def search_videos(request: web.Request):
+    """Ranked full-text search over title, url, uploader and description.
+
+    Query params: q, limit, offset and fields as in /api/videos. Items carry a
+    bm25 ``rank``, lower is better.
+    """
+    try:
+        query = SearchQuery(**request.query)
+        stmt = search_statement(query.q, query.limit, query.offset, query.fields)
+    except (ValidationError, ValueError) as e:
+        return web.json_response({"error": str(e)}, status=HTTPStatus.BAD_REQUEST)
+
+    async with get_async_session() as session:
+        rows = (await session.exec(stmt)).all()  # type: ignore
+
+    items = [dict(row._mapping) for row in rows[: query.limit]]
+    next_offset = query.offset + query.limit if len(rows) > query.limit else None
+    return web.json_response({"items": items, "nextOffset": next_offset})
+
+
+@video_router.get("/api/probe")
+async def probe(request: web.Request):
+    """Metadata for a URL without downloading it.
+
+    Answers from the metadata cache when it can, otherwise extracts in the
+    metadata executor and caches the result so a download of the same video
+    starts without extracting again. ``refresh=1`` skips the cache.
+    """
+    url = request.query.get("url", "").strip()
+    if not url:
+        return web.json_response(
+            {"error": "url is required"}, status=HTTPStatus.BAD_REQUEST
+        )
+
+    try:
+        entry = None
+        if request.query.get("refresh") not in ("1", "true"):
+            entry = await metadata_cache.get_entry(url)
+        cached = entry is not None
+        if entry is not None:
+            info = json.loads(entry.info)
+        else:
+            info = await metadata_executor.run(probe_info, url)
+            entry = await metadata_cache.store(url, info)
+    except DownloadError as e:
+        return web.json_response({"error": str(e)}, status=HTTPStatus.BAD_GATEWAY)
+    except Exception as e:
+        logger.exception("GET /api/probe failed")
+        return web.json_response({"error": str(e)}, status=500)
+
+    return web.json_response(
+        {
+            **summarize(info),
+            "cached": cached,
+            "fetchedAt": entry.fetchedAt if entry else None,
+            "expiresAt": entry.expiresAt if entry else None,
+        }
+    )
 
 
 @video_router.get("/api/video/{id}")
 async def get_video(req: web.Request):
-    with get_session() as session:
-        result = session.exec(
-            select(VideoDB).where(VideoDB.id == req.match_info.get("id"))
+    async with get_async_session() as session:
+        result = (
+            await session.exec(
+                select(VideoDB).where(VideoDB.id == req.match_info.get("id"))
+            )
         ).one_or_none()
         if not result:
             return web.json_response(
@@ -40,12 +137,24 @@ async def get_video(req: web.Request):
 
 @video_router.post("/api/video")
 async def post_handler(request: web.Request):
+    # Checked before the insert, a row that can't be queued would stay QUEUED
+    try:
+        priority = int(request.query.get("priority", 0))
+    except ValueError:
+        return web.json_response(
+            {"error": "priority must be an integer"}, status=HTTPStatus.BAD_REQUEST
+        )
+
     try:
         data = await request.json()
-        video_schema = Video(**data)
+        video_schema = await asyncio.to_thread(identify, Video(**data))
 
-        with get_session() as session:
-            existing = session.get(VideoDB, video_schema.id)
+        async with get_async_session() as session:
+            existing = await session.get(VideoDB, video_schema.id)
+            if not existing and video_schema.videoId:
+                existing = (
+                    await session.exec(duplicate_statement(video_schema))
+                ).first()
             if existing:
                 return web.json_response(
                     {
@@ -57,10 +166,9 @@ async def post_handler(request: web.Request):
 
             video_model = VideoDB(**video_schema.model_dump())
             session.add(video_model)
-            session.commit()
-            session.refresh(video_model)
+            await session.commit()
 
-            asyncio.create_task(Ytdlp(video_schema).download_video())
+            download_starter.enqueue(video_schema, priority=priority)
 
             return web.json_response(model_to_dict(video_model))
     except Exception as e:
@@ -68,6 +176,166 @@ async def post_handler(request: web.Request):
         return web.json_response({"error": str(e)}, status=500)
 
 
+@video_router.post("/api/videos/batch")
+async def post_batch(request: web.Request):
+    """Adds many URLs at once. Playlists and channels are expanded, videos
+    already in the library or repeated in the batch are skipped, and every
+    new row is inserted in one transaction before being queued."""
+    try:
+        batch = VideoBatchRequest(**await request.json())
+    except (ValidationError, ValueError) as e:
+        return web.json_response({"error": str(e)}, status=HTTPStatus.BAD_REQUEST)
+
+    try:
+        entries, errors = await metadata_executor.run(expand_urls, batch.urls)
+        added, skipped = await insert_batch(entries, batch)
+
+        for video in added:
+            download_starter.enqueue(video, priority=batch.priority)
+
+        return web.json_response(
+            {
+                "added": [video.model_dump() for video in added],
+                "skipped": skipped,
+                "errors": errors,
+            }
+        )
+    except Exception as e:
+        logger.exception("POST /api/videos/batch failed")
+        return web.json_response({"error": str(e)}, status=500)
+
+
+@video_router.get("/api/video/{id}/timeline")
+async def get_timeline(request: web.Request):
+    """The phases a download went through, oldest first, including the ones
+    still running."""
+    video_id = request.match_info["id"]
+    async with get_async_session() as session:
+        if not await session.get(VideoDB, video_id):
+            return web.json_response(
+                {"error": f"Video not found with id {video_id}"},
+                status=HTTPStatus.NOT_FOUND,
+            )
+
+    phases = await load_timeline(video_id)
+    instance = Ytdlp.get_instance(video_id)
+    if instance:
+        phases.extend(instance.timeline.live())
+    phases.sort(key=lambda phase: phase["startedAt"])
+
+    totals: dict[str, float] = {}
+    for phase in phases:
+        totals[phase["name"]] = totals.get(phase["name"], 0.0) + phase["seconds"]
+    span = (
+        max(phase["startedAt"] + phase["seconds"] for phase in phases)
+        - phases[0]["startedAt"]
+        if phases
+        else 0.0
+    )
+    return web.json_response(
+        {"id": video_id, "seconds": span, "totals": totals, "phases": phases}
+    )
+
+
+@video_router.post("/api/video/{id}/pause")
+async def pause_video(request: web.Request):
+    """Stops a queued or running download. A running one stops at its next
+    progress tick and keeps its partial files."""
+    video_id = request.match_info["id"]
+    async with get_async_session() as session:
+        video = await session.get(VideoDB, video_id)
+        if not video:
+            return web.json_response(
+                {"error": f"Video not found with id {video_id}"},
+                status=HTTPStatus.NOT_FOUND,
+            )
+        if video.downloadStatus not in (
+            DownloadStatus.QUEUED,
+            DownloadStatus.DOWNLOADING,
+        ):
+            return web.json_response(
+                {"error": f"Can't pause a {video.downloadStatus} download"},
+                status=HTTPStatus.BAD_REQUEST,
+            )
+
+        instance = Ytdlp.get_instance(video_id)
+        if instance:
+            instance.pause()
+        else:
+            download_starter.remove(video_id)
+
+        video.downloadStatus = DownloadStatus.PAUSED
+        session.add(video)
+        await session.commit()
+        return web.json_response(video.model_dump())
+
+
+@video_router.post("/api/video/{id}/resume")
+async def resume_video(request: web.Request):
+    """Queues a paused download again, ahead of downloads that haven't
+    started. It continues from its .part files with the formats recorded
+    when it first started."""
+    video_id = request.match_info["id"]
+    async with get_async_session() as session:
+        video = await session.get(VideoDB, video_id)
+        if not video:
+            return web.json_response(
+                {"error": f"Video not found with id {video_id}"},
+                status=HTTPStatus.NOT_FOUND,
+            )
+        if video.downloadStatus != DownloadStatus.PAUSED:
+            return web.json_response(
+                {"error": f"Can't resume a {video.downloadStatus} download"},
+                status=HTTPStatus.BAD_REQUEST,
+            )
+
+        instance = Ytdlp.get_instance(video_id)
+        if instance and instance.stopping:
+            return web.json_response(
+                {"error": "The download is still pausing, try again shortly"},
+                status=HTTPStatus.CONFLICT,
+            )
+        if instance:
+            # Paused but hasn't reached a progress tick yet, keep it running
+            instance.resume()
+            video.downloadStatus = DownloadStatus.DOWNLOADING
+        else:
+            video.downloadStatus = DownloadStatus.QUEUED
+        session.add(video)
+        await session.commit()
+
+        if not instance:
+            download_starter.enqueue(Video(**video.model_dump()), priority=1)
+        return web.json_response(video.model_dump())
+
+
+@video_router.put("/api/video/{id}/bandwidth")
+async def set_video_bandwidth(request: web.Request):
+    """Caps one download, e.g. ``{"limit": "500K"}``; ``null`` removes the
+    cap. Applies to a running download from its next block."""
+    video_id = request.match_info["id"]
+    try:
+        override = BandwidthOverride(**await request.json())
+    except (ValidationError, ValueError) as e:
+        return web.json_response({"error": str(e)}, status=HTTPStatus.BAD_REQUEST)
+
+    async with get_async_session() as session:
+        if not await session.get(VideoDB, video_id):
+            return web.json_response(
+                {"error": f"Video not found with id {video_id}"},
+                status=HTTPStatus.NOT_FOUND,
+            )
+
+    bandwidth_manager.set_override(video_id, override.limit)
+    return web.json_response(
+        {
+            "id": video_id,
+            "limit": override.limit,
+            "rate": bandwidth_manager.rate_for(video_id),
+        }
+    )
+
+
 @video_router.put("/api/video/{id}")
 async def update_video(req: web.Request):
     video_id = req.match_info.get("id")
@@ -89,9 +357,9 @@ async def update_video(req: web.Request):
             {"error": "No valid fields to update"}, status=HTTPStatus.BAD_REQUEST
         )
 
-    with get_session() as session:
+    async with get_async_session() as session:
         stmt = select(VideoDB).where(VideoDB.id == video_id)
-        result = session.exec(stmt)
+        result = await session.exec(stmt)
         video = result.one_or_none()
 
         if not video:
@@ -103,8 +371,8 @@ async def update_video(req: web.Request):
             setattr(video, key, value)
 
         session.add(video)
-        session.commit()
-        session.refresh(video)
+        await session.commit()
+        file_lookup_cache.invalidate_video(video_id)
 
         return web.json_response(video.dict())
 
@@ -116,30 +384,25 @@ async def delete_video(req: web.Request):
         if not video_id:
             return web.Response(status=HTTPStatus.BAD_REQUEST, text="Missing video ID")
 
-        with get_session() as session:
-            video = session.get(VideoDB, video_id)
+        async with get_async_session() as session:
+            video = await session.get(VideoDB, video_id)
             if not video:
                 return web.Response(status=HTTPStatus.NOT_FOUND, text="Video not found")
 
-            for path_id in [
-                video.videoPathId,
-                video.thumbnailPathId,
-                video.vttPathId,
-                video.vttSpritePathId,
-            ]:
+            stmt = select(FileDB).where(FileDB.videoId == video_id)
+            for file in (await session.exec(stmt)).all():
                 try:
-                    file = session.get(FileDB, path_id)
-                    if file and file.filePath:
-                        path = Path(file.filePath)
-                        if path.exists():
-                            path.unlink()
-                        session.delete(file)
+                    Path(file.filePath).unlink(missing_ok=True)
                 except Exception as e:
-                    logger.exception("Failed to delete file for ID '%s'", path_id)
+                    logger.exception("Failed to delete file '%s'", file.filePath)
 
-            session.delete(video)
-            session.commit()
+            # FileDB rows go with the video through ON DELETE CASCADE
+            await session.delete(video)
+            await session.commit()
 
+            download_starter.remove(video_id)
+            file_lookup_cache.invalidate_video(video_id)
+            bandwidth_manager.forget(video_id)
             instance = Ytdlp.get_instance(video_id)
             if instance:
                 instance.cancel()
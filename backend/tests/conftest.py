@@ -0,0 +1,82 @@
+"""Shared test setup: VideoDB rows with every column filled and an in-memory
+database that stands in for get_async_session.
+
+Kept importable as ``tests.conftest`` so the files also run under plain
+unittest.
+"""
+
+import sys
+import unittest
+from contextlib import asynccontextmanager
+from pathlib import Path
+from types import ModuleType
+from unittest.mock import patch
+
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import StaticPool
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.db import VideoDB, _install_pragmas
+
+
+def make_video(index: int, **overrides) -> VideoDB:
+    values = dict(
+        id=f"video_{index:03}",
+        url=f"https://example.com/{index}",
+        format="BEST",
+        type="download",
+        videoId=str(index),
+        fullTitle=f"Video {index}",
+        durationString="1:00",
+        size="",
+        resolution="",
+        downloadStatus="completed",
+        audioOnly=False,
+        watched=False,
+        downloaded=False,
+        prevWatchTime=0,
+        videoPathId="",
+        thumbnailPathId=f"thumb_{index}",
+        vttPathId="",
+        vttSpritePathId="",
+        extractor="Youtube",
+        createdAt=float(index // 2),
+    )
+    values.update(overrides)
+    return VideoDB(**values)
+
+
+class InMemoryDBTestCase(unittest.IsolatedAsyncioTestCase):
+    """Creates the schema in a fresh in-memory database for every test and
+    patches ``get_async_session`` in ``session_modules`` to open sessions on
+    it. ``pragmas`` are applied to every connection, as in production."""
+
+    session_modules: tuple[ModuleType, ...] = ()
+    pragmas: dict[str, str] = {}
+
+    async def asyncSetUp(self):
+        self.engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+        if self.pragmas:
+            _install_pragmas(self.engine.sync_engine, self.pragmas)
+        async with self.engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+
+        self.session_patches = [
+            patch.object(module, "get_async_session", self.session)
+            for module in self.session_modules
+        ]
+        for session_patch in self.session_patches:
+            session_patch.start()
+
+    async def asyncTearDown(self):
+        for session_patch in self.session_patches:
+            session_patch.stop()
+        await self.engine.dispose()
+
+    @asynccontextmanager
+    async def session(self):
+        async with AsyncSession(self.engine, expire_on_commit=False) as session:
+            yield session
@@ -0,0 +1,56 @@
+import os
+import sys
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.BandwidthManager import BandwidthManager, load_bandwidth_config
+from src.schemas import BandwidthConfig
+
+
+class BandwidthManagerTests(unittest.TestCase):
+    def test_limit_is_split_fairly_around_overrides(self):
+        manager = BandwidthManager(BandwidthConfig(globalLimit=9000))
+        for video_id in ("a", "b", "c"):
+            manager.register(video_id)
+        self.assertEqual(manager.rates(), {"a": 3000, "b": 3000, "c": 3000})
+
+        manager.set_override("a", 1000)
+        self.assertEqual(manager.rates(), {"a": 1000, "b": 4000, "c": 4000})
+
+        manager.unregister("c")
+        manager.set_config(BandwidthConfig())
+        self.assertEqual(manager.rates(), {"a": 1000, "b": None})
+
+    def test_reserve_returns_the_time_owed(self):
+        manager = BandwidthManager(BandwidthConfig(globalLimit=1000))
+        manager.register("a")
+
+        with patch("src.BandwidthManager.time.monotonic", return_value=0.0):
+            manager._buckets["a"].updated = 0.0
+            self.assertAlmostEqual(manager.reserve("a", 2000), 2.0)
+        with patch("src.BandwidthManager.time.monotonic", return_value=1.5):
+            self.assertAlmostEqual(manager.pending("a"), 0.5)
+            # A higher limit shortens what's left
+            manager.set_config(BandwidthConfig(globalLimit=5000))
+            self.assertAlmostEqual(manager.pending("a"), 0.1)
+
+        self.assertEqual(manager.reserve("unknown", 10**9), 0.0)
+
+    def test_schedule_from_environment(self):
+        env = {
+            "BANDWIDTH_LIMIT": "1M",
+            "BANDWIDTH_SCHEDULE": "22:00-06:00=,09:00-17:00=256K",
+        }
+        with patch.dict(os.environ, env):
+            config = load_bandwidth_config()
+
+        self.assertEqual(config.limit_at(23 * 60), None)
+        self.assertEqual(config.limit_at(12 * 60), 256 * 1024)
+        self.assertEqual(config.limit_at(18 * 60), 1024 * 1024)
+
+
+if __name__ == "__main__":
+    unittest.main()
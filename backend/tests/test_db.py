@@ -0,0 +1,87 @@
+import sys
+import unittest
+from pathlib import Path
+
+from sqlalchemy import create_engine
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, select
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src import db
+from src.db import FileDB, FileKind, VideoDB, _migrate_filedb
+from tests.conftest import InMemoryDBTestCase, make_video
+
+
+class RegisterVideoFilesTests(InMemoryDBTestCase):
+    session_modules = (db,)
+    pragmas = {"foreign_keys": "ON"}
+
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        async with self.session() as session:
+            session.add(make_video(1))
+            session.add(FileDB(id="old", filePath="/v/a.mp4"))
+            await session.commit()
+
+    async def test_files_are_owned_by_the_video_and_deleted_with_it(self):
+        ids = await db.register_video_files(
+            "video_001",
+            [("/v/a.mp4", FileKind.VIDEO), ("/t/a.jpg", FileKind.THUMBNAIL)],
+        )
+        self.assertEqual(ids[0], "old")
+
+        async with self.session() as session:
+            files = (await session.exec(select(FileDB).order_by(FileDB.kind))).all()
+            self.assertEqual(
+                [(f.videoId, f.kind) for f in files],
+                [("video_001", "thumbnail"), ("video_001", "video")],
+            )
+
+            await session.delete(await session.get(VideoDB, "video_001"))
+            await session.commit()
+            self.assertEqual((await session.exec(select(FileDB))).all(), [])
+
+
+class FileOwnerBackfillTests(unittest.TestCase):
+    def test_old_files_are_linked_to_their_video(self):
+        engine = create_engine("sqlite://", poolclass=StaticPool)
+        with engine.begin() as conn:
+            conn.exec_driver_sql(
+                "CREATE TABLE filedb (id VARCHAR PRIMARY KEY, filePath VARCHAR UNIQUE)"
+            )
+        VideoDB.__table__.create(engine)  # type: ignore
+
+        paths = {
+            "f_video": "/v/clip.mp4",
+            "f_sheet0": "/s/clip_sprite_000.jpg",
+            "f_sheet1": "/s/clip_sprite_001.jpg",
+            "f_other": "/s/other_sprite_001.jpg",
+        }
+        with engine.begin() as conn:
+            for file_id, file_path in paths.items():
+                conn.exec_driver_sql(
+                    "INSERT INTO filedb VALUES (?, ?)", (file_id, file_path)
+                )
+        with Session(engine) as session:
+            session.add(
+                make_video(1, videoPathId="f_video", vttSpritePathId="f_sheet0")
+            )
+            session.commit()
+
+        with engine.begin() as conn:
+            _migrate_filedb(conn)
+            owners = dict(
+                conn.exec_driver_sql(
+                    "SELECT id, kind FROM filedb WHERE videoId = 'video_001'"
+                ).all()
+            )
+
+        self.assertEqual(
+            owners, {"f_video": "video", "f_sheet0": "sprite", "f_sheet1": "sprite"}
+        )
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    unittest.main()
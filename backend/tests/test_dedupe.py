@@ -0,0 +1,60 @@
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.dedupe import find_duplicates, hash_file, link_duplicates
+
+
+class DedupeTests(unittest.TestCase):
+    def setUp(self):
+        self.temp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.temp.name)
+        for name, data in {
+            "a.mp4": b"same",
+            "b.mp4": b"same",
+            "c.mp4": b"diff",
+            "d.mp4": b"other length",
+            "e.mp4.part": b"same",
+        }.items():
+            (self.dir / name).write_bytes(data)
+        os.link(self.dir / "a.mp4", self.dir / "a_link.mp4")
+
+    def tearDown(self):
+        self.temp.cleanup()
+
+    def path(self, name: str) -> str:
+        return (self.dir / name).as_posix()
+
+    def test_report_groups_identical_files_by_inode(self):
+        known = {self.path("c.mp4"): hash_file(self.path("c.mp4"))}
+
+        report = find_duplicates(self.dir.as_posix(), known)
+
+        self.assertEqual(report["scannedFiles"], 5)
+        # One read per inode of the same size that isn't known yet
+        self.assertEqual(report["hashedFiles"], 2)
+        [group] = report["groups"]
+        self.assertEqual(group["copies"], 2)
+        self.assertEqual(group["reclaimableBytes"], 4)
+        self.assertEqual(
+            sorted(group["paths"]),
+            [self.path("a.mp4"), self.path("a_link.mp4"), self.path("b.mp4")],
+        )
+        self.assertNotIn(self.path("c.mp4"), report["hashes"])
+        self.assertNotIn(self.path("d.mp4"), report["hashes"])
+
+    def test_link_replaces_copies_with_hardlinks(self):
+        result = link_duplicates(self.dir.as_posix(), {})
+
+        self.assertEqual((result["linkedFiles"], result["reclaimedBytes"]), (1, 4))
+        self.assertTrue(os.path.samefile(self.path("a.mp4"), self.path("b.mp4")))
+        self.assertEqual((self.dir / "b.mp4").read_bytes(), b"same")
+        self.assertEqual(find_duplicates(self.dir.as_posix(), {})["groups"], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
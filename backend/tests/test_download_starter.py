@@ -0,0 +1,125 @@
+import asyncio
+import sys
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src import DownloadStarter as starter_module
+from src.schemas import DownloadSchedulerConfig, Video
+
+
+class FakeYtdlp:
+    started: list[str] = []
+    gates: dict[str, asyncio.Event] = {}
+
+    def __init__(self, video: Video):
+        self.video = video
+
+    async def download_video(self):
+        FakeYtdlp.started.append(self.video.id)
+        gate = FakeYtdlp.gates.setdefault(self.video.id, asyncio.Event())
+        await gate.wait()
+
+    @classmethod
+    def remove_instance(cls, video_id: str):
+        return None
+
+
+def make_video(video_id: str, url: str) -> Video:
+    return Video(id=video_id, videoId="", url=url)
+
+
+class DownloadStarterTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        FakeYtdlp.started = []
+        FakeYtdlp.gates = {}
+        self.patcher = patch.object(starter_module, "Ytdlp", FakeYtdlp)
+        self.patcher.start()
+
+    async def asyncTearDown(self):
+        for gate in FakeYtdlp.gates.values():
+            gate.set()
+        await asyncio.sleep(0)
+        self.patcher.stop()
+
+    async def finish(self, video_id: str):
+        FakeYtdlp.gates.setdefault(video_id, asyncio.Event()).set()
+        for _ in range(3):
+            await asyncio.sleep(0)
+
+    async def test_global_cap_and_priority_order(self):
+        scheduler = starter_module.DownloadStarter(
+            DownloadSchedulerConfig(max_concurrent=1, per_host_limit=5)
+        )
+        scheduler.enqueue(make_video("a", "https://a.com/1"))
+        scheduler.enqueue(make_video("b", "https://b.com/1"))
+        scheduler.enqueue(make_video("c", "https://c.com/1"), priority=5)
+        await asyncio.sleep(0)
+
+        self.assertEqual(FakeYtdlp.started, ["a"])
+        self.assertEqual(scheduler.queued_count, 2)
+
+        await self.finish("a")
+        self.assertEqual(FakeYtdlp.started, ["a", "c"])
+
+        await self.finish("c")
+        self.assertEqual(FakeYtdlp.started, ["a", "c", "b"])
+
+    async def test_per_host_cap_lets_other_hosts_through(self):
+        scheduler = starter_module.DownloadStarter(
+            DownloadSchedulerConfig(
+                max_concurrent=3, per_host_limit=2, host_limits={"youtube.com": 1}
+            )
+        )
+        scheduler.enqueue(make_video("y1", "https://www.youtube.com/watch?v=1"))
+        scheduler.enqueue(make_video("y2", "https://m.youtube.com/watch?v=2"))
+        scheduler.enqueue(make_video("v1", "https://vimeo.com/1"))
+        await asyncio.sleep(0)
+
+        self.assertEqual(FakeYtdlp.started, ["y1", "v1"])
+
+        await self.finish("y1")
+        self.assertEqual(FakeYtdlp.started, ["y1", "v1", "y2"])
+
+    async def test_removed_video_never_starts(self):
+        scheduler = starter_module.DownloadStarter(
+            DownloadSchedulerConfig(max_concurrent=1)
+        )
+        scheduler.enqueue(make_video("a", "https://a.com/1"))
+        scheduler.enqueue(make_video("b", "https://b.com/1"))
+
+        self.assertTrue(scheduler.remove("b"))
+        await self.finish("a")
+
+        self.assertEqual(FakeYtdlp.started, ["a"])
+        self.assertEqual(scheduler.active_count, 0)
+
+
+class HostKeyTests(unittest.TestCase):
+    def test_sites_under_a_shared_suffix_stay_apart(self):
+        self.assertEqual(
+            starter_module.host_key("https://www.bbc.co.uk/iplayer/1"), "bbc.co.uk"
+        )
+        self.assertEqual(
+            starter_module.host_key("https://news.sky.co.uk/video/1"), "news.sky.co.uk"
+        )
+        self.assertEqual(
+            starter_module.host_key("https://m.abc.net.au/1"), "abc.net.au"
+        )
+
+    def test_configured_domains_group_their_subdomains(self):
+        domains = {"youtube.com": 1, "music.youtube.com": 2}
+        self.assertEqual(
+            starter_module.host_key("https://m.youtube.com/watch?v=1", domains),
+            "youtube.com",
+        )
+        self.assertEqual(
+            starter_module.host_key("https://music.youtube.com/watch?v=1", domains),
+            "music.youtube.com",
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import asyncio
+import os
+import sys
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.executors import BoundedExecutor, media_executor
+
+
+class BoundedExecutorTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.executor = BoundedExecutor("test", ThreadPoolExecutor, 1)
+
+    async def asyncTearDown(self):
+        self.executor.shutdown()
+
+    async def test_stats_report_queue_depth_while_busy(self):
+        release = threading.Event()
+        jobs = [
+            asyncio.create_task(self.executor.run(release.wait, 5)) for _ in range(3)
+        ]
+        await asyncio.sleep(0.05)
+
+        stats = self.executor.stats()
+        self.assertEqual(stats["running"], 1)
+        self.assertEqual(stats["queueDepth"], 2)
+        self.assertEqual(stats["utilization"], 1.0)
+
+        release.set()
+        await asyncio.gather(*jobs)
+
+        stats = self.executor.stats()
+        self.assertEqual(stats["completed"], 3)
+        self.assertEqual(stats["queueDepth"], 0)
+
+    async def test_failures_are_counted(self):
+        def boom():
+            raise ValueError("boom")
+
+        with self.assertRaises(ValueError):
+            await self.executor.run(boom)
+
+        self.assertEqual(self.executor.stats()["failed"], 1)
+
+
+class MediaExecutorTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncTearDown(self):
+        media_executor.shutdown()
+
+    async def test_workers_are_not_forked_from_the_server(self):
+        self.assertNotEqual(await media_executor.run(os.getpid), os.getpid())
+        context = media_executor.executor._mp_context  # type: ignore
+        self.assertIn(context.get_start_method(), ("forkserver", "spawn"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.FileLookupCache import FileLookupCache
+from src.schemas import FileLookup
+
+
+def lookup(file_id: str, video_id: str | None = "video_1") -> FileLookup:
+    return FileLookup(
+        fileId=file_id,
+        filePath=Path(f"/files/{file_id}"),
+        kind="video",
+        videoId=video_id,
+        downloaded=False,
+    )
+
+
+class FileLookupCacheTests(unittest.TestCase):
+    def test_evicts_least_recently_used(self):
+        cache = FileLookupCache(max_entries=2)
+        cache.put(lookup("a"))
+        cache.put(lookup("b"))
+        cache.get("a")
+        cache.put(lookup("c"))
+
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.stats()["entries"], 2)
+
+    def test_marks_and_drops_entries_by_video(self):
+        cache = FileLookupCache(max_entries=10)
+        cache.put(lookup("a"))
+        cache.put(lookup("b", video_id="video_2"))
+
+        cache.mark_downloaded("video_1")
+        self.assertTrue(cache.get("a").downloaded)
+        self.assertFalse(cache.get("b").downloaded)
+
+        cache.invalidate_video("video_1")
+        self.assertIsNone(cache.get("a"))
+        self.assertIsNotNone(cache.get("b"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+import sys
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from sqlmodel import select
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src import ingest
+from src.db import VideoDB
+from src.schemas import BatchEntry, VideoBatchRequest
+from tests.conftest import InMemoryDBTestCase, make_video
+
+PLAYLIST = {
+    "_type": "playlist",
+    "id": "PL1",
+    "entries": [
+        {
+            "_type": "url",
+            "ie_key": "Youtube",
+            "id": "aaaaaaaaaaa",
+            "url": "https://www.youtube.com/watch?v=aaaaaaaaaaa",
+            "title": "First",
+        },
+        None,
+        {
+            "_type": "url",
+            "ie_key": "Youtube",
+            "id": "bbbbbbbbbbb",
+            "url": "https://www.youtube.com/watch?v=bbbbbbbbbbb",
+            "title": "Second",
+        },
+    ],
+}
+
+
+class ExpandUrlsTests(unittest.TestCase):
+    def test_single_videos_skip_extraction_and_playlists_are_flattened(self):
+        ydl = MagicMock()
+        ydl.__enter__.return_value.extract_info.return_value = PLAYLIST
+        with patch.object(ingest, "YoutubeDL", return_value=ydl) as youtube_dl:
+            entries, errors = ingest.expand_urls(
+                [
+                    "https://youtu.be/ccccccccccc",
+                    "https://www.youtube.com/playlist?list=PL1",
+                ]
+            )
+
+        youtube_dl.assert_called_once()
+        ydl.__enter__.return_value.extract_info.assert_called_once_with(
+            "https://www.youtube.com/playlist?list=PL1", download=False
+        )
+        self.assertEqual(
+            [(e.videoId, e.extractor, e.fullTitle) for e in entries],
+            [
+                ("ccccccccccc", "Youtube", ""),
+                ("aaaaaaaaaaa", "Youtube", "First"),
+                ("bbbbbbbbbbb", "Youtube", "Second"),
+            ],
+        )
+        self.assertEqual(errors, [])
+
+    def test_warm_extractors_loads_the_extractor_list(self):
+        with patch.object(ingest, "_extractors", None):
+            ingest.warm_extractors()
+            self.assertIsNotNone(ingest._extractors)
+
+
+class InsertBatchTests(InMemoryDBTestCase):
+    session_modules = (ingest,)
+
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        async with self.session() as session:
+            session.add(make_video(1, videoId="old"))
+            await session.commit()
+
+    async def test_skips_existing_and_repeated_videos(self):
+        entries = [
+            BatchEntry(url="https://x/old", videoId="old", extractor="Youtube"),
+            BatchEntry(url="https://x/new", videoId="new", fullTitle="New"),
+            BatchEntry(url="https://x/new?again", videoId="new"),
+            BatchEntry(url="https://y/old", videoId="old", extractor="Vimeo"),
+        ]
+        request = VideoBatchRequest(urls=["https://x"], format="BEST")
+
+        added, skipped = await ingest.insert_batch(entries, request)
+
+        self.assertEqual(
+            [(v.videoId, v.extractor) for v in added], [("new", ""), ("old", "Vimeo")]
+        )
+        self.assertEqual(
+            [(s["videoId"], s["reason"]) for s in skipped],
+            [("old", "exists"), ("new", "duplicate")],
+        )
+
+    async def test_same_video_in_another_format_is_added(self):
+        entries = [BatchEntry(url="https://x/old", videoId="old", extractor="Youtube")]
+        request = VideoBatchRequest(urls=["https://x"], format="WORST")
+
+        added, skipped = await ingest.insert_batch(entries, request)
+
+        self.assertEqual([(v.videoId, v.format) for v in added], [("old", "WORST")])
+        self.assertEqual(skipped, [])
+        async with self.session() as session:
+            rows = (await session.exec(select(VideoDB.format))).all()
+        self.assertEqual(sorted(rows), ["BEST", "WORST"])
+
+    async def test_duplicate_statement_finds_other_url_forms(self):
+        video = ingest.identify(
+            make_video(
+                2, id="v2", url="https://youtu.be/aaaaaaaaaaa", videoId="", extractor=""
+            )
+        )
+        self.assertEqual((video.videoId, video.extractor), ("aaaaaaaaaaa", "Youtube"))
+
+        async with self.session() as session:
+            session.add(make_video(3, videoId="aaaaaaaaaaa"))
+            await session.commit()
+            duplicate = (
+                await session.exec(ingest.duplicate_statement(video))  # type: ignore
+            ).first()
+        self.assertEqual(duplicate.id, "video_003")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import asyncio
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src import media
+from src.media import MediaFileResponse, MediaStreams
+
+
+class MediaStreamsTests(unittest.IsolatedAsyncioTestCase):
+    async def test_caps_concurrent_streams_and_records_finished_ones(self):
+        streams = MediaStreams(max_streams=1, queue_timeout=0.01)
+        first = await streams.acquire("file_1")
+
+        with self.assertRaises(TimeoutError):
+            await streams.acquire("file_2")
+        self.assertEqual(streams.rejected, 1)
+
+        first.mode, first.bytes = "sendfile", 1000
+        streams.release(first)
+        streams.release(first)  # a second release is ignored
+
+        second = await streams.acquire("file_2")
+        stats = streams.stats()
+        self.assertEqual(stats["activeStreams"], 1)
+        self.assertEqual(stats["totalBytes"], 1000)
+        self.assertEqual(stats["streamsByMode"], {"sendfile": 1})
+        self.assertEqual(stats["active"][0]["fileId"], "file_2")
+        streams.release(second)
+
+
+class MediaFileResponseTests(unittest.IsolatedAsyncioTestCase):
+    """Serves a real file, the response overrides private FileResponse
+    methods that an aiohttp upgrade could change."""
+
+    async def asyncSetUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = Path(self.temp_dir.name) / "clip.mp4"
+        self.body = bytes(range(256)) * 64
+        self.path.write_bytes(self.body)
+        self.streams = MediaStreams(max_streams=1, queue_timeout=0.01)
+
+        async def handler(request: web.Request):
+            stream = await self.streams.acquire("file_1")
+            return MediaFileResponse(self.path, stream, streams=self.streams)
+
+        app = web.Application()
+        app.router.add_get("/media", handler)
+        self.client = TestClient(TestServer(app))
+        await self.client.start_server()
+
+    async def asyncTearDown(self):
+        await self.client.close()
+        self.temp_dir.cleanup()
+
+    async def fetch_range(self) -> bytes:
+        resp = await self.client.get("/media", headers={"Range": "bytes=100-4195"})
+        self.assertEqual(resp.status, 206)
+        body = await resp.read()
+        # The client can have the body before the handler has returned
+        for _ in range(100):
+            if self.streams.recent:
+                break
+            await asyncio.sleep(0.01)
+        return body
+
+    async def test_sendfile_path_sends_the_range_and_frees_the_slot(self):
+        self.assertEqual(await self.fetch_range(), self.body[100:4196])
+
+        stream = self.streams.recent[-1]
+        self.assertEqual(stream.mode, "sendfile")
+        self.assertEqual((stream.offset, stream.bytes), (100, 4096))
+        self.assertEqual(self.streams.active, {})
+
+    async def test_chunked_path_sends_the_range_and_frees_the_slot(self):
+        with patch.object(media, "MEDIA_SENDFILE", False):
+            self.assertEqual(await self.fetch_range(), self.body[100:4196])
+
+        stream = self.streams.recent[-1]
+        self.assertEqual(stream.mode, "chunked")
+        self.assertEqual((stream.offset, stream.bytes), (100, 4096))
+        self.assertEqual(self.streams.active, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
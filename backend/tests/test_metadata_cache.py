@@ -0,0 +1,62 @@
+import sys
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from sqlmodel import select
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src import MetadataCache as metadata_cache_module
+from src.db import MetadataCacheDB
+from src.MetadataCache import MetadataCache
+from tests.conftest import InMemoryDBTestCase
+
+INFO = {
+    "_type": "video",
+    "id": "aaaaaaaaaaa",
+    "extractor_key": "Youtube",
+    "webpage_url": "https://www.youtube.com/watch?v=aaaaaaaaaaa",
+    "fulltitle": "First",
+    "duration_string": "1:00",
+    "formats": [{"format_id": "18", "url": "https://signed/18"}],
+}
+
+
+class MetadataCacheTests(InMemoryDBTestCase):
+    session_modules = (metadata_cache_module,)
+
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self.cache = MetadataCache(ttl=60)
+
+    async def test_other_url_forms_of_a_video_hit_the_same_entry(self):
+        await self.cache.store(INFO["webpage_url"], INFO)
+
+        info = await self.cache.get("https://youtu.be/aaaaaaaaaaa")
+        self.assertEqual(info, INFO)
+        self.assertIsNone(await self.cache.get("https://youtu.be/bbbbbbbbbbb"))
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+        await self.cache.invalidate("https://youtu.be/aaaaaaaaaaa")
+        self.assertIsNone(await self.cache.get(INFO["webpage_url"]))
+
+    async def test_expired_entries_are_ignored_and_pruned(self):
+        with patch.object(metadata_cache_module.time, "time", return_value=1000):
+            entry = await self.cache.store("https://example.com/clip", INFO)
+        self.assertEqual(entry.key, "Youtube:aaaaaaaaaaa")
+        self.assertEqual(entry.expiresAt, 1060)
+
+        self.assertIsNone(await self.cache.get("https://example.com/clip"))
+        self.assertEqual(await self.cache.prune_expired(), 1)
+        async with self.session() as session:
+            self.assertEqual((await session.exec(select(MetadataCacheDB))).all(), [])
+
+    async def test_playlists_are_not_cached(self):
+        self.assertIsNone(
+            await self.cache.store("https://x/list", {"_type": "playlist", "id": "PL"})
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import asyncio
+import sys
+import time
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.metrics import Registry, download_retries, loop_lag_last, monitor_loop_lag
+from src.Ytdlp import YdlLogger
+
+
+class RegistryTests(unittest.TestCase):
+    def test_renders_prometheus_text(self):
+        registry = Registry()
+        emits = registry.counter("emits_total", "Emits", ("event",))
+        latency = registry.histogram("emit_seconds", "Latency", buckets=(0.1, 1.0))
+        registry.gauge("queued", "Queued", collect=lambda: 3)
+        emits.inc(event='say "hi"')
+        emits.inc(2, event='say "hi"')
+        latency.observe(0.05)
+        latency.observe(0.5)
+
+        text = registry.render()
+
+        self.assertIn("# TYPE emits_total counter\n", text)
+        self.assertIn('emits_total{event="say \\"hi\\""} 3\n', text)
+        self.assertIn('emit_seconds_bucket{le="0.1"} 1\n', text)
+        self.assertIn('emit_seconds_bucket{le="1.0"} 2\n', text)
+        self.assertIn('emit_seconds_bucket{le="+Inf"} 2\n', text)
+        self.assertIn("emit_seconds_sum 0.55\n", text)
+        self.assertIn("emit_seconds_count 2\n", text)
+        self.assertIn("queued 3\n", text)
+
+    def test_retries_are_counted_from_ytdlp_messages(self):
+        before = {
+            kind: download_retries.value(kind=kind)
+            for kind in ("fragment", "http", "extractor")
+        }
+        ydl_logger = YdlLogger()
+        ydl_logger.debug(
+            "[download] Got error: HTTP Error 503. Retrying fragment 7 (1/10)..."
+        )
+        ydl_logger.debug("[download] Got error: timed out. Retrying (2/3)...")
+        ydl_logger.warning("[youtube] abc: Read timed out. Retrying (1/3)...")
+        ydl_logger.debug("[download]  42.0% of 10.00MiB")
+
+        self.assertEqual(
+            {kind: download_retries.value(kind=kind) - n for kind, n in before.items()},
+            {"fragment": 1, "http": 1, "extractor": 1},
+        )
+
+
+class LoopLagTests(unittest.IsolatedAsyncioTestCase):
+    async def test_blocking_callback_shows_up_as_lag(self):
+        monitor = asyncio.create_task(monitor_loop_lag(interval=0.01))
+        await asyncio.sleep(0)
+        time.sleep(0.05)
+        # Long enough for the overdue wake-up, short of the next one
+        await asyncio.sleep(0.005)
+        monitor.cancel()
+        self.assertGreaterEqual(loop_lag_last.value(), 0.03)
+
+
+if __name__ == "__main__":
+    unittest.main()
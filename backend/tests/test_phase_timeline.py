@@ -0,0 +1,36 @@
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.PhaseTimeline import PhaseTimeline
+
+
+class PhaseTimelineTests(unittest.TestCase):
+    def test_open_and_closed_phases(self):
+        timeline = PhaseTimeline("v1")
+        timeline.start("download")
+        timeline.finish("download", 1024, "137")
+        timeline.finish("download", 1, "ignored")
+        timeline.start("postprocess", "FFmpegMerger")
+
+        live = timeline.live()
+        self.assertEqual(
+            [(p["name"], p["detail"], p["bytes"], p["ongoing"]) for p in live],
+            [
+                ("download", "137", 1024, False),
+                ("postprocess", "FFmpegMerger", None, True),
+            ],
+        )
+
+        timeline.finish_all("failed")
+        self.assertEqual(
+            [(p.name, p.detail) for p in timeline._pending],
+            [("download", "137"), ("postprocess", "failed")],
+        )
+        self.assertFalse(timeline.is_open("postprocess"))
+
+
+if __name__ == "__main__":
+    unittest.main()
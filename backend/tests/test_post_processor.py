@@ -0,0 +1,97 @@
+import asyncio
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+
+from sqlmodel import select
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src import PostProcessor as pp_module
+from src.db import PostProcessJobDB, PostProcessStatus
+from src.schemas import ThumbnailMode
+from tests.conftest import InMemoryDBTestCase
+
+
+class PostProcessorTests(InMemoryDBTestCase):
+    session_modules = (pp_module,)
+
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.video_file = Path(self.temp_dir.name) / "video.mp4"
+        self.video_file.write_bytes(b"fake")
+
+        self.emit_patch = patch.object(
+            pp_module.SioEmitter, "postprocess_update", new=AsyncMock()
+        )
+        self.emit_patch.start()
+        self.processor = pp_module.PostProcessor(concurrency=2)
+
+    async def asyncTearDown(self):
+        for worker in self.processor._workers:
+            worker.cancel()
+        self.emit_patch.stop()
+        await super().asyncTearDown()
+        self.temp_dir.cleanup()
+
+    async def only_job(self) -> PostProcessJobDB:
+        async with self.session() as session:
+            return (await session.exec(select(PostProcessJobDB))).one()
+
+    async def test_submitted_job_runs_and_completes(self):
+        generate = AsyncMock(return_value=True)
+        with patch.object(self.processor, "_generate_thumbnails", generate):
+            await self.processor.start()
+            await self.processor.submit("vid-1", self.video_file)
+            await asyncio.wait_for(self.processor.queue.join(), 1)
+
+        generate.assert_awaited_once_with("vid-1", self.video_file)
+        job = await self.only_job()
+        self.assertEqual(job.status, PostProcessStatus.COMPLETED)
+        self.assertEqual(job.attempts, 1)
+
+    async def test_failed_job_is_retried_then_marked_failed(self):
+        generate = AsyncMock(return_value=False)
+        with patch.object(self.processor, "_generate_thumbnails", generate):
+            await self.processor.start()
+            await self.processor.submit("vid-1", self.video_file)
+            await asyncio.wait_for(self.processor.queue.join(), 1)
+
+        self.assertEqual(generate.await_count, pp_module.MAX_ATTEMPTS)
+        job = await self.only_job()
+        self.assertEqual(job.status, PostProcessStatus.FAILED)
+
+    async def test_start_recovers_interrupted_jobs(self):
+        async with self.session() as session:
+            session.add(
+                PostProcessJobDB(
+                    videoId="vid-1",
+                    filePath=self.video_file.as_posix(),
+                    status=PostProcessStatus.RUNNING,
+                )
+            )
+            await session.commit()
+
+        generate = AsyncMock(return_value=True)
+        with patch.object(self.processor, "_generate_thumbnails", generate):
+            await self.processor.start()
+            await asyncio.wait_for(self.processor.queue.join(), 1)
+
+        self.assertEqual((await self.only_job()).status, PostProcessStatus.COMPLETED)
+
+    async def test_keyframe_mode_is_opt_in(self):
+        with patch.dict(pp_module.os.environ):
+            pp_module.os.environ.pop("THUMBNAIL_MODE", None)
+            default = pp_module.PostProcessor(concurrency=1)
+            pp_module.os.environ["THUMBNAIL_MODE"] = "keyframe"
+            keyframe = pp_module.PostProcessor(concurrency=1)
+
+        self.assertEqual(default.thumb_vtt_config.mode, ThumbnailMode.DECODE)
+        self.assertEqual(keyframe.thumb_vtt_config.mode, ThumbnailMode.KEYFRAME)
+
+
+if __name__ == "__main__":
+    unittest.main()
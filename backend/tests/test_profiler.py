@@ -0,0 +1,36 @@
+import sys
+import threading
+import time
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.profiler import folded, sample_stacks
+
+
+def spin_for(seconds: float):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+class ProfilerTests(unittest.TestCase):
+    def test_busy_thread_shows_up_in_folded_stacks(self):
+        worker = threading.Thread(target=spin_for, args=(0.3,), name="busy-worker")
+        worker.start()
+        try:
+            stacks = sample_stacks(0.1, interval=0.001, thread="busy")
+        finally:
+            worker.join()
+
+        self.assertTrue(stacks)
+        self.assertTrue(all(stack.startswith("busy-worker;") for stack in stacks))
+        leaf = max(stacks, key=stacks.__getitem__).rsplit(";", 1)[1]
+        self.assertIn("spin_for (tests/test_profiler.py:", leaf)
+        first_line = folded(stacks).splitlines()[0]
+        self.assertEqual(int(first_line.rsplit(" ", 1)[1]), max(stacks.values()))
+
+
+if __name__ == "__main__":
+    unittest.main()
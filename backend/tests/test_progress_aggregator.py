@@ -0,0 +1,66 @@
+import sys
+import unittest
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src import ProgressAggregator as aggregator_module
+from src.schemas import VideoProgress
+
+
+def make_progress(
+    video_id: str, percent: float, speed: float = 0.0, status: str = "downloading"
+) -> VideoProgress:
+    return VideoProgress(
+        id=video_id, videoId="yt", status=status, percent=percent, speed=speed
+    )
+
+
+class ProgressAggregatorTests(unittest.IsolatedAsyncioTestCase):
+    async def test_flush_sends_latest_frame_per_video_in_one_batch(self):
+        aggregator = aggregator_module.ProgressAggregator(hz=4)
+        emit = AsyncMock()
+
+        with patch.object(aggregator_module.SioEmitter, "status_update_batch", emit):
+            aggregator.push(make_progress("a", 1, speed=100))
+            aggregator.push(make_progress("a", 2, speed=300))
+            aggregator.push(make_progress("b", 5, speed=200))
+            await aggregator.flush()
+            await aggregator.flush()
+
+        emit.assert_awaited_once()
+        batch = emit.await_args.args[0]
+        self.assertEqual({vp.id: vp.percent for vp in batch.progress}, {"a": 2, "b": 5})
+        self.assertEqual(batch.totalSpeed, 500)
+        self.assertGreaterEqual(batch.ts, max(vp.ts for vp in batch.progress))
+        self.assertEqual(aggregator.dropped, 1)
+
+    async def test_finished_download_leaves_total_speed(self):
+        aggregator = aggregator_module.ProgressAggregator(hz=4)
+        aggregator.push(make_progress("a", 50, speed=100))
+        aggregator.push(make_progress("b", 50, speed=200))
+        aggregator.push(make_progress("a", 100, status="finished"))
+
+        self.assertEqual(aggregator.total_speed, 200)
+
+
+    async def test_paused_download_sends_the_lower_total(self):
+        aggregator = aggregator_module.ProgressAggregator(hz=4)
+        emit = AsyncMock()
+
+        with patch.object(aggregator_module.SioEmitter, "status_update_batch", emit):
+            aggregator.push(make_progress("v1", 10, speed=5_000_000))
+            await aggregator.flush()
+            aggregator.forget("v1")
+            await aggregator.flush()
+            await aggregator.flush()
+
+        self.assertEqual(emit.await_count, 2)
+        batch = emit.await_args.args[0]
+        self.assertEqual(batch.progress, [])
+        self.assertEqual(batch.totalSpeed, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+from sqlalchemy import create_engine, update
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, delete
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.db import FileDB, VideoDB
+from src.search import (
+    _metadata_params,
+    _metadata_update,
+    create_search_index,
+    match_expression,
+    search_statement,
+)
+from tests.conftest import make_video
+
+
+class SearchTests(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine("sqlite://", poolclass=StaticPool)
+        SQLModel.metadata.create_all(self.engine)
+        with self.engine.begin() as conn:
+            create_search_index(conn)
+
+        with Session(self.engine) as session:
+            session.add(make_video(1, fullTitle="Cooking pasta at home"))
+            session.add(make_video(2, fullTitle="Rust tutorial"))
+            session.add(make_video(3, fullTitle="Weekend vlog"))
+            session.commit()
+            session.execute(
+                _metadata_update(),
+                _metadata_params(
+                    "video_003",
+                    {"uploader": "Chef Anna", "description": "We make pasta"},
+                ),
+            )
+            session.commit()
+
+    def tearDown(self):
+        self.engine.dispose()
+
+    def search(self, q: str, **kwargs) -> list[str]:
+        with Session(self.engine) as session:
+            rows = session.exec(search_statement(q, limit=10, **kwargs)).all()  # type: ignore
+        return [row.id for row in rows]
+
+    def test_title_hits_rank_above_description_hits(self):
+        self.assertEqual(self.search("pasta"), ["video_001", "video_003"])
+        self.assertEqual(self.search("anna"), ["video_003"])
+
+    def test_last_word_matches_as_prefix(self):
+        self.assertEqual(self.search("tuto"), ["video_002"])
+
+    def test_operators_are_matched_literally(self):
+        self.assertEqual(match_expression('rust AND "x'), '"rust" "AND" """x"*')
+        self.assertEqual(self.search("pasta OR"), [])
+        with self.assertRaises(ValueError):
+            match_expression("   ")
+
+    def test_triggers_follow_title_changes_and_deletes(self):
+        with Session(self.engine) as session:
+            session.exec(
+                update(VideoDB)  # type: ignore
+                .where(VideoDB.id == "video_002")  # type: ignore
+                .values(fullTitle="Go tutorial")
+            )
+            session.exec(delete(VideoDB).where(VideoDB.id == "video_001"))  # type: ignore
+            session.commit()
+
+        self.assertEqual(self.search("rust"), [])
+        self.assertEqual(self.search("go"), ["video_002"])
+        self.assertEqual(self.search("pasta"), ["video_003"])
+
+
+class SearchBackfillTests(unittest.TestCase):
+    def test_existing_library_is_indexed_with_info_json(self):
+        engine = create_engine("sqlite://", poolclass=StaticPool)
+        SQLModel.metadata.create_all(engine)
+        with tempfile.TemporaryDirectory() as temp:
+            video_path = Path(temp) / "clip.mp4"
+            video_path.with_suffix(".info.json").write_text(
+                json.dumps({"uploader": "Some Channel", "description": "hello"})
+            )
+            with Session(engine) as session:
+                session.add(FileDB(id="file_1", filePath=video_path.as_posix()))
+                session.add(make_video(1, videoPathId="file_1"))
+                session.commit()
+
+            with engine.begin() as conn:
+                create_search_index(conn)
+
+        with Session(engine) as session:
+            rows = session.exec(search_statement("channel", limit=10)).all()  # type: ignore
+        self.assertEqual([row.id for row in rows], ["video_001"])
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    unittest.main()
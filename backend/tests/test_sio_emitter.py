@@ -0,0 +1,64 @@
+import sys
+import unittest
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src import SioEmitter as emitter_module
+from src import sockets
+from src.schemas import VideoProgress, VideoProgressBatch
+
+
+def make_progress(video_id: str) -> VideoProgress:
+    return VideoProgress(id=video_id, videoId="yt", percent=1)
+
+
+class SioEmitterTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        sockets.client_set.update({"sid-1", "sid-2", "sid-3"})
+        self.emit = AsyncMock()
+        self.enter_room = AsyncMock()
+        self.leave_room = AsyncMock()
+        self.patches = [
+            patch.object(sockets.sio, "emit", self.emit),
+            patch.object(sockets.sio, "enter_room", self.enter_room),
+            patch.object(sockets.sio, "leave_room", self.leave_room),
+        ]
+        for p in self.patches:
+            p.start()
+
+    async def asyncTearDown(self):
+        for p in self.patches:
+            p.stop()
+        sockets.client_set.clear()
+        sockets.video_subscribers.clear()
+
+    async def test_broadcast_is_a_single_room_emit(self):
+        await emitter_module.SioEmitter.message({"id": "a"})
+
+        self.emit.assert_awaited_once_with(
+            "message", {"id": "a"}, room=sockets.CLIENTS_ROOM
+        )
+
+    async def test_batch_also_reaches_per_video_subscribers(self):
+        await sockets.subscribe_video("sid-1", "a")
+
+        await emitter_module.SioEmitter.status_update_batch(
+            VideoProgressBatch(progress=[make_progress("a"), make_progress("b")])
+        )
+
+        rooms = [call.kwargs["room"] for call in self.emit.await_args_list]
+        self.assertEqual(rooms, [sockets.ALL_PROGRESS_ROOM, sockets.video_room("a")])
+        self.leave_room.assert_awaited_once_with("sid-1", sockets.ALL_PROGRESS_ROOM)
+
+    async def test_last_unsubscribe_rejoins_all_progress(self):
+        await sockets.subscribe_video("sid-1", "a")
+        await sockets.unsubscribe_video("sid-1", "a")
+
+        self.assertEqual(sockets.video_subscribers, {})
+        self.enter_room.assert_awaited_with("sid-1", sockets.ALL_PROGRESS_ROOM)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+import asyncio
+import sys
+import time
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.StallWatchdog import StallWatchdog
+
+
+def hold_the_loop(seconds: float):
+    time.sleep(seconds)
+
+
+class StallWatchdogTests(unittest.IsolatedAsyncioTestCase):
+    async def test_blocking_call_is_reported_with_its_caller(self):
+        watchdog = StallWatchdog(threshold=0.05, interval=0.01)
+        watchdog.start()
+        try:
+            await asyncio.sleep(0.03)
+            hold_the_loop(0.2)
+            # Let the heartbeat stamp again so the stall is closed
+            await asyncio.sleep(0.05)
+        finally:
+            watchdog.stop()
+
+        self.assertEqual(watchdog.total, 1)
+        stall = watchdog.stalls[0]
+        self.assertFalse(stall.ongoing)
+        self.assertIn("test_stall_watchdog.py", stall.blame)
+        self.assertIn("hold_the_loop", stall.blame)
+        self.assertAlmostEqual(stall.seconds, 0.2, delta=0.05)
+        self.assertTrue(stall.task)
+        self.assertIn("test_blocking_call", stall.coroutine)
+
+
+if __name__ == "__main__":
+    unittest.main()
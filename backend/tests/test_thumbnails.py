@@ -0,0 +1,68 @@
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.schemas import SpriteResult, ThumbnailVTTConfig
+from src.thumbnails import SpriteSheetWriter, sprite_sheet_paths, tile_size, write_vtt
+
+
+class ThumbnailTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.temp = Path(self.temp_dir.name)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_tile_size_keeps_aspect_with_even_sides(self):
+        self.assertEqual(tile_size(1920, 1080, 160), (160, 90))
+        self.assertEqual(tile_size(1080, 1920, 161), (160, 284))
+
+    def test_sheet_writer_splits_tiles_across_fixed_size_sheets(self):
+        writer = SpriteSheetWriter(self.temp / "clip_sprite", 16, 9, columns=2, rows=2)
+        for _ in range(5):
+            writer.add(Image.new("RGB", (32, 18), "red"))
+        sprite = writer.close()
+
+        self.assertEqual(sprite.count, 5)
+        self.assertEqual(
+            [p.name for p in sprite.sheets],
+            ["clip_sprite_000.jpg", "clip_sprite_001.jpg"],
+        )
+        with Image.open(sprite.sheets[0]) as full, Image.open(sprite.sheets[1]) as last:
+            self.assertEqual(full.size, (32, 18))
+            self.assertEqual(last.size, (32, 9))
+        self.assertEqual(sprite_sheet_paths(sprite.sheets[0]), sprite.sheets)
+
+    def test_sheet_writer_without_tiles_returns_none(self):
+        writer = SpriteSheetWriter(self.temp / "clip_sprite", 16, 9, columns=2, rows=2)
+        self.assertIsNone(writer.close())
+
+    def test_write_vtt_points_cues_at_sheet_and_tile(self):
+        config = ThumbnailVTTConfig(interval=10)
+        sprite = SpriteResult(
+            sheets=[Path("a.jpg"), Path("b.jpg")],
+            count=5,
+            thumb_w=160,
+            thumb_h=90,
+            columns=2,
+            rows=2,
+        )
+        vtt_path = write_vtt(
+            self.temp / "t.vtt", ["sheet-a", "sheet-b"], sprite, config
+        )
+        lines = vtt_path.read_text(encoding="utf-8").splitlines()
+
+        self.assertEqual(lines[0], "WEBVTT")
+        self.assertIn("00:00:20.000 --> 00:00:30.000", lines)
+        self.assertIn("sheet-a#xywh=0,90,160,90", lines)
+        self.assertEqual(lines[-1], "sheet-b#xywh=0,0,160,90")
+
+
+if __name__ == "__main__":
+    unittest.main()
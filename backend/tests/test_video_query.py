@@ -0,0 +1,118 @@
+import sys
+import unittest
+from pathlib import Path
+
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.db import FileDB, _migrate_videodb
+from src.schemas import VideoListQuery
+from src.video_query import decode_cursor, page_from_rows, video_list_statement
+from tests.conftest import make_video
+
+
+class VideoQueryTests(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine("sqlite://", poolclass=StaticPool)
+        SQLModel.metadata.create_all(self.engine)
+        with Session(self.engine) as session:
+            session.add_all(make_video(i) for i in range(10))
+            session.add(make_video(10, watched=True, extractor="Vimeo"))
+            session.add(make_video(11, fullTitle="100%_done", downloadStatus="failed"))
+            session.commit()
+
+    def tearDown(self):
+        self.engine.dispose()
+
+    def page(self, **params) -> dict:
+        query = VideoListQuery(**params)
+        with Session(self.engine) as session:
+            rows = session.exec(video_list_statement(query)).all()  # type: ignore
+        return page_from_rows(list(rows), query.limit, query.withFiles)
+
+    def test_cursor_walks_every_row_once_newest_first(self):
+        seen, cursor = [], None
+        while True:
+            page = self.page(limit="5", cursor=cursor)
+            seen += [item["id"] for item in page["items"]]
+            cursor = page["nextCursor"]
+            if not cursor:
+                break
+
+        # createdAt ties are broken by id, still newest first
+        self.assertEqual(seen, [f"video_{i:03}" for i in reversed(range(12))])
+        self.assertEqual(
+            decode_cursor(self.page(limit=5)["nextCursor"]), (3.0, "video_007")
+        )
+
+    def test_filters_combine(self):
+        self.assertEqual(
+            [v["id"] for v in self.page(watched="true", extractor="Vimeo")["items"]],
+            ["video_010"],
+        )
+        self.assertEqual(
+            [v["id"] for v in self.page(downloadStatus="failed")["items"]],
+            ["video_011"],
+        )
+
+    def test_text_search_escapes_like_wildcards(self):
+        self.assertEqual([v["id"] for v in self.page(q="0%_")["items"]], ["video_011"])
+
+    def test_fields_projects_columns_and_keeps_keys(self):
+        item = self.page(limit=1, fields="fullTitle,thumbnailPathId")["items"][0]
+        self.assertEqual(set(item), {"id", "createdAt", "fullTitle", "thumbnailPathId"})
+
+    def test_with_files_groups_file_rows_per_video(self):
+        with Session(self.engine) as session:
+            session.add(FileDB(filePath="/v/11.mp4", videoId="video_011", kind="video"))
+            session.add(
+                FileDB(filePath="/t/11.jpg", videoId="video_011", kind="thumbnail")
+            )
+            session.commit()
+
+        page = self.page(limit=2, fields="fullTitle", withFiles="true")
+        self.assertEqual([v["id"] for v in page["items"]], ["video_011", "video_010"])
+        self.assertEqual(
+            [f["filePath"] for f in page["items"][0]["files"]],
+            ["/t/11.jpg", "/v/11.mp4"],
+        )
+        self.assertEqual(page["items"][1]["files"], [])
+        self.assertEqual(decode_cursor(page["nextCursor"]), (5.0, "video_010"))
+
+    def test_rejects_unknown_fields_and_bad_cursor(self):
+        with self.assertRaises(ValueError):
+            self.page(fields="id,password")
+        with self.assertRaises(ValueError):
+            self.page(cursor="not-a-cursor")
+
+
+class VideoMigrationTests(unittest.TestCase):
+    def test_adds_columns_and_indexes_to_old_table(self):
+        engine = create_engine("sqlite://", poolclass=StaticPool)
+        with engine.begin() as conn:
+            conn.exec_driver_sql(
+                "CREATE TABLE videodb (id VARCHAR PRIMARY KEY, downloadStatus VARCHAR)"
+            )
+            conn.exec_driver_sql("INSERT INTO videodb (id) VALUES ('a'), ('b')")
+            _migrate_videodb(conn)
+            created = conn.exec_driver_sql(
+                "SELECT createdAt FROM videodb ORDER BY id"
+            ).all()
+
+        inspector = inspect(engine)
+        self.assertEqual(created, [(1.0,), (2.0,)])
+        self.assertIn(
+            "extractor", {c["name"] for c in inspector.get_columns("videodb")}
+        )
+        self.assertIn(
+            "ix_videodb_created_id",
+            {i["name"] for i in inspector.get_indexes("videodb")},
+        )
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,24 @@
+import sys
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from aiohttp.test_utils import make_mocked_request
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src import video_route
+
+
+class PostVideoTests(unittest.IsolatedAsyncioTestCase):
+    async def test_invalid_priority_is_rejected_before_the_insert(self):
+        request = make_mocked_request("POST", "/api/video?priority=high")
+        with patch.object(video_route, "get_async_session") as session:
+            response = await video_route.post_handler(request)
+
+        self.assertEqual(response.status, 400)
+        session.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,184 @@
+import asyncio
+import sys
+import tempfile
+import unittest
+from contextlib import asynccontextmanager
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.schemas import DownloadStatus, Video
+from src import Ytdlp as ytdlp_module
+from src.Ytdlp import HandOffPP, Ytdlp
+from yt_dlp.utils import DownloadError
+
+
+class PauseTests(unittest.IsolatedAsyncioTestCase):
+    def tearDown(self):
+        Ytdlp.remove_instance("v1")
+
+    async def test_pause_stops_at_the_next_tick_and_keeps_the_part_file(self):
+        ytdlp = Ytdlp(Video(id="v1", videoId="", url="https://x/1"))
+        with tempfile.TemporaryDirectory() as temp:
+            part = Path(temp, "clip.mp4.part")
+            part.write_bytes(b"partial")
+
+            ytdlp.pause()
+            with self.assertRaises(DownloadError):
+                ytdlp._progress_wrapper(
+                    {"status": "downloading", "filename": str(part)[:-5]}
+                )
+
+            self.assertTrue(part.exists())
+        self.assertTrue(ytdlp.stopping)
+        self.assertEqual(ytdlp.video.downloadStatus, DownloadStatus.PAUSED)
+
+    async def test_resume_asks_for_the_recorded_formats_first(self):
+        video = Video(id="v1", videoId="", format="BEST")
+        self.assertEqual(Ytdlp(video).format_selector(), "bestvideo+bestaudio/best")
+
+        video.formatId = "137+140"
+        self.assertEqual(
+            Ytdlp(video).format_selector(), "137+140/bestvideo+bestaudio/best"
+        )
+
+
+class InfoFieldTests(unittest.IsolatedAsyncioTestCase):
+    def tearDown(self):
+        Ytdlp.remove_instance("v1")
+
+    async def test_missing_fields_stay_strings(self):
+        ytdlp = Ytdlp(Video(id="v1", videoId="", url="https://x/1"))
+        ytdlp.set_info_fields(
+            {
+                "id": "page-1",
+                "title": "Clip",
+                "resolution": None,
+                "duration_string": None,
+            }
+        )
+        self.assertEqual(ytdlp.video.videoId, "page-1")
+        self.assertEqual(ytdlp.video.resolution, "")
+        self.assertEqual(ytdlp.video.durationString, "")
+
+
+class FailedDownloadTests(unittest.IsolatedAsyncioTestCase):
+    def tearDown(self):
+        Ytdlp.remove_instance("v1")
+
+    async def test_timeline_is_not_saved_for_a_removed_video(self):
+        session = MagicMock(get=AsyncMock(), delete=AsyncMock(), commit=AsyncMock())
+
+        @asynccontextmanager
+        async def fake_session():
+            yield session
+
+        ytdlp = Ytdlp(Video(id="v1", videoId="", url="https://x/1"))
+        ytdlp.timeline.save = AsyncMock()
+        with (
+            patch.object(ytdlp_module, "get_async_session", fake_session),
+            patch.object(ytdlp_module.SioEmitter, "remove_video", AsyncMock()),
+            patch.object(ytdlp, "load_info", AsyncMock(side_effect=DownloadError("x"))),
+        ):
+            await ytdlp.download_video()
+
+        session.delete.assert_awaited_once()
+        ytdlp.timeline.save.assert_not_awaited()
+
+
+class TimelineHookTests(unittest.IsolatedAsyncioTestCase):
+    def tearDown(self):
+        Ytdlp.remove_instance("v1")
+
+    async def test_hooks_open_and_close_phases(self):
+        ytdlp = Ytdlp(Video(id="v1", videoId="", url="https://x/1"))
+        ytdlp.once = False
+        ytdlp._progress_wrapper(
+            {"status": "downloading", "downloaded_bytes": 10, "info_dict": {"id": "x"}}
+        )
+        self.assertTrue(ytdlp.timeline.is_open("download"))
+
+        ytdlp._postprocessor_hook(
+            {"status": "started", "postprocessor": "FFmpegMerger"}
+        )
+        ytdlp._postprocessor_hook(
+            {"status": "finished", "postprocessor": "FFmpegMerger"}
+        )
+        self.assertEqual(
+            [(p.name, p.detail) for p in ytdlp.timeline._pending],
+            [("postprocess", "FFmpegMerger")],
+        )
+
+
+class HandOffTests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        temp = Path(self.temp_dir.name)
+        self.final = temp / "clip.mp4"
+        self.final.write_bytes(b"merged")
+        self.thumb = temp / "clip.webp"
+        self.thumb.write_bytes(b"thumb")
+        (temp / "thumbs").mkdir()
+
+        @asynccontextmanager
+        async def fake_session():
+            yield MagicMock(exec=AsyncMock(), commit=AsyncMock())
+
+        self.submit = AsyncMock()
+        self.patches = [
+            patch.object(ytdlp_module, "THUMB_DIR", temp / "thumbs"),
+            patch.object(ytdlp_module, "get_async_session", fake_session),
+            patch.object(
+                ytdlp_module,
+                "register_video_files",
+                AsyncMock(return_value=["file-1", "file-2"]),
+            ),
+            patch.object(ytdlp_module, "index_video_metadata", AsyncMock()),
+            patch.object(ytdlp_module.SioEmitter, "message", AsyncMock()),
+            patch.object(ytdlp_module.post_processor, "submit", self.submit),
+        ]
+        for p in self.patches:
+            p.start()
+        self.ytdlp = Ytdlp(Video(id="v1", videoId="", url="https://x/1"))
+        self.ytdlp.timeline.save = AsyncMock()
+
+    async def asyncTearDown(self):
+        for p in self.patches:
+            p.stop()
+        Ytdlp.remove_instance("v1")
+        self.temp_dir.cleanup()
+
+    async def test_final_file_is_handed_off_once(self):
+        info = {
+            "id": "abc",
+            "title": "Clip",
+            "filepath": str(self.final),
+            "thumbnails": [{"url": "u"}, {"url": "u", "filepath": str(self.thumb)}],
+        }
+        pp = HandOffPP(self.ytdlp)
+        await asyncio.to_thread(pp.run, info)
+        await asyncio.to_thread(pp.run, info)
+
+        self.submit.assert_awaited_once_with("v1", self.final)
+        self.assertEqual(self.ytdlp.video.downloadStatus, DownloadStatus.COMPLETED)
+        self.assertEqual(self.ytdlp.video.videoPathId, "file-1")
+        self.assertEqual(self.ytdlp.video.thumbnailPathId, "file-2")
+        self.assertEqual(self.ytdlp.video.downloadedBytes, len(b"merged"))
+        self.assertTrue(Path(self.temp_dir.name, "thumbs", "clip.webp").exists())
+
+    async def test_finished_format_is_not_handed_off(self):
+        self.ytdlp.once = False
+        await self.ytdlp.ytdlp_progress_hook(
+            {
+                "status": "finished",
+                "filename": str(self.final.with_suffix(".f137.mp4")),
+                "total_bytes": 10,
+                "info_dict": {"id": "abc"},
+            }
+        )
+        self.submit.assert_not_awaited()
+
+
+if __name__ == "__main__":
+    unittest.main()
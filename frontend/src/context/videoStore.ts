@@ -8,6 +8,7 @@ const useVideoStore = create<VideoStore>()(
     immer((set) => ({
       videos: {},
       videoProgress: {},
+      totalSpeed: 0,
       globalFilter: "",
 
       upsertVideo: (video: VideoT) =>
@@ -25,6 +26,14 @@ const useVideoStore = create<VideoStore>()(
           state.videoProgress[progress.id] = progress;
         }),
 
+      upsertVideoProgressBatch: (progress: VideoProgressT[], totalSpeed) =>
+        set((state) => {
+          for (const item of progress) {
+            state.videoProgress[item.id] = item;
+          }
+          state.totalSpeed = totalSpeed;
+        }),
+
       removeVideoProgress: (id: string) =>
         set((state) => {
           delete state.videoProgress[id];
@@ -45,12 +54,17 @@ const useVideoStore = create<VideoStore>()(
 interface VideoStore {
   videos: Record<string, VideoT>;
   videoProgress: Record<string, VideoProgressT>;
+  totalSpeed: number;
   globalFilter: string;
 
   upsertVideo: (video: VideoT) => void;
   removeVideo: (id: string) => void;
 
   upsertVideoProgress: (progress: VideoProgressT) => void;
+  upsertVideoProgressBatch: (
+    progress: VideoProgressT[],
+    totalSpeed: number,
+  ) => void;
   removeVideoProgress: (id: string) => void;
 
   setGlobalFilter: (filter: string) => void;
@@ -0,0 +1,27 @@
+const UNITS = ["B", "KiB", "MiB", "GiB", "TiB"];
+
+export function formatBytes(bytes?: number | null): string {
+  if (bytes == null || !Number.isFinite(bytes)) return "N/A";
+  let value = bytes;
+  let unit = 0;
+  while (value >= 1024 && unit < UNITS.length - 1) {
+    value /= 1024;
+    unit += 1;
+  }
+  return `${value.toFixed(unit === 0 ? 0 : 2)}${UNITS[unit]}`;
+}
+
+export function formatSpeed(bytesPerSecond?: number | null): string {
+  return bytesPerSecond == null ? "N/A" : `${formatBytes(bytesPerSecond)}/s`;
+}
+
+export function formatEta(seconds?: number | null): string {
+  if (seconds == null || !Number.isFinite(seconds)) return "--:--";
+  const total = Math.round(seconds);
+  const hrs = Math.floor(total / 3600);
+  const mins = Math.floor((total % 3600) / 60);
+  const secs = total % 60;
+  const mm = String(mins).padStart(2, "0");
+  const ss = String(secs).padStart(2, "0");
+  return hrs > 0 ? `${hrs}:${mm}:${ss}` : `${mm}:${ss}`;
+}
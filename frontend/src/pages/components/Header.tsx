@@ -5,6 +5,7 @@ import { InputText } from "primereact/inputtext";
 import { Menubar } from "primereact/menubar";
 import { useState } from "react";
 import useVideoStore from "src/context/VideoStore";
+import { formatSpeed } from "src/format";
 import DownloadForm from "./DownloadForm";
 import ThemeSwitcher from "./ThemeSwitcher";
 
@@ -16,6 +17,7 @@ interface HeaderProps {
 function Header({ onRestart, isRestarting }: HeaderProps) {
   const [visible, setVisible] = useState(false);
   const globalFilter = useVideoStore((state) => state.globalFilter);
+  const totalSpeed = useVideoStore((state) => state.totalSpeed);
   return (
     <>
       <Dialog
@@ -75,6 +77,11 @@ function Header({ onRestart, isRestarting }: HeaderProps) {
         }
         end={
           <div className="flex items-center gap-2">
+            {totalSpeed > 0 && (
+              <span className="text-sm text-gray-600 dark:text-gray-300">
+                {formatSpeed(totalSpeed)}
+              </span>
+            )}
             {/* Backend Restart Button */}
             <Button
               onClick={onRestart}
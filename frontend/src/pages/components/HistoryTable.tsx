@@ -17,7 +17,7 @@ import {
   useState,
 } from "react";
 import useVideoStore from "src/context/VideoStore";
-import { type VideoT } from "src/schema";
+import { type VideoPageT, type VideoT } from "src/schema";
 import ProgressBarOrID from "./ProgressBarOrID";
 import TableRowOptionMenu from "./TableRowOptionMenu";
 import VideoDialog from "./VideoDialog";
@@ -183,15 +183,23 @@ function TableGrid({
   useEffect(() => {
     const fetchVideos = async () => {
       try {
-        const response = await axios.get(
-          `${import.meta.env.VITE_BASE_URL}/videos`,
-          { headers: { "Content-Type": "application/json" } },
-        );
-        useVideoStore.setState({
-          videos: Object.fromEntries(
-            response.data.map((v: VideoT) => [v.id, v]),
-          ),
-        });
+        // The list endpoint is cursor paginated, follow it to the end
+        const videos: Record<string, VideoT> = {};
+        let cursor: string | null = null;
+        do {
+          const response: { data: VideoPageT } = await axios.get(
+            `${import.meta.env.VITE_BASE_URL}/videos`,
+            {
+              headers: { "Content-Type": "application/json" },
+              params: { limit: 500, ...(cursor ? { cursor } : {}) },
+            },
+          );
+          for (const v of response.data.items) {
+            videos[v.id] = v;
+          }
+          cursor = response.data.nextCursor;
+        } while (cursor);
+        useVideoStore.setState({ videos });
       } catch (error) {
         console.error(error);
       } finally {
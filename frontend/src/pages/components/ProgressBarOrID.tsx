@@ -5,6 +5,7 @@ import { ProgressBar } from "primereact/progressbar";
 import { ProgressSpinner } from "primereact/progressspinner";
 import { useEffect, useMemo, useRef, useState } from "react";
 import useVideoStore from "src/context/VideoStore";
+import { formatBytes, formatEta, formatSpeed } from "src/format";
 import { type VideoT } from "src/schema";
 
 function ProgressBarOrID({ rowData }: { rowData: VideoT }) {
@@ -25,8 +26,7 @@ function ProgressBarOrID({ rowData }: { rowData: VideoT }) {
   useEffect(() => {
     const now = Date.now();
 
-    const rawVal = rawProgress?.percent?.toString().replace("%", "");
-    const rawPercent = rawVal ? parseInt(rawVal) : 0;
+    const rawPercent = Math.floor(rawProgress?.percent ?? 0);
 
     if (rawPercent === 100 || !rawProgress) {
       setThrottledProgress(rawProgress);
@@ -44,14 +44,13 @@ function ProgressBarOrID({ rowData }: { rowData: VideoT }) {
     }
   }, [rawProgress]);
 
-  const displayPercent = useMemo(() => {
-    const val = throttledProgress?.percent?.toString().replace("%", "");
-    return val ? parseInt(val) : 0;
-  }, [throttledProgress]);
+  const displayPercent = useMemo(
+    () => Math.floor(throttledProgress?.percent ?? 0),
+    [throttledProgress],
+  );
 
   useEffect(() => {
-    const rawVal = rawProgress?.percent?.toString().replace("%", "");
-    const rawPercent = rawVal ? parseInt(rawVal) : 0;
+    const rawPercent = Math.floor(rawProgress?.percent ?? 0);
 
     if (rawPercent === 100 && rowData.downloadStatus !== "completed") {
       axios
@@ -100,9 +99,9 @@ function ProgressBarOrID({ rowData }: { rowData: VideoT }) {
       <div className="max-w-fit flex flex-col gap-[6px]">
         <ProgressBar className="w-[15vw]" value={displayPercent} />
         <div className="flex justify-between gap-3 text-xs ">
-          <div>{throttledProgress.downloadedSize}</div>
-          <div>{throttledProgress.speed}</div>
-          <div>{throttledProgress.eta}</div>
+          <div>{formatBytes(throttledProgress.downloadedBytes)}</div>
+          <div>{formatSpeed(throttledProgress.speed)}</div>
+          <div>{formatEta(throttledProgress.eta)}</div>
         </div>
       </div>
     );
@@ -11,6 +11,9 @@ type Props = {
 
 export default function SocketHandler({ toastRef }: Props) {
   const upsertVideoProgress = useVideoStore((s) => s.upsertVideoProgress);
+  const upsertVideoProgressBatch = useVideoStore(
+    (s) => s.upsertVideoProgressBatch,
+  );
   const upsertVideo = useVideoStore((s) => s.upsertVideo);
   const removeVideo = useVideoStore((s) => s.removeVideo);
   const upsertSSE = useStartupSSEStore((state) => state.upsertSSE);
@@ -32,6 +35,17 @@ export default function SocketHandler({ toastRef }: Props) {
       upsertVideoProgress(data);
     });
 
+    socket.on(
+      "status_update_batch",
+      (data: {
+        progress: VideoProgressT[];
+        totalSpeed: number;
+        ts: number;
+      }) => {
+        upsertVideoProgressBatch(data.progress, data.totalSpeed);
+      },
+    );
+
     socket.on("notify", (data: NotifyT) => {
       toastRef.current?.show({
         severity: data.severity as
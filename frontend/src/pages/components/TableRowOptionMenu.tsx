@@ -7,7 +7,7 @@ import { Toast } from "primereact/toast";
 import { type ReactNode, useRef, useState } from "react";
 import ReactJson from "react-json-view";
 import useVideoStore from "src/context/VideoStore";
-import { type VideoT } from "src/schema";
+import { type VideoT, VideoS } from "src/schema";
 import VideoDialog from "./VideoDialog";
 
 export default function TableRowOptionMenu(rowData: VideoT): ReactNode {
@@ -15,12 +15,16 @@ export default function TableRowOptionMenu(rowData: VideoT): ReactNode {
   const [visible, setVisible] = useState(false);
   const [info, setInfo] = useState(false);
   const removeVideo = useVideoStore((state) => state.removeVideo);
+  const upsertVideo = useVideoStore((state) => state.upsertVideo);
+  const canPause =
+    rowData.downloadStatus === "queued" ||
+    rowData.downloadStatus === "downloading";
 
   function downloadVideo() {
     const config: AxiosRequestConfig<object> = {
       method: "get",
       maxBodyLength: Infinity,
-      url: `http://localhost:8000/api/files/${rowData.videoPathId}`,
+      url: `http://localhost:8000/api/files/${rowData.videoPathId}?download=1`,
       headers: {},
       responseType: "blob",
     };
@@ -35,6 +39,30 @@ export default function TableRowOptionMenu(rowData: VideoT): ReactNode {
       });
   }
 
+  async function pauseOrResume() {
+    const action = rowData.downloadStatus === "paused" ? "resume" : "pause";
+    const config: AxiosRequestConfig = {
+      method: "post",
+      maxBodyLength: Infinity,
+      url: `http://localhost:8000/api/video/${rowData.id}/${action}`,
+      headers: {},
+    };
+
+    await axios
+      .request(config)
+      .then((response) => {
+        upsertVideo(VideoS.parse(response.data));
+      })
+      .catch((error) => {
+        console.error(error);
+        toast.current?.show({
+          severity: "error",
+          summary: "Error",
+          detail: error.response?.data?.error,
+        });
+      });
+  }
+
   async function deleteVideo() {
     const config: AxiosRequestConfig = {
       method: "delete",
@@ -101,6 +129,18 @@ export default function TableRowOptionMenu(rowData: VideoT): ReactNode {
             className="stroke-3 text-[20px] font-bold"
           />
         </Button>
+        {(canPause || rowData.downloadStatus === "paused") && (
+          <Button
+            onClick={pauseOrResume}
+            severity="secondary"
+            className="px-1 py-[2px]"
+          >
+            <Icon
+              icon={canPause ? "tabler:player-pause" : "tabler:player-play"}
+              className="stroke-3 text-[20px] font-bold"
+            />
+          </Button>
+        )}
         <Button
           onClick={() => setInfo(true)}
           severity="warning"
@@ -218,7 +218,7 @@ function VideoDialog({
         ref={player}
         currentTime={rowData.prevWatchTime || 0}
         src={{
-          src: "http://localhost:8000/api/files/" + rowData.videoPathId,
+          src: "http://localhost:8000/api/media/" + rowData.videoPathId,
           type: "video/mp4",
         }}
         viewType="video"
@@ -30,19 +30,33 @@ export const VideoS = z.object({
   thumbnailPathId: z.string(),
   vttPathId: z.string(),
   vttSpritePathId: z.string(),
+  extractor: z.string().optional(),
+  createdAt: z.number().optional(),
+  downloadedBytes: z.number().optional(),
+  formatId: z.string().optional(),
   ...DownloadFormS.shape,
 });
 
 export type VideoT = z.infer<typeof VideoS>;
 
+export type VideoPageT = {
+  items: VideoT[];
+  nextCursor: string | null;
+};
+
 export const VideoProgressS = z.object({
   id: z.string(),
   videoId: z.string(),
-  eta: z.number(),
+  status: z.string(),
   percent: z.number(),
-  speed: z.number(),
-  downloadedSize: z.number(),
-  totalSize: z.number(),
+  downloadedBytes: z.number(),
+  totalBytes: z.number().nullable(),
+  speed: z.number().nullable(),
+  eta: z.number().nullable(),
+  fragmentIndex: z.number().nullable(),
+  fragmentCount: z.number().nullable(),
+  rateLimit: z.number().nullable().optional(),
+  ts: z.number().optional(),
 });
 
 export type VideoProgressT = z.infer<typeof VideoProgressS>;